@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+"""
+Compare the Scrapy and asyncio crawler backends head to head.
+
+For every site size a synthetic site is generated (see `synthetic_site.py`)
+and served locally. Every spider configuration crawls it with both backends,
+alternately, `--repeat` times each, with `seo_spy/main.py` in a fresh
+process. The median wall time of the whole process, including startup,
+pages/sec of the crawl and peak RSS are reported with the speedup of the
+asyncio backend. Findings of both backends are compared too, and the script
+fails if they differ.
+"""
+
+import argparse
+import logging
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+from bench_crawl import CONFIGS, crawl
+from synthetic_site import SITEMAP_LAYOUTS, free_port, generate_site, serve
+
+BACKENDS = ["scrapy", "asyncio"]
+
+
+def crawl_backend(domain, arguments, backend, tmp):
+    """
+    Crawl the domain with the backend.
+
+    Returns:
+        tuple: Dict with `wall_s`, `pages_per_sec` and `peak_rss_mb` of the
+               crawl, and the set of findings.
+    """
+    report_file = os.path.join(tmp, "report.json")
+    findings_file = os.path.join(tmp, "findings.jsonl")
+    start = time.perf_counter()
+    result = crawl(
+        domain,
+        [*arguments, "--backend", backend, "--findings", findings_file],
+        report_file,
+    )
+    wall = time.perf_counter() - start
+    with open(findings_file) as findings:
+        found = set(findings)
+    return {
+        "wall_s": wall,
+        "pages": result["pages"],
+        "pages_per_sec": result["pages_per_sec"],
+        "peak_rss_mb": result["peak_rss_mb"],
+    }, found
+
+
+def run(args):
+    mismatches = []
+    with tempfile.TemporaryDirectory(prefix="seo-spy-bench-") as tmp:
+        for size in args.pages:
+            directory = os.path.join(tmp, f"site-{size}")
+            port = free_port()
+            domain = f"http://127.0.0.1:{port}"
+            generate_site(
+                directory, domain, size, args.links, args.depth,
+                args.sitemap, args.seed,
+            )
+            with serve(directory, port):
+                for name in args.configs:
+                    runs = {backend: [] for backend in BACKENDS}
+                    findings = {}
+                    for _ in range(args.repeat):
+                        # Alternating backends spreads noise of the machine
+                        # evenly over both.
+                        for backend in BACKENDS:
+                            result, found = crawl_backend(
+                                domain, CONFIGS[name], backend, tmp
+                            )
+                            runs[backend].append(result)
+                            findings[backend] = found
+                    medians = {
+                        backend: {
+                            key: statistics.median(r[key] for r in results)
+                            for key in results[0]
+                        }
+                        for backend, results in runs.items()
+                    }
+                    print_result(f"{name}/{size}", medians)
+                    if findings["scrapy"] != findings["asyncio"]:
+                        mismatches.append(f"{name}/{size}")
+    return mismatches
+
+
+def print_result(name, medians):
+    scrapy, asyncio = medians["scrapy"], medians["asyncio"]
+    for backend, result in medians.items():
+        print(
+            f"{name:<28}{backend:<9}" +
+            "".join(f"{key}={value:.3f}  " for key, value in result.items())
+        )
+    print(
+        f"{name:<28}{'speedup':<9}"
+        f"wall={scrapy['wall_s'] / asyncio['wall_s']:.2f}x  "
+        f"pages_per_sec="
+        f"{asyncio['pages_per_sec'] / scrapy['pages_per_sec']:.2f}x"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__,
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    parser.add_argument(
+        "--pages",
+        type=int,
+        nargs="+",
+        default=[1000, 4000],
+        help="Numbers of pages of the synthetic sites"
+    )
+    parser.add_argument(
+        "--links",
+        type=int,
+        default=20,
+        help="Number of links on every page"
+    )
+    parser.add_argument(
+        "--depth",
+        type=int,
+        default=3,
+        help="Nesting depth of pages and number of ../ in relative links"
+    )
+    parser.add_argument(
+        "--sitemap",
+        choices=SITEMAP_LAYOUTS,
+        default="index",
+        help="Sitemap layout of the synthetic sites"
+    )
+    parser.add_argument(
+        "--configs",
+        nargs="+",
+        choices=list(CONFIGS),
+        default=["audit", "audit-nositemap"],
+        help="Spider configurations to run"
+    )
+    parser.add_argument(
+        "--repeat",
+        type=int,
+        default=3,
+        help="Number of crawls with every backend, the median is kept"
+    )
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    logging.disable(logging.CRITICAL)
+    if args.sitemap == "none":
+        args.configs = [name for name in args.configs if "-n" in CONFIGS[name]]
+
+    mismatches = run(args)
+    for name in mismatches:
+        print(f"MISMATCH {name}: backends reported different findings")
+    if mismatches:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
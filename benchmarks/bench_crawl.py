@@ -0,0 +1,237 @@
+#!/usr/bin/env python3
+"""
+Crawl synthetic sites served locally and report throughput, memory and
+shutdown time of every spider.
+
+For every site size a synthetic site is generated (see `synthetic_site.py`)
+and served by the standard library HTTP server in a separate process. Every
+spider configuration crawls it `--repeat` times with `seo_spy/main.py` in
+a fresh process, and the median pages/sec, peak RSS of the crawling process
+and time spent in `closed()` are reported. Speed of `UrlNormalizer` on all
+links of the site is measured too.
+
+With `--save FILE`, results are stored as JSON. With `--compare FILE`, they
+are compared with saved ones, and the script fails if any metric got worse
+by more than `--tolerance`.
+"""
+
+import argparse
+import json
+import logging
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+from common import SEO_SPY_DIR, Timer
+from synthetic_site import SITEMAP_LAYOUTS, free_port, generate_site, serve
+
+CONFIGS = {
+    "orphan": ["-o"],
+    "orphan-nositemap": ["-o", "-n"],
+    "canonical": ["-c"],
+    "canonical-nositemap": ["-c", "-n"],
+    "audit": ["-o", "-c"],
+    "audit-nositemap": ["-o", "-c", "-n"],
+}
+
+# Metrics which regress when they grow, with the smallest change counted as
+# a regression, so timer noise of fast phases is ignored.
+HIGHER_IS_WORSE = {"peak_rss_mb": 5.0, "closed_s": 0.05}
+LOWER_IS_WORSE = {"pages_per_sec": 0.0, "hrefs_per_sec": 0.0}
+
+
+def crawl(domain, arguments, report_file):
+    """
+    Crawl the domain with `main.py` in a new process.
+
+    Returns:
+        dict: `pages_per_sec`, `peak_rss_mb` and `closed_s` of the crawl.
+    """
+    command = [
+        sys.executable, os.path.join(SEO_SPY_DIR, "main.py"),
+        "-d", domain, "--report", report_file, *arguments,
+    ]
+    process = subprocess.Popen(
+        command, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    # Resource usage of this child only, unlike RUSAGE_CHILDREN.
+    _, status, usage = os.wait4(process.pid, 0)
+    if os.waitstatus_to_exitcode(status) not in (0, 2):
+        raise RuntimeError(f"Crawl failed: {' '.join(command)}")
+    with open(report_file) as report:
+        performance = json.load(report)["performance"]
+    return {
+        "pages": performance["pages"],
+        "pages_per_sec": performance["pages_per_sec"],
+        "peak_rss_mb": usage.ru_maxrss / 1024,
+        "closed_s": performance.get("time/closed", 0.0),
+    }
+
+
+def normalize(directory, domain, urls):
+    """
+    Resolve all links of the generated site with `UrlNormalizer`.
+
+    Returns:
+        dict: `hrefs_per_sec` of the normalizer, with empty caches.
+    """
+    from scrapy.http import HtmlResponse
+
+    from extraction import FAST, LinkExtractor
+    from url_normalizer import UrlNormalizer
+
+    extractor = LinkExtractor(FAST)
+    pages = []
+    for url in urls:
+        path = os.path.join(directory + url[len(domain):], "index.html")
+        with open(path, "rb") as html:
+            response = HtmlResponse(
+                url=url, body=html.read(), encoding="utf-8"
+            )
+        pages.append((url, extractor.extract(response, "hrefs")["hrefs"]))
+    normalizer = UrlNormalizer(domain)
+    with Timer() as timer:
+        for url, hrefs in pages:
+            normalizer.normalize_all(url, hrefs)
+    hrefs = sum(len(hrefs) for _, hrefs in pages)
+    return {"hrefs_per_sec": hrefs / timer.elapsed}
+
+
+def run(args):
+    results = {}
+    with tempfile.TemporaryDirectory(prefix="seo-spy-bench-") as tmp:
+        report_file = os.path.join(tmp, "report.json")
+        for size in args.pages:
+            directory = os.path.join(tmp, f"site-{size}")
+            port = free_port()
+            domain = f"http://127.0.0.1:{port}"
+            urls = generate_site(
+                directory, domain, size, args.links, args.depth,
+                args.sitemap, args.seed,
+            )
+            results[f"normalizer/{size}"] = normalize(directory, domain, urls)
+            with serve(directory, port):
+                for name in args.configs:
+                    runs = [
+                        crawl(domain, CONFIGS[name], report_file)
+                        for _ in range(args.repeat)
+                    ]
+                    results[f"{name}/{size}"] = {
+                        key: statistics.median(run[key] for run in runs)
+                        for key in runs[0]
+                    }
+                    print_result(f"{name}/{size}", results[f"{name}/{size}"])
+            print_result(
+                f"normalizer/{size}", results[f"normalizer/{size}"]
+            )
+    return results
+
+
+def print_result(name, result):
+    print(
+        f"{name:<28}" +
+        "".join(f"{key}={value:.3f}  " for key, value in result.items())
+    )
+
+
+def compare(results, baseline, tolerance):
+    """
+    Return descriptions of metrics that got worse than in the baseline.
+    """
+    regressions = []
+    for name, result in results.items():
+        for key, value in result.items():
+            old = baseline.get(name, {}).get(key)
+            if old is None:
+                continue
+            if key in HIGHER_IS_WORSE:
+                worse = (
+                    value > old * (1 + tolerance) and
+                    value - old > HIGHER_IS_WORSE[key]
+                )
+            elif key in LOWER_IS_WORSE:
+                worse = value < old * (1 - tolerance)
+            else:
+                continue
+            if worse:
+                regressions.append(f"{name} {key}: {old:.3f} -> {value:.3f}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__,
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    parser.add_argument(
+        "--pages",
+        type=int,
+        nargs="+",
+        default=[1000, 4000],
+        help="Numbers of pages of the synthetic sites"
+    )
+    parser.add_argument(
+        "--links",
+        type=int,
+        default=20,
+        help="Number of links on every page"
+    )
+    parser.add_argument(
+        "--depth",
+        type=int,
+        default=3,
+        help="Nesting depth of pages and number of ../ in relative links"
+    )
+    parser.add_argument(
+        "--sitemap",
+        choices=SITEMAP_LAYOUTS,
+        default="index",
+        help="Sitemap layout of the synthetic sites"
+    )
+    parser.add_argument(
+        "--configs",
+        nargs="+",
+        choices=list(CONFIGS),
+        default=list(CONFIGS),
+        help="Spider configurations to run"
+    )
+    parser.add_argument(
+        "--repeat",
+        type=int,
+        default=3,
+        help="Number of crawls of every configuration, the median is kept"
+    )
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--save", help="Write results to the JSON file")
+    parser.add_argument(
+        "--compare",
+        help="Fail if results are worse than those in the JSON file"
+    )
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=0.2,
+        help="Allowed relative change against --compare results"
+    )
+    args = parser.parse_args()
+    logging.disable(logging.CRITICAL)
+    if args.sitemap == "none":
+        args.configs = [name for name in args.configs if "-n" in CONFIGS[name]]
+
+    results = run(args)
+    if args.save:
+        with open(args.save, "w") as saved:
+            json.dump(results, saved, indent=2)
+    if args.compare:
+        with open(args.compare) as saved:
+            regressions = compare(results, json.load(saved), args.tolerance)
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,203 @@
+#!/usr/bin/env python3
+"""
+Compare a single crawler process with a distributed crawl of local workers.
+
+For every site size a synthetic site is generated (see `synthetic_site.py`)
+and served locally. Every spider configuration crawls it once with a single
+`seo_spy/main.py` process and once with `--workers` worker processes, each
+crawling a shard of the site, followed by the merge run, `--repeat` times
+each. The median wall time of the single crawl, of the workers and of the
+merge are reported with the speedup of the distributed crawl. Workers run
+on this machine, so the speedup is bounded by its CPU cores and by the
+server. Findings of the merge run are compared with those of the single
+crawl, and the script fails if they differ.
+"""
+
+import argparse
+import json
+import logging
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+from bench_crawl import CONFIGS
+from common import SEO_SPY_DIR
+from synthetic_site import SITEMAP_LAYOUTS, free_port, generate_site, serve
+
+
+def run_main(domain, arguments, report_file=None):
+    """
+    Run `main.py` on the domain in a new process, without waiting for it.
+    """
+    command = [
+        sys.executable, os.path.join(SEO_SPY_DIR, "main.py"),
+        "-d", domain, *arguments,
+    ]
+    if report_file:
+        command += ["--report", report_file]
+    return subprocess.Popen(
+        command, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+
+
+def wait(process):
+    if process.wait() not in (0, 2):
+        raise RuntimeError(f"Crawl failed: {' '.join(process.args)}")
+
+
+def read_findings(report_file):
+    with open(report_file) as report:
+        checks = json.load(report)["checks"]
+    return {name: sorted(check["findings"]) for name, check in checks.items()}
+
+
+def crawl_single(domain, arguments, tmp):
+    report_file = os.path.join(tmp, "single.json")
+    start = time.perf_counter()
+    wait(run_main(domain, arguments, report_file))
+    return time.perf_counter() - start, read_findings(report_file)
+
+
+def crawl_distributed(domain, arguments, workers, tmp):
+    """
+    Crawl the domain with the workers, then merge their results.
+
+    Returns:
+        tuple: Dict with `workers_s` and `merge_s` and the findings.
+    """
+    store = os.path.join(tmp, "shared.db")
+    for suffix in ("", "-wal", "-shm"):
+        if os.path.exists(store + suffix):
+            os.remove(store + suffix)
+    start = time.perf_counter()
+    processes = [
+        run_main(
+            domain,
+            [*arguments, "--shared", store, "--shard", f"{i}/{workers}"],
+        )
+        for i in range(workers)
+    ]
+    for process in processes:
+        wait(process)
+    crawled = time.perf_counter()
+    report_file = os.path.join(tmp, "merge.json")
+    wait(run_main(
+        domain, [*arguments, "--shared", store, "--merge"], report_file
+    ))
+    merged = time.perf_counter()
+    return {
+        "workers_s": crawled - start,
+        "merge_s": merged - crawled,
+    }, read_findings(report_file)
+
+
+def run(args):
+    mismatches = []
+    with tempfile.TemporaryDirectory(prefix="seo-spy-bench-") as tmp:
+        for size in args.pages:
+            directory = os.path.join(tmp, f"site-{size}")
+            port = free_port()
+            domain = f"http://127.0.0.1:{port}"
+            generate_site(
+                directory, domain, size, args.links, args.depth,
+                args.sitemap, args.seed,
+            )
+            with serve(directory, port):
+                for name in args.configs:
+                    single, distributed = [], []
+                    same = True
+                    for _ in range(args.repeat):
+                        wall, expected = crawl_single(
+                            domain, CONFIGS[name], tmp
+                        )
+                        single.append(wall)
+                        result, found = crawl_distributed(
+                            domain, CONFIGS[name], args.workers, tmp
+                        )
+                        distributed.append(result)
+                        same = same and found == expected
+                    single_s = statistics.median(single)
+                    workers_s = statistics.median(
+                        r["workers_s"] for r in distributed
+                    )
+                    merge_s = statistics.median(
+                        r["merge_s"] for r in distributed
+                    )
+                    label = f"{name}/{size}"
+                    print(
+                        f"{label:<28}single_s={single_s:.3f}  "
+                        f"workers_s={workers_s:.3f}  merge_s={merge_s:.3f}  "
+                        f"speedup={single_s / (workers_s + merge_s):.2f}x"
+                    )
+                    if not same:
+                        mismatches.append(f"{name}/{size}")
+    return mismatches
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__,
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    parser.add_argument(
+        "--pages",
+        type=int,
+        nargs="+",
+        default=[2000],
+        help="Numbers of pages of the synthetic sites"
+    )
+    parser.add_argument(
+        "--links",
+        type=int,
+        default=20,
+        help="Number of links on every page"
+    )
+    parser.add_argument(
+        "--depth",
+        type=int,
+        default=3,
+        help="Nesting depth of pages and number of ../ in relative links"
+    )
+    parser.add_argument(
+        "--sitemap",
+        choices=SITEMAP_LAYOUTS,
+        default="index",
+        help="Sitemap layout of the synthetic sites"
+    )
+    parser.add_argument(
+        "--configs",
+        nargs="+",
+        choices=list(CONFIGS),
+        default=["audit", "audit-nositemap"],
+        help="Spider configurations to run"
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=os.cpu_count() or 2,
+        help="Number of workers of the distributed crawl. Default: CPU count"
+    )
+    parser.add_argument(
+        "--repeat",
+        type=int,
+        default=3,
+        help="Number of crawls of every kind, the median is kept"
+    )
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    logging.disable(logging.CRITICAL)
+    if args.sitemap == "none":
+        args.configs = [name for name in args.configs if "-n" in CONFIGS[name]]
+
+    mismatches = run(args)
+    for name in mismatches:
+        print(f"MISMATCH {name}: merged findings differ from a single crawl")
+    if mismatches:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+Compare the fast single-pass link extractor with XPath selectors.
+
+Runs both extractors on a corpus of saved HTML pages, or on large generated
+pages if no corpus is given. The script fails if the extracted hrefs or the
+presence of a canonical link differ and prints time spent per page.
+"""
+
+import argparse
+import glob
+import os
+
+from common import DOMAIN, Timer, page_url
+from extraction import LinkExtractor, FAST, XPATH
+
+
+def generated_page(page, links):
+    """
+    Return large HTML page with navigation, content, comments and scripts.
+    """
+    parts = [
+        "<!DOCTYPE html><html><head><meta charset='utf-8'>",
+        f'<link rel="canonical" href="{page_url(page)}">',
+        "<script>var tpl = '<a href=\"/in-script/\">x</a>';</script>",
+        "<style>a[href] { color: red; }</style></head><body><nav><ul>",
+    ]
+    for i in range(links):
+        parts.append(
+            f"<li class='nav-item'><A HREF='/section-{i}/?a=1&amp;b={i}'>"
+            f"Section {i}</A></li>"
+        )
+    parts.append("</ul></nav><!-- <a href='/commented-out/'> --><main>")
+    for i in range(links):
+        parts.append(
+            f"<div class=\"para\"><p>Paragraph {i} with <b>bold</b> text and"
+            f" a <a title=\"a > b\" href=\"../page-{i}/#frag\">link</a>.</p>"
+            "</div>"
+        )
+    parts.append("</main></body></html>")
+    return "".join(parts).encode()
+
+
+def corpus(directory, pages, links):
+    """
+    Return list of Scrapy responses of the corpus.
+    """
+    from scrapy.http import HtmlResponse
+
+    if directory:
+        paths = sorted(glob.glob(os.path.join(directory, "**", "*.html"),
+                                 recursive=True))
+        bodies = [open(path, "rb").read() for path in paths]
+    else:
+        bodies = [generated_page(page, links) for page in range(pages)]
+    return [
+        HtmlResponse(url=f"{DOMAIN}/page-{i}/", body=body, encoding="utf-8")
+        for i, body in enumerate(bodies)
+    ]
+
+
+def run(extractor, responses):
+    results = []
+    with Timer() as timer:
+        for response in responses:
+            extracted = extractor.extract(response, "hrefs")
+            if "canonical" not in extracted:
+                extracted.update(extractor.extract(response, "canonical"))
+            results.append(extracted)
+    return timer.elapsed, results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "--corpus",
+        help="Directory with saved HTML pages, searched recursively"
+    )
+    parser.add_argument("--pages", type=int, default=200)
+    parser.add_argument("--links", type=int, default=500)
+    args = parser.parse_args()
+
+    # Responses are created twice, so that neither extractor benefits from
+    # the text or selector cached in the response by the other one.
+    xpath_time, expected = run(
+        LinkExtractor(XPATH), corpus(args.corpus, args.pages, args.links)
+    )
+    fast_time, results = run(
+        LinkExtractor(FAST), corpus(args.corpus, args.pages, args.links)
+    )
+    for i, (got, want) in enumerate(zip(results, expected)):
+        if got["hrefs"] != want["hrefs"]:
+            raise SystemExit(f"Hrefs mismatch on page {i}")
+        if bool(got["canonical"]) != bool(want["canonical"]):
+            raise SystemExit(f"Canonical mismatch on page {i}")
+
+    pages = len(results)
+    print(f"pages:  {pages}")
+    print(f"xpath:  {xpath_time / pages * 1e3:.3f} ms/page")
+    print(f"fast:   {fast_time / pages * 1e3:.3f} ms/page")
+    print(f"speedup: {xpath_time / fast_time:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+"""
+Time the link status check on a synthetic site and verify its findings.
+
+A synthetic site is generated (see `synthetic_site.py`), whose internal
+links all work and whose pages also have `javascript:`, `tel:` and
+`mailto:` links. It is audited with `-l` by `seo_spy/main.py`, once crawled
+from a local server and once offline from its build directory, with and
+without the sitemap, `--repeat` times each. The median wall time and
+pages/sec are reported. The script fails if an audit crashes, misses pages
+of the site or reports any of its links, e.g. because links which can not
+be downloaded were probed or followed.
+"""
+
+import argparse
+import json
+import logging
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+from bench_crawl import crawl
+from synthetic_site import free_port, generate_site, serve
+
+CONFIGS = {
+    "links": ["-l"],
+    "links-nositemap": ["-l", "-n"],
+}
+MODES = ["crawl", "offline"]
+
+
+def audit(domain, arguments, report_file):
+    """
+    Audit the domain with `main.py` in a new process.
+
+    Returns:
+        tuple: Dict with `wall_s` and `pages_per_sec` of the audit, its
+               number of pages and the findings of the link status check.
+    """
+    start = time.perf_counter()
+    result = crawl(domain, arguments, report_file)
+    wall = time.perf_counter() - start
+    with open(report_file) as report:
+        findings = json.load(report)["checks"]["links"]["findings"]
+    return {
+        "wall_s": wall,
+        "pages_per_sec": result["pages_per_sec"],
+    }, result["pages"], findings
+
+
+def run(args):
+    failures = []
+    with tempfile.TemporaryDirectory(prefix="seo-spy-bench-") as tmp:
+        report_file = os.path.join(tmp, "report.json")
+        directory = os.path.join(tmp, "site")
+        port = free_port()
+        domain = f"http://127.0.0.1:{port}"
+        generate_site(
+            directory, domain, args.pages, args.links, args.depth,
+            "single", args.seed,
+        )
+        with serve(directory, port):
+            for mode in MODES:
+                for name, arguments in CONFIGS.items():
+                    if mode == "offline":
+                        arguments = [*arguments, "--offline", directory]
+                    label = f"{mode}/{name}"
+                    runs = []
+                    for _ in range(args.repeat):
+                        result, pages, findings = audit(
+                            domain, arguments, report_file
+                        )
+                        runs.append(result)
+                        # Pages of the sitemap, without the root page.
+                        if pages < args.pages:
+                            failures.append(
+                                f"{label}: {pages} of {args.pages} pages"
+                            )
+                        failures.extend(
+                            f"{label}: {finding}" for finding in findings
+                        )
+                    print(
+                        f"{label:<28}" + "".join(
+                            f"{key}="
+                            f"{statistics.median(r[key] for r in runs):.3f}  "
+                            for key in runs[0]
+                        )
+                    )
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__,
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    parser.add_argument(
+        "--pages",
+        type=int,
+        default=1000,
+        help="Number of pages of the synthetic site"
+    )
+    parser.add_argument(
+        "--links",
+        type=int,
+        default=20,
+        help="Number of links on every page"
+    )
+    parser.add_argument(
+        "--depth",
+        type=int,
+        default=3,
+        help="Nesting depth of pages and number of ../ in relative links"
+    )
+    parser.add_argument(
+        "--repeat",
+        type=int,
+        default=3,
+        help="Number of audits of every kind, the median is kept"
+    )
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    logging.disable(logging.CRITICAL)
+
+    failures = run(args)
+    for failure in failures:
+        print(f"FAILURE {failure}")
+    if failures:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+Measure startup time of `main.py` on paths which do not crawl anything and
+check that they do not import Scrapy.
+
+`main.py --help` and a run rejected by argument validation are started
+`--repeat` times each. The median time over a bare interpreter start and
+the modules imported, as reported by `python -X importtime`, are printed.
+The script fails if any of the `HEAVY` packages was imported, or if the
+startup overhead exceeds `--max-overhead` milliseconds, so a check or an
+option importing Scrapy at module level is caught before it slows down
+every pre-commit hook.
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+from common import SEO_SPY_DIR
+
+MAIN = os.path.join(SEO_SPY_DIR, "main.py")
+
+# Packages only needed once a crawl starts.
+HEAVY = ["scrapy", "twisted", "lxml", "parsel", "w3lib", "itemadapter"]
+
+COMMANDS = {
+    "help": [MAIN, "--help"],
+    "invalid domain": [MAIN, "-d", "example.com", "-o"],
+}
+
+
+def elapsed(arguments):
+    start = time.perf_counter()
+    subprocess.run(
+        [sys.executable, *arguments],
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    return time.perf_counter() - start
+
+
+def imported_modules(arguments):
+    """
+    Return names of modules imported by the command.
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", *arguments],
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.PIPE,
+        text=True,
+    )
+    modules = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or line.endswith("| package"):
+            continue
+        modules.append(line.rsplit("|", 1)[-1].strip())
+    return modules
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__,
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    parser.add_argument(
+        "--repeat",
+        type=int,
+        default=10,
+        help="Number of starts of every command, the median is kept"
+    )
+    parser.add_argument(
+        "--max-overhead",
+        type=float,
+        default=150.0,
+        help="Allowed startup time over a bare interpreter, in milliseconds"
+    )
+    args = parser.parse_args()
+
+    interpreter = statistics.median(
+        elapsed(["-c", "pass"]) for _ in range(args.repeat)
+    )
+    print(f"{'interpreter':<20}{interpreter * 1000:>10.1f} ms")
+    failures = []
+    for name, arguments in COMMANDS.items():
+        overhead = statistics.median(
+            elapsed(arguments) for _ in range(args.repeat)
+        ) - interpreter
+        heavy = sorted({
+            module.split(".")[0] for module in imported_modules(arguments)
+            if module.split(".")[0] in HEAVY
+        })
+        print(
+            f"{name:<20}{overhead * 1000:>+10.1f} ms"
+            f"  heavy imports: {', '.join(heavy) or 'none'}"
+        )
+        if heavy:
+            failures.append(f"{name}: imports {', '.join(heavy)}")
+        if overhead * 1000 > args.max_overhead:
+            failures.append(
+                f"{name}: startup overhead {overhead * 1000:.1f} ms"
+            )
+    for failure in failures:
+        print(f"FAIL {failure}")
+    if failures:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""
+Compare memory and speed of the Bloom filter used to deduplicate discovered
+links with exact sets of URLs and request fingerprints.
+
+The exact variant is what the no-sitemap spiders kept before: a `UrlIndex`
+of links in the spider and a set of request fingerprints in the Scrapy
+duplicates filter. Every variant is run twice, once for time and once for
+memory measured with tracemalloc. False positives are counted by looking up
+as many URLs that were never added.
+"""
+
+import argparse
+import tempfile
+import tracemalloc
+
+from common import Timer, page_url
+from url_filter import UrlFilter
+from url_index import UrlIndex
+
+
+def measure(factory, add, urls):
+    with Timer() as timer:
+        seen = factory()
+        for url in urls:
+            add(seen, url)
+    if hasattr(seen, "close"):
+        seen.close()
+    tracemalloc.start()
+    seen = factory()
+    for url in urls:
+        add(seen, url)
+    memory = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return seen, timer.elapsed, memory
+
+
+def exact(urls):
+    from scrapy import Request
+    from scrapy.utils.request import RequestFingerprinter
+    from scrapy.utils.test import get_crawler
+
+    fingerprinter = RequestFingerprinter.from_crawler(get_crawler(
+        settings_dict={"REQUEST_FINGERPRINTER_IMPLEMENTATION": "2.7"}
+    ))
+
+    def add(seen, url):
+        index, fingerprints = seen
+        if index.add(url):
+            fingerprints.add(fingerprinter.fingerprint(Request(url)).hex())
+
+    _, elapsed, memory = measure(lambda: (UrlIndex(), set()), add, urls)
+    return elapsed, memory, 0
+
+
+def bloom(urls, unseen, error_rate, directory=None):
+    seen, elapsed, memory = measure(
+        lambda: UrlFilter(error_rate=error_rate, directory=directory),
+        UrlFilter.add,
+        urls,
+    )
+    false_positives = sum(1 for url in unseen if url in seen)
+    stats = seen.stats()
+    seen.close()
+    return elapsed, memory, false_positives, stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "--sizes",
+        type=int,
+        nargs="+",
+        default=[10000, 100000, 500000],
+        help="Numbers of distinct URLs"
+    )
+    parser.add_argument(
+        "--error-rates",
+        type=float,
+        nargs="+",
+        default=[1e-3, 1e-6],
+        help="False-positive budgets of the Bloom filter"
+    )
+    parser.add_argument(
+        "--spill",
+        action="store_true",
+        help="Write full stages of the Bloom filter to a temporary directory"
+    )
+    args = parser.parse_args()
+
+    print(
+        f"{'variant':<16}{'urls':>10}{'time [s]':>10}{'us/url':>8}"
+        f"{'memory [KiB]':>14}{'disk [KiB]':>12}{'false pos.':>12}"
+    )
+    for size in args.sizes:
+        urls = [page_url(page) + "?facet=a" for page in range(size)]
+        unseen = [page_url(page) + "?facet=b" for page in range(size)]
+        elapsed, memory, false_positives = exact(urls)
+        print(
+            f"{'exact':<16}{size:>10}{elapsed:>10.2f}"
+            f"{elapsed / size * 1e6:>8.1f}{memory / 1024:>14.0f}"
+            f"{0:>12}{false_positives:>12}"
+        )
+        for error_rate in args.error_rates:
+            with tempfile.TemporaryDirectory() as directory:
+                elapsed, memory, false_positives, stats = bloom(
+                    urls, unseen, error_rate,
+                    directory if args.spill else None
+                )
+            print(
+                f"{f'bloom {error_rate:g}':<16}{size:>10}{elapsed:>10.2f}"
+                f"{elapsed / size * 1e6:>8.1f}{memory / 1024:>14.0f}"
+                f"{stats['disk_bytes'] / 1024:>12.0f}{false_positives:>12}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""
+Measure how link bookkeeping of the spiders scales with site size.
+
+Feeds synthetic pages straight into `parse()` and then calls `closed()` of
+every spider, without any network traffic. With constant time URL lookups
+the time per page should stay flat as the number of pages grows.
+"""
+
+import argparse
+import logging
+
+from common import Timer, create_spider, html_responses
+from spiders.canonical_link_spider import CanonicalLinkSpider
+from spiders.canonical_link_spider import CanonicalLinkSpiderNoSitemap
+from spiders.orphan_pages_spider import OrphanPagesSpider
+from spiders.orphan_pages_spider import OrphanPagesSpiderNoSitemap
+
+SPIDERS = [
+    OrphanPagesSpider,
+    OrphanPagesSpiderNoSitemap,
+    CanonicalLinkSpider,
+    CanonicalLinkSpiderNoSitemap,
+]
+
+
+def run(spider_cls, responses):
+    spider = create_spider(spider_cls)
+    with Timer() as parse_timer:
+        for response in responses:
+            for _ in spider.parse(response) or ():
+                pass
+    with Timer() as closed_timer:
+        spider.closed("finished")
+    return parse_timer.elapsed, closed_timer.elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "--sizes",
+        type=int,
+        nargs="+",
+        default=[1000, 2000, 4000, 8000, 16000],
+        help="Numbers of pages of the synthetic sites"
+    )
+    parser.add_argument(
+        "--links",
+        type=int,
+        default=20,
+        help="Number of links on every page"
+    )
+    args = parser.parse_args()
+    logging.disable(logging.CRITICAL)
+
+    print(
+        f"{'spider':<32}{'pages':>8}{'parse [s]':>12}"
+        f"{'closed [s]':>12}{'us/page':>10}"
+    )
+    for spider_cls in SPIDERS:
+        for size in args.sizes:
+            responses = list(html_responses(size, args.links))
+            parse_time, closed_time = run(spider_cls, responses)
+            per_page = (parse_time + closed_time) / size * 1e6
+            print(
+                f"{spider_cls.__name__:<32}{size:>8}{parse_time:>12.3f}"
+                f"{closed_time:>12.3f}{per_page:>10.1f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
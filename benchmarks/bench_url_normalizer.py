@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""
+Compare UrlNormalizer with the href resolution loop it replaced.
+
+Both implementations resolve the same hrefs of a synthetic site. The script
+fails if any result differs and prints time spent per href.
+"""
+
+import argparse
+from urllib.parse import urljoin
+
+from common import DOMAIN, Timer, page_url
+from url_normalizer import UrlNormalizer
+
+EDGE_CASE_HREFS = [
+    "",
+    "/",
+    "#",
+    "#top",
+    "./",
+    "page/",
+    "page",
+    "page.html#section",
+    "../",
+    "../../",
+    "../sibling/",
+    "../../other/page.html",
+    "..",
+    "/root/relative",
+    "//cdn.example.com/asset.js",
+    "?query=1",
+    "mailto:someone@example.com",
+    "https://example.com/external/",
+    DOMAIN,
+    DOMAIN + "/absolute/page#frag",
+]
+
+
+def legacy_resolve(domain, base_link, incoming_link):
+    """
+    Href resolution as previously done in every spider's `parse()`.
+    """
+    if (
+        incoming_link.startswith("https://") or
+        incoming_link.startswith("http://") or
+        incoming_link.startswith("mailto:") or
+        incoming_link.startswith("#")
+    ) and not incoming_link.startswith(domain):
+        return None
+    while incoming_link.startswith(".."):
+        link_rel = base_link.split("/")[-2] + "/"
+        base_link = base_link.split(link_rel)[0]
+        incoming_link = incoming_link[2:]
+        if incoming_link:
+            incoming_link = incoming_link[1:]
+
+    if incoming_link.startswith("/"):
+        base_link = domain
+        incoming_link = incoming_link[1:]
+
+    incoming_link = urljoin(base_link, incoming_link)
+    incoming_link = incoming_link.split("#")[0]
+    if not incoming_link.endswith("/"):
+        incoming_link = incoming_link + "/"
+    return incoming_link
+
+
+def site_hrefs(pages, links_per_page):
+    """
+    Return list of (base, hrefs) pairs of a synthetic site.
+    """
+    site = []
+    for page in range(pages):
+        hrefs = list(EDGE_CASE_HREFS)
+        for i in range(links_per_page):
+            path = page_url((page + i) % pages)[len(DOMAIN):]
+            hrefs.append(path if i % 2 else "../.." + path)
+        site.append((page_url(page), hrefs))
+    return site
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--pages", type=int, default=5000)
+    parser.add_argument("--links", type=int, default=40)
+    args = parser.parse_args()
+
+    site = site_hrefs(args.pages, args.links)
+    hrefs_count = sum(len(hrefs) for _, hrefs in site)
+
+    with Timer() as legacy_timer:
+        expected = []
+        for base, hrefs in site:
+            links = [legacy_resolve(DOMAIN, base, href) for href in hrefs]
+            expected.append([link for link in links if link is not None])
+
+    normalizer = UrlNormalizer(DOMAIN)
+    with Timer() as normalizer_timer:
+        results = [
+            normalizer.normalize_all(base, hrefs) for base, hrefs in site
+        ]
+
+    if results != expected:
+        for (base, _), got, want in zip(site, results, expected):
+            if got != want:
+                raise SystemExit(f"Mismatch on {base}:\n{got}\n{want}")
+
+    legacy_us = legacy_timer.elapsed / hrefs_count * 1e6
+    normalizer_us = normalizer_timer.elapsed / hrefs_count * 1e6
+    print(f"hrefs:      {hrefs_count}")
+    print(f"legacy:     {legacy_us:.3f} us/href")
+    print(f"normalizer: {normalizer_us:.3f} us/href")
+    print(f"speedup:    {legacy_us / normalizer_us:.1f}x")
+    print(f"cache:      {normalizer.cache_info()}")
+
+
+if __name__ == "__main__":
+    main()
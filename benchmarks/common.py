@@ -0,0 +1,95 @@
+"""
+Shared helpers for SEO Spy benchmarks.
+
+Benchmarks are plain scripts run from the repository root, e.g.:
+
+    python benchmarks/bench_url_index.py
+"""
+
+import os
+import sys
+import time
+
+SEO_SPY_DIR = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "seo_spy"
+)
+if SEO_SPY_DIR not in sys.path:
+    sys.path.insert(0, SEO_SPY_DIR)
+
+DOMAIN = "http://127.0.0.1:8000"
+
+
+def page_url(page, domain=DOMAIN):
+    """
+    Return URL of the synthetic page with the given number.
+    """
+    return f"{domain}/section-{page % 50}/page-{page}/"
+
+
+def page_body(page, pages, links_per_page, domain=DOMAIN):
+    """
+    Return HTML body of the synthetic page with the given number.
+
+    Every page links to `links_per_page` other pages using a mix of absolute,
+    root relative and `../` relative links, just like generated docs sites.
+    """
+    anchors = []
+    for i in range(links_per_page):
+        target = (page * 7 + i * 13 + 1) % pages
+        path = page_url(target, domain)[len(domain):]
+        if i % 3 == 0:
+            href = domain + path
+        elif i % 3 == 1:
+            href = path
+        else:
+            href = "../.." + path
+        anchors.append(f'<a href="{href}">page {target}</a>')
+    anchors.append('<a href="#content">skip</a>')
+    anchors.append('<a href="https://example.com/">external</a>')
+    return (
+        "<html><head>"
+        f'<link rel="canonical" href="{page_url(page, domain)}">'
+        "</head><body>" + "".join(anchors) + "</body></html>"
+    ).encode()
+
+
+def html_responses(pages, links_per_page, domain=DOMAIN):
+    """
+    Yield Scrapy HtmlResponse objects of a synthetic site.
+    """
+    from scrapy.http import HtmlResponse, Request
+
+    for page in range(pages):
+        url = page_url(page, domain)
+        yield HtmlResponse(
+            url=url,
+            body=page_body(page, pages, links_per_page, domain),
+            encoding="utf-8",
+            request=Request(url),
+        )
+
+
+def create_spider(spider_cls, domain=DOMAIN):
+    """
+    Create spider bound to a crawler, without starting the crawl.
+    """
+    from scrapy.utils.test import get_crawler
+
+    crawler = get_crawler(spider_cls)
+    spider = spider_cls.from_crawler(crawler, domain=domain)
+    crawler.spider = spider
+    crawler.stats.open_spider(spider)
+    return spider
+
+
+class Timer:
+    """
+    Context manager measuring wall-clock time of a block.
+    """
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.elapsed = time.perf_counter() - self.start
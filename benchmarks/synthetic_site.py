@@ -0,0 +1,224 @@
+#!/usr/bin/env python3
+"""
+Generate a synthetic static site and serve it locally.
+
+Pages are nested `depth` directories deep and link to each other with
+a mix of absolute, root relative and `../` relative links. Every page
+links to the next one, so the whole site is reachable from the root page
+without the sitemap. Pages also link to an external site and have
+`javascript:`, `tel:` and `mailto:` links. Every tenth page has no
+canonical link. The sitemap is a single file, an index of plain or gzip
+compressed sitemaps, or missing.
+
+    python benchmarks/synthetic_site.py /tmp/site --pages 5000 --serve
+"""
+
+import argparse
+import contextlib
+import gzip
+import os
+import random
+import socket
+import subprocess
+import sys
+import time
+
+SITEMAP_LAYOUTS = ["single", "index", "gzip", "none"]
+SITEMAP_ENTRIES = 1000
+
+
+def free_port():
+    """
+    Return a TCP port of the loopback interface no one listens on.
+    """
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def page_path(page, depth):
+    """
+    Return path of the synthetic page with the given number.
+    """
+    return f"/section-{page % 50}/" + "part/" * (depth - 2) + f"page-{page}/"
+
+
+def page_body(page, pages, links_per_page, depth, domain, rng):
+    """
+    Return HTML body of the synthetic page with the given number.
+    """
+    targets = [(page + 1) % pages]
+    targets.extend(
+        rng.randrange(pages) for _ in range(links_per_page - 1)
+    )
+    anchors = []
+    for i, target in enumerate(targets):
+        path = page_path(target, depth)
+        if i % 3 == 0:
+            href = domain + path
+        elif i % 3 == 1:
+            href = path
+        else:
+            href = "../" * depth + path[1:]
+        anchors.append(f'<a href="{href}">page {target}</a>')
+    anchors.append('<a href="#content">skip</a>')
+    anchors.append('<a href="https://example.com/">external</a>')
+    # Links which can be neither crawled nor probed.
+    anchors.append('<a href="javascript:void(0)">menu</a>')
+    anchors.append('<a href="tel:+15550100">call</a>')
+    anchors.append('<a href="mailto:info@example.com">mail</a>')
+    head = ""
+    if page % 10:
+        canonical = domain + page_path(page, depth)
+        head = f'<link rel="canonical" href="{canonical}">'
+    return (
+        f"<html><head>{head}</head><body>" + "".join(anchors) +
+        "</body></html>"
+    )
+
+
+def _urlset(urls):
+    entries = "".join(f"<url><loc>{url}</loc></url>" for url in urls)
+    return (
+        '<?xml version="1.0" encoding="UTF-8"?>'
+        '<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">'
+        f"{entries}</urlset>"
+    )
+
+
+def _write_sitemap(directory, domain, urls, layout):
+    if layout == "none":
+        return
+    if layout == "single":
+        with open(os.path.join(directory, "sitemap.xml"), "w") as sitemap:
+            sitemap.write(_urlset(urls))
+        return
+    locs = []
+    for start in range(0, len(urls), SITEMAP_ENTRIES):
+        name = f"sitemap-{start // SITEMAP_ENTRIES}.xml"
+        content = _urlset(urls[start:start + SITEMAP_ENTRIES]).encode()
+        if layout == "gzip":
+            name += ".gz"
+            content = gzip.compress(content, mtime=0)
+        with open(os.path.join(directory, name), "wb") as sitemap:
+            sitemap.write(content)
+        locs.append(f"{domain}/{name}")
+    entries = "".join(f"<sitemap><loc>{loc}</loc></sitemap>" for loc in locs)
+    with open(os.path.join(directory, "sitemap.xml"), "w") as sitemap:
+        sitemap.write(
+            '<?xml version="1.0" encoding="UTF-8"?>'
+            '<sitemapindex '
+            'xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">'
+            f"{entries}</sitemapindex>"
+        )
+
+
+def generate_site(directory, domain, pages, links_per_page=20, depth=2,
+                  sitemap="single", seed=0):
+    """
+    Write a synthetic site to the directory.
+
+    Parameters:
+        directory (str): Directory of the site, created if missing.
+        domain (str): URL the site will be served at, used in absolute
+                      links and the sitemap.
+        pages (int): Number of pages, not counting the root page.
+        links_per_page (int): Number of internal links on every page.
+        depth (int): Number of directories pages are nested in, and of
+                     `../` in relative links. At least 2.
+        sitemap (str): Sitemap layout, one of `SITEMAP_LAYOUTS`.
+        seed (int): Seed of the link targets, the same seed gives the same
+                    site.
+
+    Returns:
+        list: URLs of the pages.
+    """
+    if depth < 2:
+        raise ValueError("Depth of pages must be at least 2")
+    rng = random.Random(seed)
+    urls = []
+    for page in range(pages):
+        path = page_path(page, depth)
+        os.makedirs(directory + path, exist_ok=True)
+        with open(directory + path + "index.html", "w") as html:
+            html.write(
+                page_body(page, pages, links_per_page, depth, domain, rng)
+            )
+        urls.append(domain + path)
+    with open(os.path.join(directory, "index.html"), "w") as html:
+        html.write(
+            f'<html><head><link rel="canonical" href="{domain}/"></head>'
+            f'<body><a href="{page_path(0, depth)}">start</a></body></html>'
+        )
+    _write_sitemap(directory, domain, urls, sitemap)
+    return urls
+
+
+@contextlib.contextmanager
+def serve(directory, port):
+    """
+    Serve the directory with the standard library HTTP server in a separate
+    process, so it does not compete with the crawler for the GIL.
+    """
+    server = subprocess.Popen(
+        [
+            sys.executable, "-m", "http.server", str(port),
+            "--bind", "127.0.0.1", "--directory", directory,
+        ],
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    try:
+        deadline = time.monotonic() + 10
+        while True:
+            try:
+                socket.create_connection(("127.0.0.1", port), 1).close()
+                break
+            except OSError:
+                if time.monotonic() > deadline or server.poll() is not None:
+                    raise RuntimeError("Synthetic site server did not start")
+                time.sleep(0.05)
+        yield f"http://127.0.0.1:{port}"
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__,
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    parser.add_argument("directory", help="Directory of the generated site")
+    parser.add_argument("--pages", type=int, default=1000)
+    parser.add_argument("--links", type=int, default=20)
+    parser.add_argument("--depth", type=int, default=2)
+    parser.add_argument(
+        "--sitemap", choices=SITEMAP_LAYOUTS, default="single"
+    )
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument(
+        "--serve",
+        action="store_true",
+        help="Serve the site until interrupted"
+    )
+    args = parser.parse_args()
+    domain = f"http://127.0.0.1:{args.port}"
+    generate_site(
+        args.directory, domain, args.pages, args.links, args.depth,
+        args.sitemap, args.seed,
+    )
+    if not args.serve:
+        return
+    with serve(args.directory, args.port):
+        print(f"Serving {args.directory} at {domain}")
+        try:
+            while True:
+                time.sleep(3600)
+        except KeyboardInterrupt:
+            pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,614 @@
+import asyncio
+import gzip
+import itertools
+import logging
+import ssl
+import zlib
+from time import perf_counter
+from urllib.parse import urljoin, urlparse
+
+from standalone import StandaloneAudit, create_crawler
+
+logger = logging.getLogger(__name__)
+
+REDIRECT_CODES = (301, 302, 303, 307, 308)
+# Responses to these have no body whatever their headers say.
+NO_BODY_CODES = (204, 304)
+DEFAULT_PORTS = {"http": 80, "https": 443}
+
+
+class ProtocolError(Exception):
+    """
+    Response of the server could not be parsed.
+    """
+
+
+class HttpClient:
+    """
+    Minimal HTTP/1.1 client on asyncio streams.
+
+    Connections are kept alive and reused per host. A request sent on a
+    reused connection which the server has meanwhile closed is sent again
+    on a new one. Certificates are not verified, like by the Scrapy
+    downloader.
+    """
+
+    def __init__(self, headers):
+        self.headers = headers
+        self._idle: dict = {}
+        self._ssl = ssl.create_default_context()
+        self._ssl.check_hostname = False
+        self._ssl.verify_mode = ssl.CERT_NONE
+
+    async def fetch(self, method, url, headers, body=b"", stop=None):
+        """
+        Send request and read the response.
+
+        Parameters:
+            self (object): The instance of the class containing this method.
+            method (str): HTTP method.
+            url (str): Absolute URL.
+            headers (dict): Request headers overriding the default ones.
+            body (bytes): Request body.
+            stop (callable): Called with the status, headers and content
+                             length once they are read. If it returns
+                             True, the body is not downloaded.
+
+        Returns:
+            tuple: Status, list of (name, value) header pairs, body and
+                   whether the download was stopped.
+        """
+        parsed = urlparse(url)
+        key = (
+            parsed.scheme,
+            parsed.hostname,
+            parsed.port or DEFAULT_PORTS[parsed.scheme],
+        )
+        target = parsed.path or "/"
+        if parsed.query:
+            target += "?" + parsed.query
+        lines = [f"{method} {target} HTTP/1.1", f"Host: {parsed.netloc}"]
+        for name, value in {**self.headers, **headers}.items():
+            lines.append(f"{name}: {value}")
+        if body:
+            lines.append(f"Content-Length: {len(body)}")
+        message = ("\r\n".join(lines) + "\r\n\r\n").encode("latin-1") + body
+        while True:
+            connection, reused = await self._connection(key)
+            reader, writer = connection
+            try:
+                writer.write(message)
+                await writer.drain()
+                response = await self._read(reader, method, stop)
+            except (ConnectionError, asyncio.IncompleteReadError):
+                writer.close()
+                if reused:
+                    continue
+                raise
+            except BaseException:
+                writer.close()
+                raise
+            *result, keep_alive = response
+            if keep_alive:
+                self._idle.setdefault(key, []).append(connection)
+            else:
+                writer.close()
+            return tuple(result)
+
+    def close(self):
+        for connections in self._idle.values():
+            for _, writer in connections:
+                writer.close()
+        self._idle.clear()
+
+    async def _connection(self, key):
+        idle = self._idle.get(key)
+        while idle:
+            reader, writer = idle.pop()
+            if not reader.at_eof() and not writer.is_closing():
+                return (reader, writer), True
+            writer.close()
+        scheme, host, port = key
+        if scheme == "https":
+            connection = await asyncio.open_connection(
+                host, port, ssl=self._ssl, server_hostname=host
+            )
+        else:
+            connection = await asyncio.open_connection(host, port)
+        return connection, False
+
+    async def _read(self, reader, method, stop):
+        line = await reader.readline()
+        if not line:
+            raise ConnectionResetError("Connection closed without response")
+        try:
+            version, status = line.split(None, 2)[:2]
+            status = int(status)
+        except ValueError:
+            raise ProtocolError(f"Invalid status line: {line!r}")
+        headers = []
+        fields = {}
+        while True:
+            line = await reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            name, value = name.strip(), value.strip()
+            headers.append((name, value))
+            fields[name.lower()] = value
+        keep_alive = (
+            version == b"HTTP/1.1" and
+            fields.get("connection", "").lower() != "close"
+        )
+        length = fields.get("content-length")
+        length = int(length) if length and length.isdigit() else None
+        if (
+            method == "HEAD" or
+            status in NO_BODY_CODES or
+            100 <= status < 200
+        ):
+            return status, headers, b"", False, keep_alive
+        if stop is not None and stop(status, headers, length):
+            # Rest of the body would have to be read before the connection
+            # can be reused.
+            return status, headers, b"", True, False
+        if fields.get("transfer-encoding", "").lower() == "chunked":
+            chunks = []
+            while True:
+                size = int((await reader.readline()).split(b";")[0], 16)
+                if not size:
+                    # Trailer headers end with an empty line.
+                    while (await reader.readline()) not in (b"\r\n", b""):
+                        pass
+                    break
+                chunks.append(await reader.readexactly(size))
+                await reader.readexactly(2)
+            body = b"".join(chunks)
+        elif length is not None:
+            body = await reader.readexactly(length)
+        else:
+            body = await reader.read()
+            keep_alive = False
+        encoding = fields.get("content-encoding", "").lower()
+        if encoding in ("gzip", "x-gzip"):
+            body = gzip.decompress(body)
+        elif encoding == "deflate":
+            try:
+                body = zlib.decompress(body)
+            except zlib.error:
+                body = zlib.decompress(body, -zlib.MAX_WBITS)
+        if encoding in ("gzip", "x-gzip", "deflate"):
+            headers = [
+                (name, value) for name, value in headers
+                if name.lower() != "content-encoding"
+            ]
+        return status, headers, body, False, keep_alive
+
+
+class AsyncAudit(StandaloneAudit):
+    """
+    Crawl the domain with a lightweight asyncio engine instead of Scrapy's.
+
+    Requests of the spider are scheduled by priority, deduplicated by the
+    duplicates filter of the spider and downloaded by a fixed number of
+    worker tasks, CONCURRENT_REQUESTS_PER_DOMAIN, sharing one keep-alive
+    connection pool. Only the downloader and spider middleware behaviour
+    the audit relies on is reproduced: robots.txt (ROBOTSTXT_OBEY), allowed
+    domains, retries, redirects, HTTP error filtering, compression and the
+    `headers_received` signal stopping downloads of link probes.
+    """
+
+    def __init__(self, crawler):
+        from scrapy.spidermiddlewares.offsite import OffsiteMiddleware
+        from scrapy.utils.misc import create_instance, load_object
+
+        super().__init__(crawler)
+        # Spiders schedule requests from signal handlers through the engine.
+        crawler.engine = self
+        settings = crawler.settings
+        self.stats = crawler.stats
+        self.concurrency = settings.getint("CONCURRENT_REQUESTS_PER_DOMAIN")
+        self.delay = settings.getfloat("DOWNLOAD_DELAY")
+        self.timeout = settings.getfloat("DOWNLOAD_TIMEOUT")
+        self.max_redirects = settings.getint("REDIRECT_MAX_TIMES")
+        self.retry_times = 0
+        if settings.getbool("RETRY_ENABLED"):
+            self.retry_times = settings.getint("RETRY_TIMES")
+        self.retry_codes = {
+            int(code) for code in settings.getlist("RETRY_HTTP_CODES")
+        }
+        self.user_agent = settings.get("USER_AGENT")
+        self.robots_user_agent = (
+            settings.get("ROBOTSTXT_USER_AGENT") or self.user_agent
+        )
+        self.robots_parser = None
+        if settings.getbool("ROBOTSTXT_OBEY"):
+            self.robots_parser = load_object(settings["ROBOTSTXT_PARSER"])
+        self._robots: dict = {}
+        self.dupefilter = create_instance(
+            load_object(settings["DUPEFILTER_CLASS"]), settings, crawler
+        )
+        self.offsite = OffsiteMiddleware.from_crawler(crawler)
+        self.offsite.spider_opened(self.spider)
+        headers = dict(settings.getdict("DEFAULT_REQUEST_HEADERS"))
+        headers["User-Agent"] = self.user_agent
+        headers["Accept-Encoding"] = "gzip, deflate"
+        self.client = HttpClient(headers)
+        self._queue = None
+        self._order = itertools.count()
+        self._next_download = 0.0
+
+    def run(self):
+        """
+        Crawl the domain and close the spider.
+        """
+        reason = "finished"
+        try:
+            asyncio.run(self._crawl())
+        except KeyboardInterrupt:
+            reason = "shutdown"
+        finally:
+            self.close(reason)
+
+    async def _crawl(self):
+        self._queue = asyncio.PriorityQueue()
+        workers = [
+            asyncio.create_task(self._work())
+            for _ in range(max(self.concurrency, 1))
+        ]
+        try:
+            for request in self.spider.start_requests():
+                self._schedule(request)
+            await self._queue.join()
+            while self._keep_open():
+                await self._queue.join()
+        finally:
+            for worker in workers:
+                worker.cancel()
+            await asyncio.gather(*workers, return_exceptions=True)
+            self.client.close()
+
+    def crawl(self, request):
+        """
+        Schedule the request, like `crawl()` of the Scrapy engine, which
+        spiders call to add requests from signal handlers.
+        """
+        self._schedule(request)
+
+    def _keep_open(self):
+        from scrapy import signals
+        from scrapy.exceptions import DontCloseSpider
+        from twisted.python.failure import Failure
+
+        results = self.crawler.signals.send_catch_log(
+            signal=signals.spider_idle,
+            spider=self.spider,
+            dont_log=DontCloseSpider,
+        )
+        return any(
+            isinstance(result, Failure) and
+            isinstance(result.value, DontCloseSpider)
+            for _, result in results
+        )
+
+    def _schedule(self, request):
+        if not request.dont_filter and self.dupefilter.request_seen(request):
+            self.dupefilter.log(request, self.spider)
+            return
+        self.stats.inc_value("scheduler/enqueued")
+        self._queue.put_nowait((-request.priority, next(self._order), request))
+
+    async def _work(self):
+        while True:
+            _, _, request = await self._queue.get()
+            try:
+                await self._process(request)
+            except Exception:
+                logger.exception(f"Error processing {request}")
+            finally:
+                self._queue.task_done()
+
+    async def _process(self, request):
+        from scrapy.exceptions import IgnoreRequest
+        from scrapy.spidermiddlewares.httperror import HttpError
+
+        self.stats.inc_value("scheduler/dequeued")
+        try:
+            if not await self._allowed(request):
+                self.stats.inc_value("robotstxt/forbidden")
+                raise IgnoreRequest("Forbidden by robots.txt")
+            response = await self._download(request)
+        except Exception as exc:
+            self._failed(request, exc)
+            return
+        if response is None:
+            return
+        if not self._handles_status(response):
+            self.stats.inc_value("httperror/response_ignored_count")
+            self.stats.inc_value(
+                f"httperror/response_ignored_status_count/{response.status}"
+            )
+            self._failed(
+                request, HttpError(response, "Ignoring non-200 response")
+            )
+            return
+        callback = request.callback or self.spider._parse
+        self._output(
+            request, lambda: callback(response, **request.cb_kwargs)
+        )
+
+    def _output(self, request, call):
+        from scrapy import Request
+
+        try:
+            for result in call() or ():
+                if isinstance(result, Request):
+                    if (
+                        result.dont_filter or
+                        self.offsite.should_follow(result, self.spider)
+                    ):
+                        self._schedule(result)
+                    else:
+                        self.stats.inc_value("offsite/filtered")
+                elif result is not None:
+                    self.process_item(result)
+        except Exception as exc:
+            self._spider_error(request, exc)
+
+    def _failed(self, request, exc):
+        from scrapy.exceptions import IgnoreRequest
+        from scrapy.spidermiddlewares.httperror import HttpError
+        from twisted.python.failure import Failure
+
+        failure = Failure(exc)
+        failure.request = request
+        if request.errback is not None:
+            try:
+                result = request.errback(failure)
+            except Exception as error:
+                self._spider_error(request, error)
+                return
+            if not isinstance(result, Failure):
+                self._output(request, lambda: result)
+                return
+            # Errback passed the failure on, it is handled as if there was
+            # no errback.
+            failure = result
+            exc = failure.value
+        if isinstance(exc, HttpError):
+            logger.info(
+                f"Ignoring response {exc.response}: HTTP status code is not"
+                " handled or not allowed"
+            )
+        elif isinstance(exc, IgnoreRequest):
+            logger.debug(f"{exc}: {request}")
+        else:
+            self.stats.inc_value("downloader/exception_count")
+            self.stats.inc_value(
+                f"downloader/exception_type_count/{type(exc).__name__}"
+            )
+            logger.error(
+                f"Error downloading {request}: {failure.getErrorMessage()}"
+            )
+
+    def _handles_status(self, response):
+        meta = response.meta
+        if 200 <= response.status < 300 or meta.get("handle_httpstatus_all"):
+            return True
+        allowed = meta.get(
+            "handle_httpstatus_list",
+            getattr(self.spider, "handle_httpstatus_list", ()),
+        )
+        return response.status in allowed
+
+    async def _allowed(self, request):
+        from scrapy import Request
+
+        if (
+            self.robots_parser is None or
+            request.meta.get("dont_obey_robotstxt")
+        ):
+            return True
+        parsed = urlparse(request.url)
+        parser = self._robots.get(parsed.netloc)
+        if parser is None:
+            parser = self._robots[parsed.netloc] = (
+                asyncio.get_running_loop().create_future()
+            )
+            robots = Request(
+                f"{parsed.scheme}://{parsed.netloc}/robots.txt",
+                meta={"dont_obey_robotstxt": True},
+            )
+            body = None
+            try:
+                response = await self._download(robots)
+                if response is not None:
+                    body = response.body
+            except Exception as exc:
+                logger.error(f"Error downloading {robots}: {exc!r}")
+            parser.set_result(
+                None if body is None else
+                self.robots_parser.from_crawler(self.crawler, body)
+            )
+        parser = await parser
+        return parser is None or parser.allowed(
+            request.url, self.robots_user_agent
+        )
+
+    async def _download(self, request):
+        """
+        Download the request, retrying failures and following redirects.
+
+        Returns:
+            Response (object): The response, or None if the redirected
+                               request was already seen.
+        """
+        from scrapy.exceptions import IgnoreRequest
+        from scrapy.utils.url import safe_url_string
+
+        retries = 0
+        redirects = 0
+        while True:
+            try:
+                response = await self._fetch(request)
+            except (
+                OSError,
+                asyncio.IncompleteReadError,
+                asyncio.TimeoutError,
+                ProtocolError,
+            ) as exc:
+                if retries >= self.retry_times or request.meta.get(
+                    "dont_retry"
+                ):
+                    raise
+                retries += 1
+                self.stats.inc_value("retry/count")
+                logger.debug(
+                    f"Retrying {request} (failed {retries} times): {exc!r}"
+                )
+                continue
+            status = response.status
+            if (
+                status in self.retry_codes and
+                retries < self.retry_times and
+                not request.meta.get("dont_retry")
+            ):
+                retries += 1
+                self.stats.inc_value("retry/count")
+                continue
+            location = response.headers.get("Location")
+            if (
+                status not in REDIRECT_CODES or
+                not location or
+                not self._follows_redirect(request, status)
+            ):
+                return response
+            if redirects >= self.max_redirects:
+                raise IgnoreRequest("max redirections reached")
+            redirects += 1
+            url = safe_url_string(
+                urljoin(request.url, location.decode("latin-1"))
+            )
+            if status in (301, 302, 303) and request.method != "HEAD":
+                redirected = request.replace(url=url, method="GET", body="")
+            else:
+                redirected = request.replace(url=url)
+            redirected.meta.setdefault("redirect_urls", []).append(
+                request.url
+            )
+            logger.debug(f"Redirecting ({status}) to {redirected} from"
+                         f" {request}")
+            if not redirected.dont_filter and self.dupefilter.request_seen(
+                redirected
+            ):
+                self.dupefilter.log(redirected, self.spider)
+                return None
+            request = redirected
+
+    def _follows_redirect(self, request, status):
+        meta = request.meta
+        return not (
+            meta.get("dont_redirect") or
+            meta.get("handle_httpstatus_all") or
+            status in meta.get("handle_httpstatus_list", ()) or
+            status in getattr(self.spider, "handle_httpstatus_list", ())
+        )
+
+    async def _fetch(self, request):
+        from scrapy import signals
+
+        # Signals of the Scrapy downloader, sent for every attempt.
+        self.crawler.signals.send_catch_log(
+            signal=signals.request_reached_downloader,
+            request=request,
+            spider=self.spider,
+        )
+        try:
+            return await self._fetch_response(request)
+        finally:
+            self.crawler.signals.send_catch_log(
+                signal=signals.request_left_downloader,
+                request=request,
+                spider=self.spider,
+            )
+
+    async def _fetch_response(self, request):
+        from scrapy import signals
+        from scrapy.exceptions import StopDownload
+        from scrapy.http import Headers
+        from scrapy.responsetypes import responsetypes
+        from twisted.python.failure import Failure
+
+        if self.delay:
+            # Downloads start at most once per DOWNLOAD_DELAY.
+            now = perf_counter()
+            self._next_download = max(self._next_download, now)
+            wait = self._next_download - now
+            self._next_download += self.delay
+            if wait > 0:
+                await asyncio.sleep(wait)
+        stopped = []
+
+        def stop(status, headers, length):
+            results = self.crawler.signals.send_catch_log(
+                signal=signals.headers_received,
+                headers=Headers(headers),
+                body_length=-1 if length is None else length,
+                request=request,
+                spider=self.spider,
+            )
+            for _, result in results:
+                if isinstance(result, Failure) and isinstance(
+                    result.value, StopDownload
+                ):
+                    stopped.append(result.value)
+            return bool(stopped)
+
+        headers = dict(request.headers.to_unicode_dict())
+        start = perf_counter()
+        self.stats.inc_value("downloader/request_count")
+        self.stats.inc_value(
+            f"downloader/request_method_count/{request.method}"
+        )
+        status, response_headers, body, was_stopped = await asyncio.wait_for(
+            self.client.fetch(
+                request.method, request.url, headers, request.body, stop
+            ),
+            self.timeout,
+        )
+        request.meta["download_latency"] = perf_counter() - start
+        if was_stopped and stopped[0].fail:
+            raise stopped[0]
+        self.stats.inc_value("downloader/response_count")
+        self.stats.inc_value(f"downloader/response_status_count/{status}")
+        headers = Headers(response_headers)
+        response_cls = responsetypes.from_args(
+            headers=headers, url=request.url, body=body
+        )
+        return response_cls(
+            url=request.url,
+            status=status,
+            headers=headers,
+            body=body,
+            request=request,
+            flags=["download_stopped"] if was_stopped else None,
+        )
+
+
+def crawl_async(spider_cls, domain, settings, **kwargs):
+    """
+    Crawl the domain with the asyncio engine.
+
+    Parameters:
+        spider_cls (class): The spider whose checks are run.
+        domain (str): The domain name to be crawled.
+        settings (object): Scrapy settings of the crawl.
+        kwargs (dict): Additional spider arguments.
+
+    Returns:
+        Crawler (object): The crawler the spider is bound to, with the
+                          results in its stats.
+    """
+    crawler = create_crawler(spider_cls, domain, settings, **kwargs)
+    AsyncAudit(crawler).run()
+    return crawler
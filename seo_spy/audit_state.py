@@ -0,0 +1,169 @@
+import json
+import sqlite3
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS urls (
+    id INTEGER PRIMARY KEY,
+    url TEXT UNIQUE NOT NULL
+);
+CREATE TABLE IF NOT EXISTS pages (
+    url_id INTEGER PRIMARY KEY REFERENCES urls(id),
+    lastmod TEXT,
+    has_links INTEGER NOT NULL DEFAULT 0,
+    canonical TEXT,
+    hrefs TEXT,
+    digest TEXT
+);
+CREATE TABLE IF NOT EXISTS links (
+    source_id INTEGER NOT NULL REFERENCES urls(id),
+    target_id INTEGER NOT NULL REFERENCES urls(id),
+    PRIMARY KEY (source_id, target_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS links_target ON links (target_id);
+"""
+# Columns added to the pages table after the first version of the schema.
+ADDED_COLUMNS = ("hrefs", "digest")
+
+
+class AuditState:
+    """
+    Snapshot of crawled pages kept between audits in an SQLite database.
+
+    For every crawled page the state keeps its `<lastmod>` from the sitemap,
+    its outgoing internal links, its canonical link elements and, when they
+    were extracted, its raw hrefs and content digest. URLs are stored once
+    in the `urls` table and links refer to them by integer IDs. The stored
+    link graph can be queried with `link_graph.LinkGraph`.
+
+    States written before hrefs and digests were kept are upgraded in place;
+    their pages lack both, so they are crawled again by checks requiring
+    them.
+    """
+
+    def __init__(self, path):
+        self._db = sqlite3.connect(path)
+        self._db.executescript(SCHEMA)
+        columns = {
+            row[1] for row in self._db.execute("PRAGMA table_info(pages)")
+        }
+        for column in ADDED_COLUMNS:
+            if column not in columns:
+                self._db.execute(f"ALTER TABLE pages ADD COLUMN {column} TEXT")
+        self._url_ids: dict = {}
+
+    def get(self, url):
+        """
+        Get stored state of the page.
+
+        Parameters:
+            self (object): The instance of the class containing this method.
+            url (str): URL of the page.
+
+        Returns:
+            tuple: (lastmod, extracted) of the page, where extracted is a dict
+                   accepted by `checks.Page`, or None if the page is not
+                   stored.
+        """
+        row = self._db.execute(
+            "SELECT pages.url_id, lastmod, has_links, canonical, hrefs,"
+            " digest FROM pages JOIN urls ON urls.id = pages.url_id"
+            " WHERE urls.url = ?",
+            (url,)
+        ).fetchone()
+        if row is None:
+            return None
+        url_id, lastmod, has_links, canonical, hrefs, digest = row
+        extracted = {}
+        if has_links:
+            extracted["links"] = [
+                target for target, in self._db.execute(
+                    "SELECT urls.url FROM links"
+                    " JOIN urls ON urls.id = links.target_id"
+                    " WHERE links.source_id = ?",
+                    (url_id,)
+                )
+            ]
+        if canonical is not None:
+            extracted["canonical"] = json.loads(canonical)
+        if hrefs is not None:
+            extracted["hrefs"] = json.loads(hrefs)
+        if digest is not None:
+            extracted["digest"] = digest
+        return lastmod, extracted
+
+    def set(self, url, lastmod, extracted):
+        """
+        Store state of the page, replacing the previous one.
+
+        Parameters:
+            self (object): The instance of the class containing this method.
+            url (str): URL of the page.
+            lastmod (str): Last modification date from the sitemap or None.
+            extracted (dict): Data extracted from the page, as returned by
+                              `checks.Page.extracted()`.
+        """
+        url_id = self._url_id(url)
+        links = extracted.get("links")
+        canonical = extracted.get("canonical")
+        hrefs = extracted.get("hrefs")
+        self._db.execute(
+            "INSERT OR REPLACE INTO pages"
+            " (url_id, lastmod, has_links, canonical, hrefs, digest)"
+            " VALUES (?, ?, ?, ?, ?, ?)",
+            (
+                url_id,
+                lastmod,
+                links is not None,
+                None if canonical is None else json.dumps(canonical),
+                None if hrefs is None else json.dumps(hrefs),
+                extracted.get("digest"),
+            )
+        )
+        self._db.execute("DELETE FROM links WHERE source_id = ?", (url_id,))
+        if links:
+            self._db.executemany(
+                "INSERT OR IGNORE INTO links VALUES (?, ?)",
+                [(url_id, self._url_id(link)) for link in links]
+            )
+
+    def prune(self, urls):
+        """
+        Remove pages that are not in the given URLs, along with their links.
+
+        Parameters:
+            self (object): The instance of the class containing this method.
+            urls (iterable): URLs of pages that still exist.
+        """
+        self._db.execute(
+            "CREATE TEMP TABLE IF NOT EXISTS existing (url TEXT PRIMARY KEY)"
+        )
+        self._db.execute("DELETE FROM existing")
+        self._db.executemany(
+            "INSERT OR IGNORE INTO existing VALUES (?)",
+            ((url,) for url in urls)
+        )
+        removed = (
+            "SELECT url_id FROM pages JOIN urls ON urls.id = pages.url_id"
+            " WHERE urls.url NOT IN (SELECT url FROM existing)"
+        )
+        self._db.execute(f"DELETE FROM links WHERE source_id IN ({removed})")
+        self._db.execute(f"DELETE FROM pages WHERE url_id IN ({removed})")
+
+    def close(self):
+        """
+        Save the state and close the database.
+        """
+        self._db.commit()
+        self._db.close()
+
+    def _url_id(self, url):
+        url_id = self._url_ids.get(url)
+        if url_id is None:
+            self._db.execute(
+                "INSERT OR IGNORE INTO urls (url) VALUES (?)", (url,)
+            )
+            url_id, = self._db.execute(
+                "SELECT id FROM urls WHERE url = ?", (url,)
+            ).fetchone()
+            self._url_ids[url] = url_id
+        return url_id
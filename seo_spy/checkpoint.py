@@ -0,0 +1,188 @@
+import json
+import os
+import sqlite3
+import threading
+import zlib
+
+from twisted.internet import threads
+from twisted.internet.task import LoopingCall
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS pages (
+    url TEXT PRIMARY KEY,
+    data BLOB NOT NULL
+);
+CREATE TABLE IF NOT EXISTS frontier (
+    url TEXT PRIMARY KEY
+);
+"""
+
+DEFAULT_INTERVAL = 60.0
+
+
+class Checkpoint:
+    """
+    Periodic snapshot of a running crawl in an SQLite database, so that an
+    interrupted crawl can be resumed.
+
+    The checkpoint keeps data extracted from every processed page, stored as
+    compressed JSON, and the frontier, URLs discovered but not processed yet.
+    Changes are collected in memory and written every `interval` seconds in
+    a thread, so the reactor keeps crawling while the database is updated.
+    Each write is a single transaction, so the stored pages and frontier
+    always form a consistent snapshot.
+    """
+
+    def __init__(self, path, domain, resume=False, interval=DEFAULT_INTERVAL):
+        self.path = path
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.executescript(SCHEMA)
+        stored = self._db.execute(
+            "SELECT value FROM meta WHERE key = 'domain'"
+        ).fetchone()
+        if resume and stored is not None and stored[0] != domain:
+            raise ValueError(
+                f"Checkpoint {path} belongs to another domain: {stored[0]}"
+            )
+        # A crawl interrupted before its first write left nothing to
+        # resume, so it starts again from the root.
+        self.resumed = resume and stored is not None and self._db.execute(
+            "SELECT EXISTS (SELECT 1 FROM pages)"
+            " OR EXISTS (SELECT 1 FROM frontier)"
+        ).fetchone()[0] == 1
+        if not self.resumed:
+            self._db.executescript(
+                "DELETE FROM meta; DELETE FROM pages; DELETE FROM frontier;"
+            )
+            self._db.execute(
+                "INSERT INTO meta VALUES ('domain', ?)", (domain,)
+            )
+            self._db.commit()
+        self._lock = threading.Lock()
+        self._closed = False
+        self._writing = None
+        self._batches: list = []
+        self._pages: list = []
+        self._added: set = set()
+        self._removed: set = set()
+        self._loop = LoopingCall(self.flush)
+        self._loop.start(interval, now=False)
+
+    def pages(self):
+        """
+        Yield (url, extracted) of every page stored in the checkpoint.
+        """
+        for url, data in self._db.execute("SELECT url, data FROM pages"):
+            yield url, json.loads(zlib.decompress(data))
+
+    def frontier(self):
+        """
+        Return URLs of the stored frontier.
+        """
+        return [url for url, in self._db.execute("SELECT url FROM frontier")]
+
+    def add_page(self, url, extracted, request_url=None):
+        """
+        Record processed page.
+
+        Parameters:
+            self (object): The instance of the class containing this method.
+            url (str): URL of the page.
+            extracted (dict): Data extracted from the page, as returned by
+                              `checks.Page.extracted()`.
+            request_url (str): URL the page was added to the frontier with,
+                               if it differs from the URL of the page.
+        """
+        self._pages.append((url, extracted))
+        self.remove_frontier(request_url or url)
+
+    def add_frontier(self, url):
+        """
+        Record URL discovered but not processed yet.
+        """
+        self._removed.discard(url)
+        self._added.add(url)
+
+    def remove_frontier(self, url):
+        """
+        Record URL that does not need to be processed any more.
+        """
+        if url in self._added:
+            self._added.discard(url)
+        else:
+            self._removed.add(url)
+
+    def flush(self):
+        """
+        Write changes collected since the previous write in a thread.
+
+        Returns:
+            Deferred: Fired when the changes are written, or None if the
+                      previous write has not finished yet.
+        """
+        if self._writing is not None:
+            return None
+        self._queue_changes()
+        self._writing = threads.deferToThread(self._write)
+        self._writing.addBoth(self._written)
+        return self._writing
+
+    def close(self, complete=False):
+        """
+        Stop periodic writes and write the remaining changes.
+
+        Parameters:
+            self (object): The instance of the class containing this method.
+            complete (bool): The crawl has finished, so the checkpoint is
+                             removed instead.
+        """
+        if self._loop.running:
+            self._loop.stop()
+        self._queue_changes()
+        # Waits for a write running in a thread, if any.
+        self._write()
+        with self._lock:
+            self._closed = True
+            self._db.close()
+        if complete:
+            os.remove(self.path)
+
+    def _queue_changes(self):
+        self._batches.append((self._pages, self._added, self._removed))
+        self._pages = []
+        self._added = set()
+        self._removed = set()
+
+    def _written(self, result):
+        self._writing = None
+        return result
+
+    def _write(self):
+        with self._lock:
+            if self._closed:
+                return
+            while self._batches:
+                pages, added, removed = self._batches.pop(0)
+                self._write_batch(pages, added, removed)
+
+    def _write_batch(self, pages, added, removed):
+        with self._db:
+            self._db.executemany(
+                "INSERT OR REPLACE INTO pages VALUES (?, ?)",
+                (
+                    (url, zlib.compress(json.dumps(extracted).encode()))
+                    for url, extracted in pages
+                )
+            )
+            self._db.executemany(
+                "DELETE FROM frontier WHERE url = ?",
+                ((url,) for url in removed)
+            )
+            self._db.executemany(
+                "INSERT OR IGNORE INTO frontier VALUES (?)",
+                ((url,) for url in added)
+            )
@@ -0,0 +1,24 @@
+from checks.base import MAX_LOGGED_FINDINGS, Check, Page
+from checks.canonical_link import CanonicalLinkCheck
+from checks.duplicate_content import DuplicateContentCheck
+from checks.link_status import PROBE_KEY, LinkStatusCheck
+from checks.orphan_pages import OrphanPagesCheck
+
+CHECKS = {
+    OrphanPagesCheck.name: OrphanPagesCheck,
+    CanonicalLinkCheck.name: CanonicalLinkCheck,
+    LinkStatusCheck.name: LinkStatusCheck,
+    DuplicateContentCheck.name: DuplicateContentCheck,
+}
+
+__all__ = [
+    "CHECKS",
+    "MAX_LOGGED_FINDINGS",
+    "CanonicalLinkCheck",
+    "Check",
+    "DuplicateContentCheck",
+    "LinkStatusCheck",
+    "OrphanPagesCheck",
+    "PROBE_KEY",
+    "Page",
+]
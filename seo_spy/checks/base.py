@@ -0,0 +1,209 @@
+from itertools import islice
+
+from content_index import content_digest
+
+# Number of findings of a check logged when the crawl ends, the rest is only
+# counted, so a badly broken site does not flood the log.
+MAX_LOGGED_FINDINGS = 20
+
+
+class Page:
+    """
+    Crawled page shared by all checks run during a crawl.
+
+    The parsed document and the list of internal links are computed lazily,
+    on first access, and then reused by every check processing the page.
+    Data extracted during an earlier crawl of the unchanged page may be
+    passed as `extracted`, in which case the document is not parsed again.
+    The response may be None only if `extracted` holds everything the checks
+    need.
+    """
+
+    def __init__(self, url, response, spider, extracted=None):
+        self.response = response
+        self.url = url
+        self.spider = spider
+        extracted = extracted or {}
+        self._hrefs = extracted.get("hrefs")
+        self._links = extracted.get("links")
+        self._canonical = extracted.get("canonical")
+        self._digest = extracted.get("digest")
+        self._raw: dict = {}
+
+    @property
+    def links(self):
+        """
+        List of internal links found on the page, resolved to absolute URLs
+        ending with a slash and stripped of fragments.
+        """
+        if self._links is None:
+            hrefs = self.hrefs
+            with self.spider.instrumentation.measure("normalize"):
+                self._links = self.spider.normalizer.normalize_all(
+                    self.url, hrefs
+                )
+        return self._links
+
+    @property
+    def hrefs(self):
+        """
+        List of href values of all anchors of the page, as found in the HTML.
+        """
+        if self._hrefs is None:
+            self._hrefs = self._extract("hrefs")
+        return self._hrefs
+
+    @property
+    def canonical(self):
+        """
+        List of canonical link elements of the page.
+        """
+        if self._canonical is None:
+            self._canonical = self._extract("canonical")
+        return self._canonical
+
+    @property
+    def digest(self):
+        """
+        Fingerprint of the response body, equal for pages with identical
+        HTML.
+        """
+        if self._digest is None:
+            self._digest = content_digest(self.response.body)
+        return self._digest
+
+    def _extract(self, key):
+        if key not in self._raw:
+            with self.spider.instrumentation.measure("parse"):
+                self._raw.update(
+                    self.spider.link_extractor.extract(self.response, key)
+                )
+        return self._raw[key]
+
+    def extracted(self):
+        """
+        Return data extracted from the page so far, which can be passed to
+        a Page of the same, unchanged, response later. Hrefs are kept
+        whenever links were resolved, so a page with the same body at
+        another URL can resolve its own links without parsing it again.
+        """
+        extracted = {}
+        if self._hrefs is not None:
+            extracted["hrefs"] = self._hrefs
+        if self._links is not None:
+            extracted["links"] = self._links
+        if self._canonical is not None:
+            extracted["canonical"] = self._canonical
+        if self._digest is not None:
+            extracted["digest"] = self._digest
+        return extracted
+
+
+class Check:
+    """
+    Base class of SEO checks.
+
+    A check receives every crawled page through `process_page()`. Offending
+    URLs known as soon as a page is processed are returned from
+    `process_page()`, so they can be reported while the crawl is running,
+    and those which need all crawled pages from `finish()` once the crawl
+    ends.
+    Checks which need to send requests of their own, e.g. to probe links,
+    return them from `pop_requests()`. Responses are passed back to
+    `process_response()`, download errors to `process_failure()`.
+    Subclasses must set `name`, `failure_message`,
+    `success_message` and `requires`, the names of data extracted from the
+    page the check uses (see `Page.extracted()`).
+    Checks whose findings follow from the extracted data alone are
+    `replayable`: in a distributed crawl, they are run once on pages stored
+    by all workers. The others are run by every worker on its own pages.
+    """
+
+    name: str = ""
+    requires: tuple = ()
+    replayable: bool = True
+    failure_message: str = ""
+    success_message: str = ""
+
+    def __init__(self, spider):
+        self.spider = spider
+
+    def process_page(self, page):
+        """
+        Inspect single crawled page.
+
+        Parameters:
+            self (object): The instance of the class containing this method.
+            page (Page): The crawled page.
+
+        Returns:
+            list: URLs of pages that failed the check, or None.
+        """
+
+    def pop_requests(self):
+        """
+        Return requests the check needs sent since the previous call.
+
+        Returns:
+            list: Scrapy requests, their callbacks are set by the spider.
+        """
+        return []
+
+    def process_response(self, response):
+        """
+        Inspect response to a request returned from `pop_requests()`.
+
+        Parameters:
+            self (object): The instance of the class containing this method.
+            response (object): The response.
+
+        Returns:
+            list: URLs of pages that failed the check, or None.
+        """
+
+    def process_failure(self, failure):
+        """
+        Inspect failed request returned from `pop_requests()`.
+
+        Parameters:
+            self (object): The instance of the class containing this method.
+            failure (object): Twisted failure with the failed `request`.
+
+        Returns:
+            list: URLs of pages that failed the check, or None.
+        """
+
+    def finish(self):
+        """
+        Compute results of the check after all pages were crawled.
+
+        Returns:
+            list: URLs of pages that failed the check and were not returned
+                  from `process_page()`.
+        """
+        return []
+
+    def merge_key(self, finding):
+        """
+        Return what the finding is about. Of findings about the same thing
+        reported by several workers of a distributed crawl, only the first
+        one is kept.
+        """
+        return finding
+
+    def log_findings(self, findings, limit=MAX_LOGGED_FINDINGS):
+        """
+        Log URLs of pages that failed the check.
+
+        Parameters:
+            self (object): The instance of the class containing this method.
+            findings (list): URLs of pages that failed the check.
+            limit (int): Maximum number of URLs logged, the rest is only
+                         counted.
+        """
+        for page in islice(findings, limit):
+            self.spider.logger.error(f"{page}")
+        if len(findings) > limit:
+            self.spider.logger.error(
+                f"... and {len(findings) - limit} more pages"
+            )
@@ -0,0 +1,19 @@
+from checks.base import Check
+
+
+class CanonicalLinkCheck(Check):
+    """
+    Find crawled pages with no canonical link.
+    """
+
+    name = "canonical"
+    failure_message = "Pages with no canonical link found:"
+    requires = ("canonical",)
+    success_message = "Every page has canonical link."
+
+    def process_page(self, page):
+        canonical = page.canonical
+        self.spider.logger.info(f"Canonical: {canonical}")
+        if not canonical:
+            return [page.url]
+        return None
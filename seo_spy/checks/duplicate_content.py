@@ -0,0 +1,41 @@
+from checks.base import Check
+
+
+class DuplicateContentCheck(Check):
+    """
+    Find clusters of crawled pages serving identical HTML under different
+    URLs.
+
+    Pages are compared by the fingerprint of their body. Every cluster is
+    reported as a single finding, the first crawled page of the cluster
+    followed by the other URLs serving the same body.
+    """
+
+    name = "duplicates"
+    failure_message = "Pages with duplicate content found:"
+    requires = ("digest",)
+    success_message = "Every page has unique content."
+
+    def __init__(self, spider):
+        super().__init__(spider)
+        # Digest -> URL of the first page with the body.
+        self._first: dict = {}
+        # Digest -> URLs of all pages with the body, once there are two.
+        self._clusters: dict = {}
+
+    def process_page(self, page):
+        digest = page.digest
+        first = self._first.setdefault(digest, page.url)
+        if first == page.url:
+            return
+        cluster = self._clusters.get(digest)
+        if cluster is None:
+            cluster = self._clusters[digest] = [first]
+        if page.url not in cluster:
+            cluster.append(page.url)
+
+    def finish(self):
+        return [
+            f"{cluster[0]} (duplicated at {', '.join(cluster[1:])})"
+            for cluster in self._clusters.values()
+        ]
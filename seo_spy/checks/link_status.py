@@ -0,0 +1,136 @@
+from urllib.parse import urldefrag, urljoin, urlparse
+
+from checks.base import Check
+from url_index import UrlIndex
+
+# Request meta key marking probes, whose download is stopped as soon as
+# headers are received.
+PROBE_KEY = "link_status_probe"
+REFERRER_KEY = "link_status_referrer"
+
+# Schemes of links which can be probed, `javascript:` or `tel:` ones can
+# not be downloaded.
+PROBED_SCHEMES = ("http", "https")
+
+# HEAD is not supported, the link is probed with a ranged GET instead.
+HEAD_UNSUPPORTED = (405, 501)
+
+
+class LinkStatusCheck(Check):
+    """
+    Find internal links which are broken or redirected.
+
+    Only HTTP(S) links to URLs under the audited domain are probed. Every
+    internal link target is probed once per crawl with a HEAD request,
+    whatever number of pages link to it. Results are cached by the
+    absolute URL of the target without its fragment, so links differing only
+    in fragments or relative form share one probe, but `/a` and `/a/` are
+    probed separately, as one may redirect to the other. If the server does
+    not support HEAD, the target is requested with a GET for its first
+    byte, and the download is stopped when the headers arrive. Probes go
+    through the same downloader as the crawl, so they reuse its keep-alive
+    connections. Targets equal to the URL of an already crawled response
+    are known to work and are not probed.
+    """
+
+    name = "links"
+    failure_message = "Broken or redirected internal links found:"
+    requires = ("hrefs",)
+    # Probes need the network.
+    replayable = False
+    success_message = "Every internal link works."
+
+    def __init__(self, spider):
+        super().__init__(spider)
+        self._statuses: dict = {}
+        self._requests: list = []
+        # URLs of crawled responses, after redirects.
+        self._crawled = UrlIndex()
+
+    def process_page(self, page):
+        normalizer = self.spider.normalizer
+        domain = self.spider.domain
+        if page.response is not None:
+            self._crawled.add(page.response.url)
+        for href in page.hrefs:
+            # Only internal links are probed.
+            if normalizer.normalize(page.url, href) is None:
+                continue
+            url = urldefrag(urljoin(page.url, href.strip()))[0]
+            if (
+                urlparse(url).scheme not in PROBED_SCHEMES or
+                not url.startswith(domain)
+            ):
+                continue
+            if url in self._statuses:
+                continue
+            if url in self._crawled:
+                self._statuses[url] = 200
+                continue
+            # Status is unknown until the probe finishes.
+            self._statuses[url] = None
+            self._requests.append(self._probe(url, url, page.url, "HEAD"))
+        return None
+
+    def pop_requests(self):
+        requests = self._requests
+        self._requests = []
+        return requests
+
+    def process_response(self, response):
+        meta = response.meta
+        if (
+            response.request.method == "HEAD" and
+            response.status in HEAD_UNSUPPORTED
+        ):
+            self._requests.append(self._probe(
+                response.url, meta[PROBE_KEY], meta[REFERRER_KEY], "GET"
+            ))
+            return None
+        status = response.status
+        # Partial content of a ranged GET.
+        if status == 206:
+            status = 200
+        self._statuses[meta[PROBE_KEY]] = status
+        if status < 300:
+            return None
+        result = str(status)
+        location = response.headers.get("Location")
+        if 300 <= status < 400 and location:
+            target = urljoin(response.url, location.decode("latin-1"))
+            result = f"{status} to {target}"
+        return [
+            f"{response.url} ({result}, linked from {meta[REFERRER_KEY]})"
+        ]
+
+    def process_failure(self, failure):
+        request = failure.request
+        self._statuses[request.meta[PROBE_KEY]] = failure.getErrorMessage()
+        return [
+            f"{request.url} ({failure.type.__name__}, linked from"
+            f" {request.meta[REFERRER_KEY]})"
+        ]
+
+    def merge_key(self, finding):
+        # Workers probe a link target once each, from different pages.
+        return finding.split(" ", 1)[0]
+
+    def _probe(self, url, key, referrer, method):
+        from scrapy import Request
+
+        headers = {}
+        if method == "GET":
+            headers["Range"] = "bytes=0-0"
+        return Request(
+            url,
+            method=method,
+            headers=headers,
+            dont_filter=True,
+            priority=-1,
+            meta={
+                PROBE_KEY: key,
+                REFERRER_KEY: referrer,
+                "dont_redirect": True,
+                "handle_httpstatus_all": True,
+            },
+        )
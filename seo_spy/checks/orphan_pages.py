@@ -0,0 +1,36 @@
+from checks.base import Check
+from url_index import UrlIndex
+
+
+class OrphanPagesCheck(Check):
+    """
+    Find crawled pages that no other crawled page links to.
+    """
+
+    name = "orphan"
+    failure_message = "Orphan pages found:"
+    requires = ("links",)
+    success_message = "Orphan pages not found."
+
+    def __init__(self, spider):
+        super().__init__(spider)
+        self._visited_pages = UrlIndex()
+        self._incoming_links = UrlIndex()
+
+    def process_page(self, page):
+        self._visited_pages.add(page.url)
+        for link in page.links:
+            self._incoming_links.add(link)
+
+    def finish(self):
+        """
+        Verify whether each URL possesses incoming internal links.
+        In case it lacks such links, include it in the list of orphan pages.
+        """
+        orphan_pages = []
+        for url in self._visited_pages:
+            if not url.endswith("/"):
+                url = url + "/"
+            if url not in self._incoming_links:
+                orphan_pages.append(url)
+        return orphan_pages
@@ -0,0 +1,174 @@
+from statistics import median
+from time import perf_counter
+
+from scrapy.exceptions import NotConfigured
+
+STATS_KEY = "custom/concurrency/history"
+
+
+class ConcurrencyController:
+    """
+    Choose concurrency of a downloader slot from latency, throughput and
+    error rate of its responses.
+
+    Samples are collected in windows of twice the current concurrency, so
+    every window covers a few rounds of requests sent with the same
+    concurrency. After each window:
+
+    - the concurrency is halved if the error rate exceeds `max_error_rate`,
+    - it is lowered by a quarter if the median latency exceeds
+      `latency_factor` times the lowest median seen, unless the throughput
+      has improved since the previous window, as more concurrent requests
+      only wait in queues of the server,
+    - otherwise it is raised, by doubling until the latency or error rate
+      first degrades, so fast servers reach their limit quickly, and by a
+      quarter afterwards.
+    """
+
+    MIN_WINDOW = 10
+
+    def __init__(self, start, minimum=1, maximum=64, latency_factor=2.0,
+                 max_error_rate=0.05):
+        self.concurrency = max(minimum, min(start, maximum))
+        self.minimum = minimum
+        self.maximum = maximum
+        self.latency_factor = latency_factor
+        self.max_error_rate = max_error_rate
+        self.baseline = None
+        self._slow_start = True
+        self._throughput = None
+        self._window_start = perf_counter()
+        self._latencies: list = []
+        self._errors = 0
+
+    def record(self, latency=None, error=False):
+        """
+        Add sample of a finished request.
+
+        Parameters:
+            self (object): The instance of the class containing this method.
+            latency (float): Download latency in seconds, None if unknown.
+            error (bool): True if the request failed or the server is
+                          overloaded.
+
+        Returns:
+            int: New concurrency if it has changed, None otherwise.
+        """
+        if latency is not None:
+            self._latencies.append(latency)
+        if error:
+            self._errors += 1
+        samples = len(self._latencies) + self._errors
+        if samples < max(self.MIN_WINDOW, self.concurrency * 2):
+            return None
+
+        now = perf_counter()
+        throughput = samples / max(now - self._window_start, 1e-6)
+        error_rate = self._errors / samples
+        latency = median(self._latencies) if self._latencies else None
+        self._window_start = now
+        self._latencies = []
+        self._errors = 0
+        if latency is not None and (
+            self.baseline is None or latency < self.baseline
+        ):
+            self.baseline = latency
+        improved = (
+            self._throughput is None or throughput > self._throughput * 1.1
+        )
+        self._throughput = throughput
+
+        overloaded = (
+            latency is not None and
+            latency > self.baseline * self.latency_factor
+        )
+        if error_rate > self.max_error_rate:
+            self._slow_start = False
+            concurrency = max(self.minimum, self.concurrency // 2)
+        elif overloaded:
+            self._slow_start = False
+            if improved:
+                # Requests wait longer, but more of them are served.
+                concurrency = self.concurrency
+            else:
+                concurrency = max(
+                    self.minimum,
+                    self.concurrency - max(1, self.concurrency // 4)
+                )
+        elif self._slow_start:
+            concurrency = min(self.maximum, self.concurrency * 2)
+        else:
+            concurrency = min(
+                self.maximum, self.concurrency + max(1, self.concurrency // 4)
+            )
+        if concurrency == self.concurrency:
+            return None
+        self.concurrency = concurrency
+        return concurrency
+
+
+class AdaptiveConcurrencyMiddleware:
+    """
+    Downloader middleware adjusting concurrency of every downloader slot
+    with a `ConcurrencyController`.
+
+    Enabled with the SEO_SPY_ADAPTIVE_CONCURRENCY setting. Slots start with
+    CONCURRENT_REQUESTS_PER_DOMAIN and grow up to SEO_SPY_CONCURRENCY_MAX.
+    Responses with status 429 or 5xx and download errors count as errors.
+    Every change is stored in the `custom/concurrency/history` stat as
+    `[seconds since start, concurrency]` pairs, by slot.
+    """
+
+    def __init__(self, crawler):
+        settings = crawler.settings
+        if not settings.getbool("SEO_SPY_ADAPTIVE_CONCURRENCY"):
+            raise NotConfigured
+        self.crawler = crawler
+        self.start = settings.getint("CONCURRENT_REQUESTS_PER_DOMAIN")
+        self.maximum = settings.getint("SEO_SPY_CONCURRENCY_MAX", 64)
+        self.latency_factor = settings.getfloat(
+            "SEO_SPY_CONCURRENCY_LATENCY_FACTOR", 2.0
+        )
+        self.max_error_rate = settings.getfloat(
+            "SEO_SPY_CONCURRENCY_MAX_ERROR_RATE", 0.05
+        )
+        self.started = perf_counter()
+        self.controllers: dict = {}
+        self.history: dict = {}
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        return cls(crawler)
+
+    def process_response(self, request, response, spider):
+        error = response.status == 429 or response.status >= 500
+        self._record(request, request.meta.get("download_latency"), error)
+        return response
+
+    def process_exception(self, request, exception, spider):
+        self._record(request, None, True)
+
+    def _record(self, request, latency, error):
+        key = request.meta.get("download_slot")
+        slot = self.crawler.engine.downloader.slots.get(key)
+        if slot is None:
+            return
+        controller = self.controllers.get(key)
+        if controller is None:
+            controller = self.controllers[key] = ConcurrencyController(
+                self.start,
+                maximum=self.maximum,
+                latency_factor=self.latency_factor,
+                max_error_rate=self.max_error_rate,
+            )
+            slot.concurrency = controller.concurrency
+            self._log(key, controller.concurrency)
+        concurrency = controller.record(latency, error)
+        if concurrency is not None:
+            slot.concurrency = concurrency
+            self._log(key, concurrency)
+
+    def _log(self, key, concurrency):
+        elapsed = round(perf_counter() - self.started, 3)
+        self.history.setdefault(key, []).append([elapsed, concurrency])
+        self.crawler.stats.set_value(STATS_KEY, self.history)
@@ -0,0 +1,89 @@
+import hashlib
+from collections import OrderedDict
+from urllib.parse import urlparse
+
+STATS_PREFIX = "custom/content/"
+
+DEFAULT_SIZE = 2048
+
+
+def content_digest(body):
+    """
+    Return fingerprint of a response body, as a hex string so it can be
+    stored with other data extracted from the page.
+    """
+    return hashlib.blake2b(body, digest_size=16).hexdigest()
+
+
+class ContentIndex:
+    """
+    Data extracted from recently crawled pages, by fingerprint of their body.
+
+    Many sites serve the same HTML under several URLs, e.g. `/a/`,
+    `/a/index.html` and `/a/?utm_source=x`. Once one of them was parsed, the
+    others reuse its hrefs and canonical links instead of being parsed
+    again. Internal links are reused only by pages with the same path, as
+    relative links of the others resolve differently.
+
+    At most `size` bodies are remembered, least recently matched ones are
+    forgotten first.
+    """
+
+    def __init__(self, size=DEFAULT_SIZE):
+        self.size = size
+        self._entries: OrderedDict = OrderedDict()
+        self.duplicates = 0
+        self.reused_links = 0
+
+    def get(self, digest, url):
+        """
+        Return data extracted from a page with the same body.
+
+        Parameters:
+            self (object): The instance of the class containing this method.
+            digest (str): Fingerprint of the body, see `content_digest()`.
+            url (str): URL of the page with the body.
+
+        Returns:
+            dict: Data which can be passed to `checks.Page`, including the
+                  digest, or None if no such page is remembered.
+        """
+        entry = self._entries.get(digest)
+        if entry is None:
+            return None
+        self._entries.move_to_end(digest)
+        path, extracted = entry
+        self.duplicates += 1
+        reused = {
+            key: value for key, value in extracted.items() if key != "links"
+        }
+        if "links" in extracted and path == _path(url):
+            reused["links"] = extracted["links"]
+            self.reused_links += 1
+        reused["digest"] = digest
+        return reused
+
+    def add(self, digest, url, extracted):
+        """
+        Remember data extracted from the page, unless a page with the same
+        body is remembered already.
+        """
+        if not self.size or digest in self._entries:
+            return
+        self._entries[digest] = (_path(url), extracted)
+        if len(self._entries) > self.size:
+            self._entries.popitem(last=False)
+
+    def write_stats(self, stats):
+        """
+        Store numbers of duplicate pages in the crawler stats with the
+        `custom/content/` prefix.
+        """
+        stats.set_value(f"{STATS_PREFIX}duplicate_pages", self.duplicates)
+        stats.set_value(f"{STATS_PREFIX}reused_links", self.reused_links)
+
+
+def _path(url):
+    parsed = urlparse(url)
+    # Relative links resolve the same against "http://host" and "http://host/".
+    return (parsed.scheme, parsed.netloc, parsed.path or "/")
@@ -0,0 +1,62 @@
+import dbm
+import json
+import os
+
+from scrapy.extensions.httpcache import RFC2616Policy
+
+
+class AuditCachePolicy(RFC2616Policy):
+    """
+    HTTP cache policy revalidating every cached response.
+
+    Audits must reflect the current state of the site, so cached responses
+    are never considered fresh. Each request is sent with `If-None-Match` and
+    `If-Modified-Since` headers taken from the cached response, and the
+    cached response is used only when the server answers 304 Not Modified.
+    """
+
+    def is_cached_response_fresh(self, cachedresponse, request):
+        self._set_conditional_validators(request, cachedresponse)
+        return False
+
+    def is_cached_response_valid(self, cachedresponse, response, request):
+        return response.status == 304
+
+
+class PageCache:
+    """
+    Persistent store of data extracted from crawled pages.
+
+    Entries are JSON objects keyed by the request fingerprint, the same key
+    the HTTP cache uses for responses, so data extracted from a page can be
+    reused when the server confirms the page has not changed.
+    """
+
+    FILE_NAME = "pages.db"
+
+    def __init__(self, cache_dir):
+        os.makedirs(cache_dir, exist_ok=True)
+        self._db = dbm.open(os.path.join(cache_dir, self.FILE_NAME), "c")
+
+    def get(self, fingerprint):
+        """
+        Return data stored for the fingerprint or None if there is none.
+        """
+        data = self._db.get(fingerprint)
+        if data is None:
+            return None
+        return json.loads(data)
+
+    def set(self, fingerprint, data):
+        """
+        Store data for the fingerprint.
+
+        Parameters:
+            self (object): The instance of the class containing this method.
+            fingerprint (bytes): Fingerprint of the request of the page.
+            data (dict): JSON serializable data extracted from the page.
+        """
+        self._db[fingerprint] = json.dumps(data)
+
+    def close(self):
+        self._db.close()
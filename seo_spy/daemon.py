@@ -0,0 +1,483 @@
+#!/usr/bin/env python3
+
+import argparse
+import http.client
+import itertools
+import json
+import socket
+import sys
+import time
+from checks import (
+    CHECKS,
+    CanonicalLinkCheck,
+    DuplicateContentCheck,
+    LinkStatusCheck,
+    OrphanPagesCheck,
+)
+from instrumentation import read_stats
+from main import STATUS_ERR, STATUS_FAILURE, STATUS_OK, SeoSpy
+from profiles import PROFILES
+
+DEFAULT_LISTEN = "tcp:8421:interface=127.0.0.1"
+DEFAULT_URL = "http://127.0.0.1:8421"
+QUEUED = "queued"
+RUNNING = "running"
+FINISHED = "finished"
+
+
+class AuditJob:
+    """
+    Audit of a single domain run by the daemon.
+
+    Parameters:
+        job_id (int): Number of the job, unique within the daemon.
+        domain (str): URL of the audited domain.
+        check_names (list): Names of the checks to run.
+        no_sitemap (bool): Do not use the sitemap to gather urls.
+    """
+
+    def __init__(self, job_id, domain, check_names, no_sitemap):
+        self.id = job_id
+        self.domain = domain
+        self.check_names = check_names
+        self.no_sitemap = no_sitemap
+        self.state = QUEUED
+        self.status = None
+        self.error = None
+        self.checks: dict = {}
+        self.performance: dict = {}
+        self.crawl_time = None
+        self._waiting: list = []
+
+    def wait(self):
+        """
+        Return Deferred fired with the job once it has finished.
+        """
+        from twisted.internet.defer import Deferred, succeed
+
+        if self.state == FINISHED:
+            return succeed(self)
+        deferred = Deferred()
+        self._waiting.append(deferred)
+        return deferred
+
+    def finish(self, crawler, crawl_time):
+        """
+        Store results of the crawl, with the same statuses as `main.py`.
+        """
+        self.crawl_time = crawl_time
+        self.performance = read_stats(crawler.stats)
+        if crawler.stats.get_value("custom/connection_issue"):
+            self.status = STATUS_ERR
+        else:
+            for name in self.check_names:
+                findings = list(crawler.spider.findings[name])
+                self.checks[name] = {
+                    "status": STATUS_FAILURE if findings else STATUS_OK,
+                    "findings": findings,
+                }
+            self.status = max(
+                check["status"] for check in self.checks.values()
+            )
+        self._finished()
+
+    def fail(self, failure):
+        """
+        Mark the job as failed by an unexpected error of the crawl.
+        """
+        self.status = STATUS_ERR
+        self.error = failure.getErrorMessage()
+        self._finished()
+
+    def _finished(self):
+        self.state = FINISHED
+        waiting, self._waiting = self._waiting, []
+        for deferred in waiting:
+            deferred.callback(self)
+
+    def to_dict(self):
+        return {
+            "id": self.id,
+            "domain": self.domain,
+            "checks": self.check_names,
+            "no_sitemap": self.no_sitemap,
+            "state": self.state,
+            "status": self.status,
+            "error": self.error,
+            "results": self.checks,
+            "crawl_time": self.crawl_time,
+            "performance": self.performance,
+        }
+
+
+class AuditService:
+    """
+    Run audit jobs in the reactor of the daemon.
+
+    All jobs share one `CrawlerRunner`, so Scrapy, Twisted and the spiders
+    are imported and the reactor is started only once, and at most
+    `max_jobs` domains are crawled at the same time. Finished jobs are kept
+    for `keep_jobs` later jobs, so their results can be fetched.
+    """
+
+    def __init__(self, settings, max_jobs=4, keep_jobs=100):
+        from scrapy.crawler import CrawlerRunner
+        from twisted.internet.defer import DeferredSemaphore
+
+        self.runner = CrawlerRunner(settings)
+        self.keep_jobs = keep_jobs
+        self.jobs: dict = {}
+        self._ids = itertools.count(1)
+        self._semaphore = DeferredSemaphore(max_jobs)
+
+    def submit(self, domain, check_names, no_sitemap=False):
+        """
+        Queue audit of the domain.
+
+        Parameters:
+            self (object): The instance of the class containing this method.
+            domain (str): URL of the audited domain.
+            check_names (list): Names of the checks to run.
+            no_sitemap (bool): Do not use the sitemap to gather urls.
+
+        Returns:
+            AuditJob (object): The queued job.
+        """
+        job = AuditJob(next(self._ids), domain, check_names, no_sitemap)
+        self.jobs[job.id] = job
+        self._prune()
+        self._semaphore.run(self._run, job)
+        return job
+
+    def _run(self, job):
+        from spiders.audit_spider import AuditSpider, AuditSpiderNoSitemap
+
+        if job.no_sitemap:
+            spider_cls = AuditSpiderNoSitemap
+        else:
+            spider_cls = AuditSpider
+        job.state = RUNNING
+        start = time.perf_counter()
+        crawler = self.runner.create_crawler(spider_cls)
+        deferred = self.runner.crawl(
+            crawler, domain=job.domain, checks=job.check_names
+        )
+        deferred.addCallback(
+            lambda _: job.finish(crawler, time.perf_counter() - start)
+        )
+        deferred.addErrback(job.fail)
+        return deferred
+
+    def _prune(self):
+        finished = [
+            job_id for job_id, job in self.jobs.items()
+            if job.state == FINISHED
+        ]
+        for job_id in finished[:max(0, len(finished) - self.keep_jobs)]:
+            del self.jobs[job_id]
+
+
+def parse_job(body):
+    """
+    Validate JSON body of a job request.
+
+    Returns:
+        tuple: Domain, check names and the no_sitemap flag.
+
+    Raises:
+        ValueError: If the request is not a valid job.
+    """
+    try:
+        request = json.loads(body)
+    except ValueError:
+        raise ValueError("Request body must be a JSON object")
+    if not isinstance(request, dict):
+        raise ValueError("Request body must be a JSON object")
+    domain = request.get("domain")
+    if not isinstance(domain, str) or not (
+        domain.startswith("https://") or domain.startswith("http://")
+    ):
+        raise ValueError("Domain URL must start with https:// or http://")
+    check_names = request.get("checks")
+    if not isinstance(check_names, list) or not check_names:
+        raise ValueError("At least one check is required")
+    for name in check_names:
+        if name not in CHECKS:
+            raise ValueError(f"Unknown check: {name}")
+    return domain.rstrip("/"), check_names, bool(request.get("no_sitemap"))
+
+
+def create_site(service):
+    """
+    Create Twisted web site of the daemon API.
+
+    POST /audits         Queue job described by the JSON body, e.g.
+                         {"domain": "https://docs.dasharo.com",
+                          "checks": ["orphan", "canonical"],
+                          "no_sitemap": false}.
+                         With ?wait=1 the response is sent when the job
+                         has finished.
+    GET  /audits         List jobs.
+    GET  /audits/<id>    Show job, with results once it has finished.
+    """
+    from twisted.web import resource, server
+
+    def respond(request, code, data):
+        request.setResponseCode(code)
+        request.setHeader(b"Content-Type", b"application/json")
+        return json.dumps(data).encode() + b"\n"
+
+    class Audits(resource.Resource):
+        isLeaf = True
+
+        def render_GET(self, request):
+            if not request.postpath or request.postpath == [b""]:
+                jobs = [job.to_dict() for job in service.jobs.values()]
+                return respond(request, 200, {"jobs": jobs})
+            try:
+                job = service.jobs[int(request.postpath[0])]
+            except (KeyError, ValueError):
+                return respond(request, 404, {"error": "Unknown job"})
+            return respond(request, 200, job.to_dict())
+
+        def render_POST(self, request):
+            if request.postpath and request.postpath != [b""]:
+                return respond(request, 404, {"error": "Not found"})
+            try:
+                job = service.submit(*parse_job(request.content.read()))
+            except ValueError as error:
+                return respond(request, 400, {"error": str(error)})
+            if request.args.get(b"wait") != [b"1"]:
+                return respond(request, 202, job.to_dict())
+
+            def send(job):
+                request.write(respond(request, 200, job.to_dict()))
+                request.finish()
+
+            finished = request.notifyFinish()
+            deferred = job.wait()
+            # The client may disconnect before the job finishes.
+            finished.addErrback(lambda _: deferred.cancel())
+            deferred.addCallback(send)
+            deferred.addErrback(lambda _: None)
+            return server.NOT_DONE_YET
+
+    root = resource.Resource()
+    root.putChild(b"audits", Audits())
+    return server.Site(root)
+
+
+def serve(args):
+    """
+    Run the daemon until it is interrupted.
+    """
+    from scrapy.utils.log import configure_logging
+    from scrapy.utils.reactor import install_reactor
+    from twisted.internet import endpoints
+
+    spy = SeoSpy()
+    spy.profile = args.profile
+    spy.cache_dir = args.cache_dir
+    spy.domain_concurrency = args.domain_concurrency
+    spy.link_extractor = args.link_extractor
+    settings = spy.get_settings()
+    settings.set("LOG_LEVEL", args.log_level)
+    if settings.get("TWISTED_REACTOR"):
+        install_reactor(settings["TWISTED_REACTOR"])
+    configure_logging(settings)
+
+    from twisted.internet import reactor
+
+    status = STATUS_OK
+
+    def listen_failed(failure):
+        nonlocal status
+        print(
+            f"Cannot listen on {args.listen}: {failure.getErrorMessage()}",
+            file=sys.stderr
+        )
+        status = STATUS_ERR
+        reactor.stop()
+
+    service = AuditService(settings, args.max_jobs, args.keep_jobs)
+    endpoint = endpoints.serverFromString(reactor, args.listen)
+    reactor.callWhenRunning(
+        lambda: endpoint.listen(create_site(service)).addErrback(
+            listen_failed
+        )
+    )
+    reactor.run()
+    return status
+
+
+class _UnixConnection(http.client.HTTPConnection):
+    def __init__(self, path, timeout=None):
+        super().__init__("localhost", timeout=timeout)
+        self.path = path
+
+    def connect(self):
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.settimeout(self.timeout)
+        self.sock.connect(self.path)
+
+
+def submit(args):
+    """
+    Send audit job to the daemon, wait for the results and print them like
+    `main.py` does.
+
+    Returns:
+        int: Status of the job, as returned by `main.py`.
+    """
+    check_names = []
+    if args.orphan:
+        check_names.append(OrphanPagesCheck.name)
+    if args.canonical:
+        check_names.append(CanonicalLinkCheck.name)
+    if args.link_status:
+        check_names.append(LinkStatusCheck.name)
+    if args.duplicates:
+        check_names.append(DuplicateContentCheck.name)
+    body = json.dumps({
+        "domain": args.domain,
+        "checks": check_names,
+        "no_sitemap": args.no_sitemap,
+    })
+    if args.socket:
+        connection = _UnixConnection(args.socket)
+    else:
+        url = args.url.split("//")[-1].rstrip("/")
+        connection = http.client.HTTPConnection(url)
+    try:
+        connection.request(
+            "POST",
+            "/audits?wait=1",
+            body=body,
+            headers={"Content-Type": "application/json"},
+        )
+        response = connection.getresponse()
+        job = json.loads(response.read())
+    except OSError as error:
+        print(f"Cannot connect to the daemon: {error}", file=sys.stderr)
+        return STATUS_ERR
+    finally:
+        connection.close()
+    if response.status != 200:
+        print(f"Job rejected: {job.get('error')}", file=sys.stderr)
+        return STATUS_ERR
+
+    spy = SeoSpy()
+    if job["error"]:
+        print(f"Audit failed: {job['error']}", file=sys.stderr)
+        return STATUS_ERR
+    if job["status"] == STATUS_ERR:
+        spy.print_connection_issue()
+        return STATUS_ERR
+    statuses = {}
+    for name in check_names:
+        statuses[name] = spy.print_check(
+            name, job["results"][name]["findings"]
+        )
+    return spy.print_summary(statuses)
+
+
+def parse_program_input():
+    """
+    Parse program input parameters.
+
+    Returns:
+        Parser args (object): An object that contains the parsed arguments
+                              extracted from the program input.
+    """
+    parser = argparse.ArgumentParser(
+        description=(
+            "Long-running SEO Spy service. 'serve' keeps one Scrapy process"
+            " running and accepts audit jobs over a local HTTP API, 'submit'"
+            " sends a job to it and exits with the same status as main.py."
+        )
+    )
+    commands = parser.add_subparsers(dest="command", required=True)
+    serve_parser = commands.add_parser("serve", help="Run the daemon")
+    serve_parser.add_argument(
+        "--listen",
+        default=DEFAULT_LISTEN,
+        help=(
+            "Twisted endpoint the API listens on, e.g."
+            " 'unix:/run/seo-spy.sock'. Default: " + DEFAULT_LISTEN
+        )
+    )
+    serve_parser.add_argument(
+        "--max-jobs",
+        type=int,
+        default=4,
+        metavar="N",
+        help="Number of domains crawled at the same time. Default: 4"
+    )
+    serve_parser.add_argument(
+        "--keep-jobs",
+        type=int,
+        default=100,
+        metavar="N",
+        help="Number of finished jobs whose results are kept. Default: 100"
+    )
+    serve_parser.add_argument("--profile", choices=list(PROFILES))
+    serve_parser.add_argument("--domain-concurrency", type=int, metavar="N")
+    serve_parser.add_argument("--cache-dir")
+    serve_parser.add_argument(
+        "--link-extractor", choices=["fast", "xpath"], default="fast"
+    )
+    serve_parser.add_argument("--log-level", default="INFO")
+
+    submit_parser = commands.add_parser(
+        "submit", help="Audit a domain with the running daemon"
+    )
+    submit_parser.add_argument("-d", "--domain", required=True)
+    submit_parser.add_argument("-n", "--no-sitemap", action="store_true")
+    submit_parser.add_argument("-o", "--orphan", action="store_true")
+    submit_parser.add_argument("-c", "--canonical", action="store_true")
+    submit_parser.add_argument("-l", "--link-status", action="store_true")
+    submit_parser.add_argument("-u", "--duplicates", action="store_true")
+    address = submit_parser.add_mutually_exclusive_group()
+    address.add_argument(
+        "--url",
+        default=DEFAULT_URL,
+        help="URL of the daemon. Default: " + DEFAULT_URL
+    )
+    address.add_argument("--socket", help="Unix socket of the daemon")
+    args = parser.parse_args()
+    if args.command == "submit":
+        if not (
+            args.orphan or args.canonical or args.link_status or
+            args.duplicates
+        ):
+            submit_parser.error(
+                "at least one of the arguments -o/--orphan -c/--canonical"
+                " -l/--link-status -u/--duplicates is required"
+            )
+        if not (
+            args.domain.startswith("https://") or
+            args.domain.startswith("http://")
+        ):
+            submit_parser.error(
+                "Domain URL must start with https:// or http://:"
+                f" {args.domain}"
+            )
+    return args
+
+
+def main():
+    """
+    Entry point of the SEO Spy daemon.
+
+    Returns:
+        int: Status of the submitted job, as returned by `main.py`, or
+             0 (STATUS_OK) when the daemon stops.
+    """
+    args = parse_program_input()
+    if args.command == "serve":
+        exit(serve(args))
+    exit(submit(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,445 @@
+import hashlib
+import json
+import sqlite3
+import zlib
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS workers (
+    shard INTEGER PRIMARY KEY,
+    busy INTEGER NOT NULL DEFAULT 1,
+    done INTEGER NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS queue (
+    url TEXT PRIMARY KEY,
+    shard INTEGER NOT NULL,
+    taken INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS queue_shard ON queue (shard, taken);
+CREATE TABLE IF NOT EXISTS pages (
+    url TEXT PRIMARY KEY,
+    shard INTEGER NOT NULL,
+    data BLOB NOT NULL
+);
+CREATE TABLE IF NOT EXISTS findings (
+    id INTEGER PRIMARY KEY,
+    shard INTEGER NOT NULL,
+    name TEXT NOT NULL,
+    finding TEXT NOT NULL
+);
+"""
+
+STATS_PREFIX = "custom/shard/"
+
+DEFAULT_POLL_INTERVAL = 0.5
+# URLs a worker takes from its queue at a time, while fewer wait in its
+# frontier.
+TAKE_BATCH = 1024
+
+
+def parse_shard(value):
+    """
+    Parse shard of a worker given as "I/N", the I-th of N shards counted
+    from 0.
+
+    Returns:
+        tuple: (I, N).
+    """
+    index, sep, shards = value.partition("/")
+    try:
+        index, shards = int(index), int(shards)
+    except ValueError:
+        raise ValueError(f"Shard must be I/N: {value}") from None
+    if not sep or shards < 1 or not 0 <= index < shards:
+        raise ValueError(f"Shard must be I/N with 0 <= I < N: {value}")
+    return index, shards
+
+
+def shard_of(url, shards):
+    """
+    Return shard owning the URL, the same in every worker.
+    """
+    digest = hashlib.blake2b(url.encode(), digest_size=8).digest()
+    return int.from_bytes(digest, "big") % shards
+
+
+class SharedStore(ABC):
+    """
+    Storage shared by the workers of a distributed crawl.
+
+    URLs of the audited domain are split into shards by hash, see
+    `shard_of()`, and each shard is crawled by a single worker, which
+    deduplicates its own URLs. Links to URLs of other shards are pushed to
+    the queue of their owner, and the owner takes them from there. Crawled
+    pages are stored with data extracted from them, so their link graph can
+    be merged once every worker has finished. Findings of checks which can
+    only run in the workers, e.g. link probes, are stored too.
+
+    A worker which took nothing from its queue and has nothing to crawl is
+    idle. The crawl has finished when every worker is idle and no URL waits
+    in any queue: nothing can then make a worker busy again.
+
+    Subclasses implement the storage, `open_store()` picks one by the
+    scheme of its location.
+    """
+
+    @abstractmethod
+    def validate(self, domain, shards, checks, shard):
+        """
+        Raise ValueError if a worker of the shard cannot join the crawl: it
+        belongs to another domain, number of shards or checks, or the shard
+        has already been crawled.
+
+        Parameters:
+            self (object): The instance of the class containing this method.
+            domain (str): Audited domain, the same for all workers.
+            shards (int): Number of shards, the same for all workers.
+            checks (list): Names of the checks, the same for all workers.
+            shard (int): Shard of the worker.
+        """
+
+    @abstractmethod
+    def join(self, domain, shards, checks, shard):
+        """
+        Register worker of the shard, as busy. Arguments are those of
+        `validate()`.
+        """
+
+    @abstractmethod
+    def push(self, urls):
+        """
+        Queue (url, shard) pairs for the workers owning them. URLs queued
+        before are ignored.
+        """
+
+    @abstractmethod
+    def take(self, shard, limit):
+        """
+        Return at most `limit` URLs queued for the shard, marking its worker
+        busy if there were any.
+        """
+
+    @abstractmethod
+    def idle(self, shard):
+        """
+        Mark worker of the shard idle, unless URLs wait in its queue.
+
+        Returns:
+            bool: True if the whole crawl has finished.
+        """
+
+    @abstractmethod
+    def add_pages(self, shard, pages):
+        """
+        Store (url, extracted) of pages crawled by the worker of the shard.
+        """
+
+    @abstractmethod
+    def add_findings(self, shard, findings):
+        """
+        Store findings of checks run by the worker, a dict of lists by check
+        name.
+        """
+
+    @abstractmethod
+    def finish(self, shard):
+        """
+        Mark shard as completely crawled.
+        """
+
+    @abstractmethod
+    def meta(self):
+        """
+        Return domain, number of shards and names of the checks of the
+        crawl, as a dict, empty if no worker has joined yet.
+        """
+
+    @abstractmethod
+    def unfinished(self):
+        """
+        Return shards which have not been completely crawled.
+        """
+
+    @abstractmethod
+    def pages(self):
+        """
+        Yield (url, extracted) of every stored page.
+        """
+
+    @abstractmethod
+    def findings(self):
+        """
+        Yield (check name, finding) of stored findings, each once.
+        """
+
+    @abstractmethod
+    def close(self):
+        """
+        Release the storage, other workers can keep using it.
+        """
+
+
+class SqliteStore(SharedStore):
+    """
+    Shared store in an SQLite database, for workers running on one machine
+    or sharing a filesystem with working locks.
+
+    Every operation is a single transaction. Pages are stored as compressed
+    JSON, as in `checkpoint.Checkpoint`.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        # Transactions are begun explicitly, as the queue is read and
+        # updated by many processes.
+        self._db = sqlite3.connect(path, timeout=60, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode = WAL")
+        self._db.executescript(SCHEMA)
+
+    @contextmanager
+    def _transaction(self):
+        self._db.execute("BEGIN IMMEDIATE")
+        try:
+            yield self._db
+        except BaseException:
+            self._db.execute("ROLLBACK")
+            raise
+        self._db.execute("COMMIT")
+
+    def validate(self, domain, shards, checks, shard):
+        expected = _meta(domain, shards, checks)
+        stored = dict(self._db.execute("SELECT key, value FROM meta"))
+        for key, value in expected.items():
+            if stored and stored[key] != value:
+                raise ValueError(
+                    f"Shared store {self.path} belongs to a crawl with"
+                    f" other {key}: {stored[key]}"
+                )
+        row = self._db.execute(
+            "SELECT done FROM workers WHERE shard = ?", (shard,)
+        ).fetchone()
+        if row is not None and row[0]:
+            raise ValueError(
+                f"Shard {shard}/{shards} of {self.path} has already been"
+                " crawled"
+            )
+
+    def join(self, domain, shards, checks, shard):
+        with self._transaction() as db:
+            self.validate(domain, shards, checks, shard)
+            db.executemany(
+                "INSERT OR IGNORE INTO meta VALUES (?, ?)",
+                _meta(domain, shards, checks).items()
+            )
+            db.execute(
+                "INSERT OR REPLACE INTO workers VALUES (?, 1, 0)", (shard,)
+            )
+            # URLs taken by a previous worker of the shard, which failed,
+            # are crawled again.
+            db.execute(
+                "UPDATE queue SET taken = 0 WHERE shard = ?", (shard,)
+            )
+
+    def push(self, urls):
+        with self._transaction() as db:
+            db.executemany(
+                "INSERT OR IGNORE INTO queue (url, shard) VALUES (?, ?)", urls
+            )
+
+    def take(self, shard, limit):
+        with self._transaction() as db:
+            urls = [
+                url for url, in db.execute(
+                    "SELECT url FROM queue WHERE shard = ? AND taken = 0"
+                    " LIMIT ?",
+                    (shard, limit)
+                )
+            ]
+            if urls:
+                db.executemany(
+                    "UPDATE queue SET taken = 1 WHERE url = ?",
+                    ((url,) for url in urls)
+                )
+                db.execute(
+                    "UPDATE workers SET busy = 1 WHERE shard = ?", (shard,)
+                )
+        return urls
+
+    def idle(self, shard):
+        with self._transaction() as db:
+            waiting = db.execute(
+                "SELECT 1 FROM queue WHERE shard = ? AND taken = 0 LIMIT 1",
+                (shard,)
+            ).fetchone()
+            if waiting:
+                return False
+            db.execute(
+                "UPDATE workers SET busy = 0 WHERE shard = ?", (shard,)
+            )
+            shards = int(db.execute(
+                "SELECT value FROM meta WHERE key = 'shards'"
+            ).fetchone()[0])
+            idle = db.execute(
+                "SELECT COUNT(*) FROM workers WHERE busy = 0"
+            ).fetchone()[0]
+            waiting = db.execute(
+                "SELECT 1 FROM queue WHERE taken = 0 LIMIT 1"
+            ).fetchone()
+        return idle == shards and not waiting
+
+    def add_pages(self, shard, pages):
+        with self._transaction() as db:
+            db.executemany(
+                "INSERT OR REPLACE INTO pages VALUES (?, ?, ?)",
+                (
+                    (
+                        url,
+                        shard,
+                        zlib.compress(json.dumps(extracted).encode()),
+                    )
+                    for url, extracted in pages
+                )
+            )
+
+    def add_findings(self, shard, findings):
+        with self._transaction() as db:
+            db.execute("DELETE FROM findings WHERE shard = ?", (shard,))
+            db.executemany(
+                "INSERT INTO findings (shard, name, finding) VALUES (?, ?, ?)",
+                (
+                    (shard, name, finding)
+                    for name, urls in findings.items()
+                    for finding in urls
+                )
+            )
+
+    def finish(self, shard):
+        with self._transaction() as db:
+            db.execute(
+                "UPDATE workers SET busy = 0, done = 1 WHERE shard = ?",
+                (shard,)
+            )
+
+    def meta(self):
+        meta = dict(self._db.execute("SELECT key, value FROM meta"))
+        if not meta:
+            return {}
+        return {
+            "domain": meta["domain"],
+            "shards": int(meta["shards"]),
+            "checks": meta["checks"].split(",") if meta["checks"] else [],
+        }
+
+    def unfinished(self):
+        shards = self.meta().get("shards", 0)
+        done = {
+            shard for shard, in self._db.execute(
+                "SELECT shard FROM workers WHERE done = 1"
+            )
+        }
+        return [shard for shard in range(shards) if shard not in done]
+
+    def pages(self):
+        for url, data in self._db.execute("SELECT url, data FROM pages"):
+            yield url, json.loads(zlib.decompress(data))
+
+    def findings(self):
+        yield from self._db.execute(
+            "SELECT name, finding FROM findings GROUP BY name, finding"
+            " ORDER BY MIN(id)"
+        )
+
+    def close(self):
+        self._db.close()
+
+
+def _meta(domain, shards, checks):
+    return {
+        "domain": domain,
+        "shards": str(shards),
+        "checks": ",".join(sorted(checks)),
+    }
+
+
+# Shared stores by scheme of their location, e.g. sqlite:///tmp/crawl.db.
+STORES = {
+    "sqlite": SqliteStore,
+}
+
+
+def open_store(location):
+    """
+    Open shared store at the location, an URL whose scheme selects the
+    store, see `STORES`, or a path of an SQLite database.
+    """
+    scheme, sep, path = location.partition("://")
+    if not sep:
+        return SqliteStore(location)
+    if scheme not in STORES:
+        raise ValueError(f"Unknown shared store: {location}")
+    return STORES[scheme](path)
+
+
+def merge_shards(spider_cls, domain, location, settings, **kwargs):
+    """
+    Compute findings of a distributed crawl from pages stored by all its
+    workers, as a single crawl of the whole domain would.
+
+    Parameters:
+        spider_cls (class): The spider whose checks are run.
+        domain (str): The audited domain.
+        location (str): Location of the shared store, see `open_store()`.
+        settings (object): Scrapy settings of the audit.
+        kwargs (dict): Additional spider arguments.
+
+    Returns:
+        Crawler (object): The crawler with the closed spider.
+    """
+    from standalone import StandaloneAudit, create_crawler
+
+    store = open_store(location)
+    try:
+        meta = store.meta()
+        if not meta:
+            raise ValueError(f"No crawl stored in {location}")
+        if meta["domain"] != domain:
+            raise ValueError(
+                f"Shared store {location} belongs to another domain:"
+                f" {meta['domain']}"
+            )
+        unfinished = store.unfinished()
+        if unfinished:
+            raise ValueError(
+                f"Shards not crawled yet: {', '.join(map(str, unfinished))}"
+            )
+        crawler = create_crawler(spider_cls, domain, settings, **kwargs)
+        spider = crawler.spider
+        missing = [
+            check.name for check in spider.checks
+            if check.name not in meta["checks"]
+        ]
+        if missing:
+            raise ValueError(
+                f"Checks not run by the workers: {', '.join(missing)}"
+            )
+        audit = StandaloneAudit(crawler)
+        for url, extracted in store.pages():
+            for item in spider.merge_page(url, extracted):
+                audit.process_item(item)
+        for name, finding in store.findings():
+            for item in spider.merge_findings(name, [finding]):
+                audit.process_item(item)
+        for item in spider.finish_checks():
+            audit.process_item(item)
+        crawler.stats.set_value(
+            f"{STATS_PREFIX}merged_pages", len(spider._visited_pages)
+        )
+        audit.close()
+    finally:
+        store.close()
+    return crawler
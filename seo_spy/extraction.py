@@ -0,0 +1,106 @@
+import re
+from html import unescape
+
+FAST = "fast"
+XPATH = "xpath"
+MODES = (FAST, XPATH)
+
+# Comments and script/style contents are matched first, so anchors inside
+# them are skipped the same way an HTML parser skips them.
+_TAG_RE = re.compile(
+    r"<!--.*?-->"
+    r"|<(script|style)\b.*?</\1\s*>"
+    r"|<(a|link)\b((?:[^>\"']|\"[^\"]*\"|'[^']*')*)>",
+    re.IGNORECASE | re.DOTALL,
+)
+_ATTR_RE = re.compile(
+    r"([^\s\"'>/=]+)(?:\s*=\s*(\"[^\"]*\"|'[^']*'|[^\s\"'>]+))?"
+)
+
+
+def _attributes(text):
+    attributes = {}
+    for name, value in _ATTR_RE.findall(text):
+        name = name.lower()
+        if name in attributes:
+            continue
+        if value[:1] in ("\"", "'"):
+            value = value[1:-1]
+        attributes[name] = unescape(value)
+    return attributes
+
+
+def extract_fast(text):
+    """
+    Collect hrefs of all anchors and all canonical link elements in a single
+    pass over the HTML text, without building a document tree.
+
+    Parameters:
+        text (str): HTML of the page.
+
+    Returns:
+        dict: `hrefs` (list of href values of <a> elements) and `canonical`
+              (list of <link rel="canonical"> elements).
+    """
+    hrefs = []
+    canonical = []
+    for match in _TAG_RE.finditer(text):
+        tag = match.group(2)
+        if tag is None:
+            continue
+        attributes = _attributes(match.group(3))
+        if tag.lower() == "a":
+            href = attributes.get("href")
+            if href is not None:
+                hrefs.append(href)
+        elif attributes.get("rel") == "canonical":
+            canonical.append(match.group(0))
+    return {"hrefs": hrefs, "canonical": canonical}
+
+
+def extract_xpath(response, key):
+    """
+    Extract hrefs or canonical link elements with XPath selectors.
+
+    Parameters:
+        response (object): Response of the page.
+        key (str): Either `hrefs` or `canonical`.
+
+    Returns:
+        dict: The requested key with the extracted values.
+    """
+    if key == "hrefs":
+        return {"hrefs": response.xpath("//a/@href").getall()}
+    return {"canonical": response.xpath('//link[@rel="canonical"]').getall()}
+
+
+class LinkExtractor:
+    """
+    Extract anchors and canonical links from HTML pages.
+
+    In the `fast` mode both are collected with a single regular expression
+    scan of the page text. The `xpath` mode uses Scrapy selectors, which
+    parse the whole document into a tree first.
+    """
+
+    def __init__(self, mode=FAST):
+        if mode not in MODES:
+            raise ValueError(f"Unknown link extractor: {mode}")
+        self.mode = mode
+
+    def extract(self, response, key):
+        """
+        Extract data from the response.
+
+        Parameters:
+            self (object): The instance of the class containing this method.
+            response (object): Response of the page.
+            key (str): Either `hrefs` or `canonical`. The fast mode always
+                       returns both.
+
+        Returns:
+            dict: Extracted data, including at least the requested key.
+        """
+        if self.mode == FAST and hasattr(response, "text"):
+            return extract_fast(response.text)
+        return extract_xpath(response, key)
@@ -0,0 +1,164 @@
+import heapq
+import itertools
+import re
+import sys
+from urllib.parse import urlparse
+
+from url_index import UrlIndex
+
+STATS_PREFIX = "custom/frontier/"
+
+DEFAULT_DEPTH_WEIGHT = 1.0
+DEFAULT_INLINK_WEIGHT = 1.0
+DEFAULT_SITEMAP_WEIGHT = 3.0
+DEFAULT_PATTERN_WEIGHT = 2.0
+# Pagination and tag archives, which link to each other and to few pages
+# not linked from elsewhere.
+DEFAULT_PATTERNS = [r"/page/\d+", r"[?&](page|p)=\d+", r"/tags?/"]
+
+
+class Frontier:
+    """
+    URLs discovered by following links but not crawled yet, best first.
+
+    Every URL is scored by signals known when it is ranked: its path depth
+    (number of path segments, plus one for a query string) lowers the score,
+    the number of links to it seen so far and its presence in the sitemap
+    raise it, and matching any of the low priority `patterns`, e.g.
+    pagination, lowers it. Each signal has its own weight, 0 turns it off.
+
+    The number of links counts through `link()` as pages are crawled, so
+    a URL may be re-ranked after it was added. The score grows with the
+    logarithm of the count, so a URL is re-ranked only when its count
+    reaches a power of two, and re-ranking costs a heap push, older entries
+    being skipped when popped.
+    """
+
+    def __init__(self, depth_weight=DEFAULT_DEPTH_WEIGHT,
+                 inlink_weight=DEFAULT_INLINK_WEIGHT,
+                 sitemap_weight=DEFAULT_SITEMAP_WEIGHT,
+                 pattern_weight=DEFAULT_PATTERN_WEIGHT,
+                 patterns=DEFAULT_PATTERNS):
+        self.depth_weight = depth_weight
+        self.inlink_weight = inlink_weight
+        self.sitemap_weight = sitemap_weight
+        self.pattern_weight = pattern_weight
+        self._pattern = None
+        if patterns:
+            self._pattern = re.compile("|".join(f"(?:{p})" for p in patterns))
+        self.sitemap = UrlIndex()
+        self._heap: list = []
+        # URL -> (number of links to it, current score).
+        self._pending: dict = {}
+        self._order = itertools.count()
+
+    def __len__(self):
+        return len(self._pending)
+
+    def __contains__(self, url):
+        return url in self._pending
+
+    def add(self, url, inlinks=1):
+        """
+        Add newly discovered URL.
+
+        Parameters:
+            self (object): The instance of the class containing this method.
+            url (str): URL to be crawled.
+            inlinks (int): Number of links to the URL seen so far.
+        """
+        url = sys.intern(url)
+        self._push(url, inlinks)
+
+    def link(self, url):
+        """
+        Count link to an already discovered URL, re-ranking it if it is
+        still waiting.
+        """
+        pending = self._pending.get(url)
+        if pending is None:
+            return
+        inlinks = pending[0] + 1
+        if self.inlink_weight and not inlinks & (inlinks - 1):
+            self._push(url, inlinks)
+        else:
+            self._pending[url] = (inlinks, pending[1])
+
+    def add_sitemap(self, url):
+        """
+        Record URL listed in the sitemap, re-ranking it if it is waiting.
+        """
+        if not self.sitemap.add(url) or not self.sitemap_weight:
+            return
+        pending = self._pending.get(url)
+        if pending is not None:
+            self._push(url, pending[0])
+
+    def pop(self):
+        """
+        Remove the best ranked URL.
+
+        Returns:
+            str: The URL, or None if the frontier is empty.
+        """
+        heap = self._heap
+        while heap:
+            score, _, url = heapq.heappop(heap)
+            pending = self._pending.get(url)
+            # Entries pushed before the URL was re-ranked are stale.
+            if pending is not None and pending[1] == -score:
+                del self._pending[url]
+                return url
+        return None
+
+    def score(self, url, inlinks):
+        """
+        Return score of the URL, higher is crawled first.
+        """
+        parsed = urlparse(url)
+        depth = sum(1 for segment in parsed.path.split("/") if segment)
+        if parsed.query:
+            depth += 1
+        score = inlinks.bit_length() * self.inlink_weight
+        score -= depth * self.depth_weight
+        if self.sitemap_weight and url in self.sitemap:
+            score += self.sitemap_weight
+        if self._pattern is not None and self._pattern.search(url):
+            score -= self.pattern_weight
+        return score
+
+    def write_stats(self, stats, visited, normalizer):
+        """
+        Store coverage of the crawl in the crawler stats with the
+        `custom/frontier/` prefix.
+
+        Parameters:
+            self (object): The instance of the class containing this method.
+            stats (object): Scrapy stats collector.
+            visited (object): URLs of the crawled pages, as they were
+                              fetched.
+            normalizer (object): `UrlNormalizer` the sitemap URLs were
+                                 resolved with, crawled URLs are compared
+                                 with them in the same form.
+        """
+        crawled = len(visited)
+        discovered = crawled + len(self._pending)
+        stats.set_value(f"{STATS_PREFIX}crawled", crawled)
+        stats.set_value(f"{STATS_PREFIX}pending", len(self._pending))
+        stats.set_value(
+            f"{STATS_PREFIX}coverage",
+            crawled / discovered if discovered else 1.0,
+        )
+        if len(self.sitemap):
+            crawled_urls = UrlIndex()
+            for url in visited:
+                crawled_urls.add(normalizer.normalize(None, url) or url)
+            covered = sum(1 for url in self.sitemap if url in crawled_urls)
+            stats.set_value(
+                f"{STATS_PREFIX}sitemap_coverage", covered / len(self.sitemap)
+            )
+
+    def _push(self, url, inlinks):
+        score = self.score(url, inlinks)
+        self._pending[url] = (inlinks, score)
+        heapq.heappush(self._heap, (-score, next(self._order), url))
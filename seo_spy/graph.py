@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+
+import argparse
+import os
+import sys
+from link_graph import LinkGraph
+
+STATUS_OK = 0
+STATUS_ERR = 1
+
+
+def parse_program_input():
+    """
+    Parse program input parameters.
+
+    Returns:
+        Parser args (object): An object that contains the parsed arguments
+                              extracted from the program input.
+    """
+    parser = argparse.ArgumentParser(
+        description=(
+            "Query the link graph stored by SEO Spy with the --state option,"
+            " without crawling the domain again."
+        )
+    )
+    parser.add_argument(
+        "state_file",
+        metavar="STATE_FILE",
+        help="SQLite file written by main.py --state"
+    )
+    commands = parser.add_subparsers(dest="command", required=True)
+    in_degree = commands.add_parser(
+        "in-degree",
+        help=(
+            "Print number of pages linking to URL, or to every crawled page"
+            " if URL is not given, pages with the fewest links first"
+        )
+    )
+    in_degree.add_argument("url", metavar="URL", nargs="?")
+    linking_to = commands.add_parser(
+        "linking-to",
+        help="Print pages linking to URL"
+    )
+    linking_to.add_argument("url", metavar="URL")
+    unreachable = commands.add_parser(
+        "unreachable",
+        help="Print pages that can not be reached by links from ROOT"
+    )
+    unreachable.add_argument(
+        "root",
+        metavar="ROOT",
+        help="URL of the root page, e.g. https://docs.dasharo.com/"
+    )
+    return parser.parse_args()
+
+
+def main():
+    """
+    Entry point of the link graph query tool.
+
+    Returns:
+        int:
+            - 0 (STATUS_OK): If the query succeeded.
+            - 1 (STATUS_ERR): If the state file does not exist.
+    """
+    args = parse_program_input()
+    if not os.path.isfile(args.state_file):
+        print(f"State file not found: {args.state_file}", file=sys.stderr)
+        exit(STATUS_ERR)
+
+    graph = LinkGraph(args.state_file)
+    if args.command == "in-degree":
+        if args.url:
+            print(graph.in_degree(args.url))
+        else:
+            for url, degree in graph.in_degrees():
+                print(f"{degree}\t{url}")
+    elif args.command == "linking-to":
+        for url in graph.linking_to(args.url):
+            print(url)
+    elif args.command == "unreachable":
+        for url in graph.unreachable(args.root):
+            print(url)
+    graph.close()
+    exit(STATUS_OK)
+
+
+if __name__ == "__main__":
+    main()
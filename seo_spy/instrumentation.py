@@ -0,0 +1,144 @@
+from array import array
+from time import perf_counter
+
+STATS_PREFIX = "custom/perf/"
+
+
+class _Phase:
+    __slots__ = ("_totals", "_nested", "_name", "_start")
+
+    def __init__(self, totals, nested, name):
+        self._totals = totals
+        # Time of phases nested in each running phase, innermost last.
+        self._nested = nested
+        self._name = name
+
+    def __enter__(self):
+        self._nested.append(0.0)
+        self._start = perf_counter()
+
+    def __exit__(self, *exc):
+        elapsed = perf_counter() - self._start
+        nested = self._nested
+        own = elapsed - nested.pop()
+        if nested:
+            nested[-1] += elapsed
+        self._totals[self._name] = self._totals.get(self._name, 0.0) + own
+
+
+class Instrumentation:
+    """
+    Cumulative per-phase timers and throughput counters of a crawl.
+
+    Phases are measured with `measure()`, which costs two `perf_counter()`
+    calls, so instrumentation can stay enabled in production crawls. Phase
+    times are exclusive: time of a phase measured inside another one, e.g.
+    `parse` triggered by a check, counts only for the inner phase, so phase
+    times never add up to more than the wall time.
+
+    The `download` phase is the time during which at least one request was
+    in the downloader, counted by `download_started()` and
+    `download_finished()`. Downloads run concurrently with the other phases,
+    so it overlaps with them. Download latency of every response is kept in
+    a compact array to compute percentiles at the end of the crawl.
+    """
+
+    def __init__(self):
+        self.started = perf_counter()
+        self.pages = 0
+        self.bytes = 0
+        self._totals: dict = {}
+        self._nested: list = []
+        self._phases: dict = {}
+        self._latencies = array("d")
+        self._downloads = 0
+        self._download_start = 0.0
+
+    def measure(self, phase):
+        """
+        Return context manager adding time spent in the block, except in
+        phases nested in it, to the cumulative time of the phase.
+        """
+        timer = self._phases.get(phase)
+        if timer is None:
+            timer = self._phases[phase] = _Phase(
+                self._totals, self._nested, phase
+            )
+        return timer
+
+    def download_started(self):
+        """
+        Count request entering the downloader.
+        """
+        if not self._downloads:
+            self._download_start = perf_counter()
+        self._downloads += 1
+
+    def download_finished(self):
+        """
+        Count request leaving the downloader, with a response or not.
+        """
+        if not self._downloads:
+            return
+        self._downloads -= 1
+        if not self._downloads:
+            self._totals["download"] = (
+                self._totals.get("download", 0.0) +
+                perf_counter() - self._download_start
+            )
+
+    def record_response(self, response):
+        """
+        Count downloaded page and its download latency.
+        """
+        self.pages += 1
+        self.bytes += len(response.body)
+        latency = response.meta.get("download_latency")
+        if latency is not None:
+            self._latencies.append(latency)
+
+    def summary(self):
+        """
+        Return dict with cumulative phase times in seconds, throughput and
+        download latency percentiles.
+
+        Phase times are exclusive, see `measure()`, except `download`.
+        """
+        elapsed = perf_counter() - self.started
+        summary = {
+            "elapsed": elapsed,
+            "pages": self.pages,
+            "bytes": self.bytes,
+            "pages_per_sec": self.pages / elapsed if elapsed else 0.0,
+            "bytes_per_sec": self.bytes / elapsed if elapsed else 0.0,
+        }
+        for phase, total in self._totals.items():
+            summary[f"time/{phase}"] = total
+        if self._latencies:
+            latencies = sorted(self._latencies)
+            summary["latency/p50"] = _percentile(latencies, 50)
+            summary["latency/p95"] = _percentile(latencies, 95)
+        return summary
+
+    def write_stats(self, stats):
+        """
+        Store summary in the crawler stats, under the `custom/perf/` prefix.
+        """
+        for key, value in self.summary().items():
+            stats.set_value(STATS_PREFIX + key, value)
+
+
+def _percentile(values, percent):
+    index = round(percent / 100 * (len(values) - 1))
+    return values[index]
+
+
+def read_stats(stats):
+    """
+    Return summary stored in the crawler stats by `write_stats()`.
+    """
+    return {
+        key[len(STATS_PREFIX):]: value
+        for key, value in stats.get_stats().items()
+        if key.startswith(STATS_PREFIX)
+    }
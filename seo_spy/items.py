@@ -6,7 +6,11 @@
 import scrapy
 
 
-class SeoChecksItem(scrapy.Item):
-    # define the fields for your item here like:
-    # name = scrapy.Field()
-    pass
+class Finding(scrapy.Item):
+    """
+    Page that failed a check.
+    """
+
+    domain = scrapy.Field()
+    check = scrapy.Field()
+    url = scrapy.Field()
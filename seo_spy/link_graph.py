@@ -0,0 +1,130 @@
+import sqlite3
+from array import array
+from collections import deque
+
+
+def _page_key(url):
+    """
+    Return URL in the form used by link targets, i.e. ending with a slash.
+    """
+    return url if url.endswith("/") else url + "/"
+
+
+class LinkGraph:
+    """
+    Read-only queries over the link graph stored in an `AuditState`
+    database.
+
+    Pages are URLs crawled during the audit. Links point at URLs ending with
+    a slash, so page URLs are matched against link targets the same way the
+    orphan pages check does it.
+    """
+
+    def __init__(self, path):
+        self._db = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+
+    def pages(self):
+        """
+        Return URLs of all crawled pages.
+        """
+        return [
+            url for url, in self._db.execute(
+                "SELECT url FROM pages JOIN urls ON urls.id = pages.url_id"
+                " ORDER BY url"
+            )
+        ]
+
+    def linking_to(self, url):
+        """
+        Return URLs of crawled pages linking to the given URL.
+        """
+        return [
+            source for source, in self._db.execute(
+                "SELECT sources.url FROM links"
+                " JOIN urls AS targets ON targets.id = links.target_id"
+                " JOIN urls AS sources ON sources.id = links.source_id"
+                " WHERE targets.url = ? ORDER BY sources.url",
+                (_page_key(url),)
+            )
+        ]
+
+    def in_degree(self, url):
+        """
+        Return number of crawled pages linking to the given URL.
+        """
+        count, = self._db.execute(
+            "SELECT COUNT(*) FROM links"
+            " JOIN urls ON urls.id = links.target_id WHERE urls.url = ?",
+            (_page_key(url),)
+        ).fetchone()
+        return count
+
+    def in_degrees(self):
+        """
+        Return list of (URL, in-degree) tuples of all crawled pages, pages
+        with the fewest incoming links first.
+        """
+        counts = dict(self._db.execute(
+            "SELECT urls.url, COUNT(*) FROM links"
+            " JOIN urls ON urls.id = links.target_id GROUP BY links.target_id"
+        ))
+        degrees = [
+            (url, counts.get(_page_key(url), 0)) for url in self.pages()
+        ]
+        return sorted(degrees, key=lambda item: (item[1], item[0]))
+
+    def unreachable(self, root):
+        """
+        Return URLs of crawled pages that can not be reached by following
+        internal links from the root page.
+
+        The adjacency lists are loaded into compact arrays in CSR form
+        (offsets into a flat array of link targets) before the search.
+        """
+        max_id, = self._db.execute("SELECT MAX(id) FROM urls").fetchone()
+        if max_id is None:
+            return []
+        offsets = array("q", bytes(8 * (max_id + 2)))
+        targets = array("q")
+        for source_id, target_id in self._db.execute(
+            "SELECT source_id, target_id FROM links ORDER BY source_id"
+        ):
+            offsets[source_id + 1] += 1
+            targets.append(target_id)
+        for i in range(1, len(offsets)):
+            offsets[i] += offsets[i - 1]
+
+        ids = {}
+        pages = {}
+        for url_id, url in self._db.execute("SELECT id, url FROM urls"):
+            ids[url] = url_id
+        for url_id, url in self._db.execute(
+            "SELECT url_id, url FROM pages JOIN urls ON urls.id = pages.url_id"
+        ):
+            pages[url_id] = url
+        # Map link targets to crawled pages they lead to.
+        page_ids = {}
+        for url_id, url in pages.items():
+            page_ids[url_id] = url_id
+            key_id = ids.get(_page_key(url))
+            if key_id is not None:
+                page_ids[key_id] = url_id
+
+        reached = set()
+        root_id = page_ids.get(ids.get(_page_key(root), -1))
+        queue = deque([] if root_id is None else [root_id])
+        while queue:
+            page_id = queue.popleft()
+            if page_id in reached:
+                continue
+            reached.add(page_id)
+            for target_id in targets[offsets[page_id]:offsets[page_id + 1]]:
+                target_page_id = page_ids.get(target_id)
+                if target_page_id is not None:
+                    queue.append(target_page_id)
+        return sorted(
+            url for url_id, url in pages.items() if url_id not in reached
+        )
+
+    def close(self):
+        self._db.close()
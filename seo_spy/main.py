@@ -1,19 +1,58 @@
 #!/usr/bin/env python3
 
 import argparse
-from scrapy.crawler import CrawlerProcess
-from scrapy.utils.project import get_project_settings
-from spiders.orphan_pages_spider import OrphanPagesSpider
-from spiders.orphan_pages_spider import OrphanPagesSpiderNoSitemap
-from spiders.canonical_link_spider import CanonicalLinkSpider
-from spiders.canonical_link_spider import CanonicalLinkSpiderNoSitemap
+import json
+import os
+import sys
+import time
+from checks import (
+    CHECKS,
+    CanonicalLinkCheck,
+    DuplicateContentCheck,
+    LinkStatusCheck,
+    OrphanPagesCheck,
+)
+from instrumentation import read_stats
+from profiles import PROFILES
+
+# Scrapy, Twisted and the spiders are imported only when a crawl starts, so
+# --help and invalid arguments are reported without loading them. Keep it
+# that way, benchmarks/bench_startup.py fails otherwise.
 
 STATUS_OK = 0
 STATUS_ERR = 1
 STATUS_FAILURE = 2
 
+SCRAPY = "scrapy"
+ASYNCIO = "asyncio"
+BACKENDS = [SCRAPY, ASYNCIO]
+
 
 class SeoSpy():
+    def __init__(self):
+        self.cache_dir = None
+        self.state_file = None
+        self.checkpoint_file = None
+        self.resume = False
+        self.checkpoint_interval = None
+        self.report_file = None
+        self.findings_file = None
+        self.link_extractor = None
+        self.domain_concurrency = None
+        self.profile = None
+        self.parse_workers = None
+        self.url_filter_error_rate = None
+        self.url_filter_dir = None
+        self.max_pages = None
+        self.max_time = None
+        self.rank_by_sitemap = False
+        self.offline = None
+        self.backend = SCRAPY
+        self.shared_store = None
+        self.shard = None
+        self.reports = []
+        self.crawl_time = None
+
     def parse_program_input(self):
         """
         Parse program input parameters.
@@ -32,15 +71,43 @@ class SeoSpy():
                 "the renowned web scraper Scrapy."
             )
         )
-        self.parser.add_argument(
+        domains = self.parser.add_mutually_exclusive_group(required=True)
+        domains.add_argument(
             "-d",
             "--domain",
-            required=True,
             help=(
                 "URL of the tested domain. Examples: "
                 "http://127.0.0.1:8000 https://docs.dasharo.com"
             )
         )
+        domains.add_argument(
+            "-D",
+            "--domains-file",
+            help=(
+                "File with URLs of tested domains, one per line, or '-' to"
+                " read them from standard input. All domains are audited"
+                " concurrently in a single process."
+            )
+        )
+        self.parser.add_argument(
+            "--profile",
+            choices=list(PROFILES),
+            help=(
+                "Crawl profile tuned for the audited server. 'local' and"
+                " 'staging' raise concurrency while latency and error rate"
+                " of the server stay low, 'public' uses AutoThrottle."
+                " Default: Scrapy defaults"
+            )
+        )
+        self.parser.add_argument(
+            "--domain-concurrency",
+            type=int,
+            metavar="N",
+            help=(
+                "Maximum number of concurrent requests to a single domain."
+                " Disables adaptive concurrency of the profile."
+            )
+        )
         self.parser.add_argument(
             "-n",
             "--no-sitemap",
@@ -50,7 +117,185 @@ class SeoSpy():
                 " domain."
             )
         )
-        group = self.parser.add_mutually_exclusive_group(required=True)
+        self.parser.add_argument(
+            "--cache-dir",
+            help=(
+                "Directory of the persistent crawl cache. Pages cached during"
+                " previous runs are revalidated with conditional requests and"
+                " reused if they have not changed."
+            )
+        )
+        self.parser.add_argument(
+            "--state",
+            dest="state_file",
+            help=(
+                "SQLite file keeping state of crawled pages between runs."
+                " Pages whose sitemap <lastmod> has not changed since the"
+                " previous run are not downloaded again."
+            )
+        )
+        self.parser.add_argument(
+            "--checkpoint",
+            dest="checkpoint_file",
+            help=(
+                "SQLite file where progress of the crawl is saved"
+                " periodically, so that an interrupted crawl can be resumed"
+                " with --resume. Removed when the crawl finishes."
+            )
+        )
+        self.parser.add_argument(
+            "--checkpoint-interval",
+            type=float,
+            metavar="SECONDS",
+            help="Time between checkpoint writes. Default: 60"
+        )
+        self.parser.add_argument(
+            "--resume",
+            action="store_true",
+            help=(
+                "Continue the crawl saved in the --checkpoint file instead"
+                " of starting a new one."
+            )
+        )
+        self.parser.add_argument(
+            "--report",
+            dest="report_file",
+            help=(
+                "Write JSON report with results of the checks, per-phase"
+                " timings, throughput and download latency to the file."
+            )
+        )
+        self.parser.add_argument(
+            "--findings",
+            dest="findings_file",
+            help=(
+                "Write every finding to the file as a JSON Lines record as"
+                " soon as it is found, instead of keeping findings in memory"
+                " until the end of the crawl."
+            )
+        )
+        self.parser.add_argument(
+            "--link-extractor",
+            choices=["fast", "xpath"],
+            default="fast",
+            help=(
+                "Method of extracting links from pages. 'fast' scans the HTML"
+                " once without building a document tree, 'xpath' uses Scrapy"
+                " selectors. Default: fast"
+            )
+        )
+        self.parser.add_argument(
+            "--parse-workers",
+            type=int,
+            metavar="N",
+            help=(
+                "Extract links from pages in N worker processes instead of"
+                " the crawling process. Useful for large, CPU-bound crawls."
+            )
+        )
+        self.parser.add_argument(
+            "--url-filter-error-rate",
+            type=float,
+            metavar="P",
+            help=(
+                "Probability that a page discovered without the sitemap is"
+                " wrongly taken for an already seen one and skipped. Lower"
+                " values take more memory. Default: 1e-06"
+            )
+        )
+        self.parser.add_argument(
+            "--url-filter-dir",
+            help=(
+                "Directory where parts of the filter of seen URLs are"
+                " written when they fill up, instead of keeping them in"
+                " memory. Used without the sitemap."
+            )
+        )
+        self.parser.add_argument(
+            "--max-pages",
+            type=int,
+            metavar="N",
+            help=(
+                "Request at most N pages. Pages are crawled best first,"
+                " shallow and often linked ones before deep, pagination and"
+                " tag archive ones. Used without the sitemap."
+            )
+        )
+        self.parser.add_argument(
+            "--max-time",
+            type=float,
+            metavar="SECONDS",
+            help=(
+                "Stop requesting pages SECONDS after the crawl started."
+                " Used without the sitemap."
+            )
+        )
+        self.parser.add_argument(
+            "--rank-by-sitemap",
+            action="store_true",
+            help=(
+                "Read the sitemap to crawl pages listed in it first. Pages"
+                " are still found by links only. Used without the sitemap."
+            )
+        )
+        self.parser.add_argument(
+            "--offline",
+            metavar="PATH",
+            help=(
+                "Audit the domain from a static site build directory or a"
+                " .warc/.warc.gz archive instead of crawling it. Pages are"
+                " mapped to files by their path under the domain URL."
+            )
+        )
+        self.parser.add_argument(
+            "--backend",
+            choices=BACKENDS,
+            default=SCRAPY,
+            help=(
+                "Crawler running the checks. 'asyncio' is a lightweight"
+                " engine with a minimal HTTP client, which starts faster and"
+                " has less overhead per page than the full Scrapy stack."
+                " Default: scrapy"
+            )
+        )
+        distributed = self.parser.add_argument_group(
+            "distributed crawl",
+            "Several workers, on one or more machines, crawl a shard of the"
+            " domain each, sharing a store. Once all have finished, a merge"
+            " run computes findings of the whole domain."
+        )
+        distributed.add_argument(
+            "--shared",
+            dest="shared_store",
+            metavar="STORE",
+            help=(
+                "Store shared by the workers, an SQLite file or a"
+                " sqlite:///path URL."
+            )
+        )
+        role = distributed.add_mutually_exclusive_group()
+        role.add_argument(
+            "--shard",
+            metavar="I/N",
+            help=(
+                "Run as worker crawling shard I of N, counted from 0. Every"
+                " worker must use the same domain, checks and N. A failed"
+                " worker can be run again."
+            )
+        )
+        role.add_argument(
+            "--merge",
+            action="store_true",
+            help=(
+                "Report findings of the crawl in the shared store, once all"
+                " its workers have finished, without crawling."
+            )
+        )
+        group = self.parser.add_argument_group(
+            "checks",
+            "At least one check is required. Multiple checks are run during"
+            " a single crawl of the domain."
+        )
         group.add_argument(
             "-o",
             "--orphan",
@@ -63,7 +308,177 @@ class SeoSpy():
             action="store_true",
             help="Run canonical links check"
         )
-        return self.parser.parse_args()
+        group.add_argument(
+            "-l",
+            "--link-status",
+            action="store_true",
+            help=(
+                "Run link status check, probing every internal link target"
+                " once for broken links and redirects"
+            )
+        )
+        group.add_argument(
+            "-u",
+            "--duplicates",
+            action="store_true",
+            help=(
+                "Run duplicate content check, reporting clusters of URLs"
+                " serving identical HTML"
+            )
+        )
+        args = self.parser.parse_args()
+        if not (
+            args.orphan or args.canonical or args.link_status or
+            args.duplicates
+        ):
+            self.parser.error(
+                "at least one of the arguments -o/--orphan -c/--canonical"
+                " -l/--link-status -u/--duplicates is required"
+            )
+        if (
+            args.url_filter_error_rate is not None and
+            not 0 < args.url_filter_error_rate < 1
+        ):
+            self.parser.error(
+                "argument --url-filter-error-rate: must be between 0 and 1"
+            )
+        if args.domain and not (
+            args.domain.startswith("https://") or
+            args.domain.startswith("http://")
+        ):
+            self.parser.error(
+                "Domain URL must start with https:// or http://:"
+                f" {args.domain}"
+            )
+        if args.domains_file and args.state_file:
+            self.parser.error(
+                "argument --state: not allowed with argument -D/--domains-file"
+            )
+        if args.domains_file and args.checkpoint_file:
+            self.parser.error(
+                "argument --checkpoint: not allowed with argument"
+                " -D/--domains-file"
+            )
+        if args.resume and not args.checkpoint_file:
+            self.parser.error("argument --resume: requires --checkpoint")
+        if args.max_pages is not None and args.max_pages < 1:
+            self.parser.error("argument --max-pages: must be at least 1")
+        if args.max_time is not None and args.max_time <= 0:
+            self.parser.error("argument --max-time: must be positive")
+        for option, value in (
+            ("--max-pages", args.max_pages),
+            ("--max-time", args.max_time),
+            ("--rank-by-sitemap", args.rank_by_sitemap),
+        ):
+            if value and not args.no_sitemap:
+                self.parser.error(f"argument {option}: requires -n")
+            if value and args.offline:
+                self.parser.error(
+                    f"argument {option}: not allowed with argument --offline"
+                )
+        if args.backend == ASYNCIO:
+            for option, value in (
+                ("-D/--domains-file", args.domains_file),
+                ("--state", args.state_file),
+                ("--checkpoint", args.checkpoint_file),
+                ("--cache-dir", args.cache_dir),
+                ("--parse-workers", args.parse_workers),
+                ("--offline", args.offline),
+            ):
+                if value:
+                    self.parser.error(
+                        f"argument --backend asyncio: not allowed with"
+                        f" argument {option}"
+                    )
+        if args.shard or args.merge:
+            role = "--shard" if args.shard else "--merge"
+            if not args.shared_store:
+                self.parser.error(f"argument {role}: requires --shared")
+            for option, value in (
+                ("-D/--domains-file", args.domains_file),
+                ("--state", args.state_file),
+                ("--checkpoint", args.checkpoint_file),
+                ("--offline", args.offline),
+                ("--max-pages", args.max_pages),
+                ("--max-time", args.max_time),
+                ("--backend asyncio", args.backend == ASYNCIO),
+                ("--findings", args.shard and args.findings_file),
+            ):
+                if value:
+                    self.parser.error(
+                        f"argument {role}: not allowed with argument {option}"
+                    )
+        elif args.shared_store:
+            self.parser.error("argument --shared: requires --shard or --merge")
+        if args.shard:
+            from distributed import parse_shard
+
+            try:
+                parse_shard(args.shard)
+            except ValueError as error:
+                self.parser.error(f"argument --shard: {error}")
+        if args.offline:
+            for option, value in (
+                ("-D/--domains-file", args.domains_file),
+                ("--state", args.state_file),
+                ("--checkpoint", args.checkpoint_file),
+                ("--cache-dir", args.cache_dir),
+            ):
+                if value:
+                    self.parser.error(
+                        f"argument --offline: not allowed with argument"
+                        f" {option}"
+                    )
+            if not os.path.exists(args.offline):
+                self.parser.error(
+                    f"argument --offline: no such file or directory:"
+                    f" {args.offline}"
+                )
+            if not (
+                os.path.isdir(args.offline) or
+                args.offline.endswith(".warc") or
+                args.offline.endswith(".warc.gz")
+            ):
+                self.parser.error(
+                    "argument --offline: must be a directory or a .warc or"
+                    f" .warc.gz file: {args.offline}"
+                )
+        return args
+
+    def read_domains(self, domains_file):
+        """
+        Read URLs of tested domains.
+
+        Parameters:
+            self (object): The instance of the class containing this method.
+            domains_file (str): Path of the file with one domain per line or
+                                '-' for standard input. Empty lines and lines
+                                starting with '#' are skipped.
+
+        Returns:
+            list: URLs of the domains, without trailing slashes.
+        """
+        if domains_file == "-":
+            lines = sys.stdin.read().splitlines()
+        else:
+            with open(domains_file) as domains:
+                lines = domains.read().splitlines()
+        domains = []
+        for line in lines:
+            domain = line.strip()
+            if not domain or domain.startswith("#"):
+                continue
+            if not (
+                domain.startswith("https://") or
+                domain.startswith("http://")
+            ):
+                self.parser.error(
+                    f"Domain URL must start with https:// or http://: {domain}"
+                )
+            domains.append(domain.rstrip("/"))
+        if not domains:
+            self.parser.error(f"No domains found in {domains_file}")
+        return domains
 
     def check_connection(self, crawler):
         """
@@ -82,57 +497,517 @@ class SeoSpy():
         connection_issue = crawler.stats.get_value("custom/connection_issue")
 
         if connection_issue:
-            print("================================================")
-            print("Connection Issue.")
-            print("================================================")
-            print("No sites visited. Check the connection to the domain.")
+            self.print_connection_issue()
             return STATUS_ERR
         else:
             return STATUS_OK
 
-    def orphan_pages(self, domain, no_sitemap=False):
+    def print_connection_issue(self):
         """
-        Find orphan pages on the given domain.
+        Print that no pages of the domain were visited.
+        """
+        print("================================================")
+        print("Connection Issue.")
+        print("================================================")
+        print("No sites visited. Check the connection to the domain.")
+
+    def get_settings(self):
+        """
+        Get Scrapy settings of the crawl.
 
         Parameters:
             self (object): The instance of the class containing this method.
-            domain (str): The domain name to be scanned for orphan pages.
-            no_sitemap (bool): Do not use the sitemap to gather urls
 
         Returns:
-            int:
-                - 0 (STATUS_OK): If no orphan pages were found on the domain.
-                - 1 (STATUS_ERR): If there was a connection issue.
-                - 2 (STATUS_FAILURE): If orphan pages were found on the domain.
+            Settings (object): Project settings with SEO Spy options applied.
         """
-        status: int
+        from scrapy.utils.project import get_project_settings
+
         settings = get_project_settings()
-        process = CrawlerProcess(settings=settings)
-        if no_sitemap:
-            process.crawl(OrphanPagesSpiderNoSitemap, domain=domain)
-        else:
-            process.crawl(OrphanPagesSpider, domain=domain)
+        middlewares = settings.getdict("DOWNLOADER_MIDDLEWARES")
+        middlewares["concurrency.AdaptiveConcurrencyMiddleware"] = 950
+        settings.set("DOWNLOADER_MIDDLEWARES", middlewares)
+        if self.profile:
+            settings.setdict(PROFILES[self.profile])
+        if self.findings_file:
+            settings.set(
+                "ITEM_PIPELINES", {"pipelines.FindingsPipeline": 300}
+            )
+            settings.set(
+                "SEO_SPY_FINDINGS_FILE", os.path.abspath(self.findings_file)
+            )
+        if self.link_extractor:
+            settings.set("SEO_SPY_LINK_EXTRACTOR", self.link_extractor)
+        if self.parse_workers:
+            settings.set("SEO_SPY_PARSE_WORKERS", self.parse_workers)
+        if self.checkpoint_interval:
+            settings.set(
+                "SEO_SPY_CHECKPOINT_INTERVAL", self.checkpoint_interval
+            )
+        if self.url_filter_error_rate:
+            settings.set(
+                "SEO_SPY_URL_FILTER_ERROR_RATE", self.url_filter_error_rate
+            )
+        if self.url_filter_dir:
+            settings.set(
+                "SEO_SPY_URL_FILTER_DIR", os.path.abspath(self.url_filter_dir)
+            )
+        if self.max_pages:
+            settings.set("SEO_SPY_MAX_PAGES", self.max_pages)
+        if self.max_time:
+            settings.set("SEO_SPY_MAX_TIME", self.max_time)
+        if self.rank_by_sitemap:
+            settings.set("SEO_SPY_FRONTIER_SITEMAP", True)
+        if self.domain_concurrency:
+            settings.set(
+                "CONCURRENT_REQUESTS_PER_DOMAIN", self.domain_concurrency
+            )
+            settings.set("SEO_SPY_ADAPTIVE_CONCURRENCY", False)
+        if self.cache_dir:
+            settings.set("HTTPCACHE_ENABLED", True)
+            settings.set("HTTPCACHE_DIR", os.path.abspath(self.cache_dir))
+            settings.set("HTTPCACHE_POLICY", "crawl_cache.AuditCachePolicy")
+            settings.set(
+                "HTTPCACHE_STORAGE",
+                "scrapy.extensions.httpcache.FilesystemCacheStorage"
+            )
+        return settings
+
+    def crawl(self, spider_cls, domain, **kwargs):
+        """
+        Crawl the domain with the given spider.
+
+        Parameters:
+            self (object): The instance of the class containing this method.
+            spider_cls (class): The spider used to crawl the domain.
+            domain (str): The domain name to be crawled.
+            kwargs (dict): Additional spider arguments.
+
+        Returns:
+            Crawler (object): The crawler that finished the crawl.
+        """
+        if self.state_file:
+            kwargs["state_file"] = self.state_file
+        if self.checkpoint_file:
+            kwargs["checkpoint_file"] = self.checkpoint_file
+            kwargs["resume"] = self.resume
+        if self.shard:
+            kwargs["shared_store"] = self.shared_store
+            kwargs["shard"] = self.shard
+        if self.offline:
+            from offline import audit_offline
+
+            start = time.perf_counter()
+            crawler = audit_offline(
+                spider_cls, domain, self.offline, self.get_settings(),
+                self.parse_workers or 0, **kwargs
+            )
+            self.crawl_time = time.perf_counter() - start
+            return crawler
+        if self.backend == ASYNCIO:
+            from async_backend import crawl_async
+
+            start = time.perf_counter()
+            crawler = crawl_async(
+                spider_cls, domain, self.get_settings(), **kwargs
+            )
+            self.crawl_time = time.perf_counter() - start
+            return crawler
+        from scrapy.crawler import CrawlerProcess
+
+        start = time.perf_counter()
+        process = CrawlerProcess(settings=self.get_settings())
+        process.crawl(spider_cls, domain=domain, **kwargs)
         crawler = list(process.crawlers)[0]
         process.start()
+        self.crawl_time = time.perf_counter() - start
+        return crawler
 
-        status = self.check_connection(crawler)
-        if status is not STATUS_OK:
-            return STATUS_ERR
+    def iter_findings(self, crawler, check_name):
+        """
+        Iterate over URLs of pages that failed a check.
+
+        Parameters:
+            self (object): The instance of the class containing this method.
+            crawler (object): The crawler that ran the check.
+            check_name (str): Name of the check.
+
+        Returns:
+            iterator: URLs kept by the spider or, if findings were
+                      streamed, read back from the findings file.
+        """
+        if not self.findings_file:
+            yield from crawler.spider.findings[check_name]
+            return
+        domain = crawler.spider.domain
+        with open(self.findings_file, encoding="utf-8") as findings:
+            for line in findings:
+                finding = json.loads(line)
+                if (
+                    finding["domain"] == domain and
+                    finding["check"] == check_name
+                ):
+                    yield finding["url"]
+
+    def report_check(self, crawler, check_name):
+        """
+        Print results of a single check.
 
-        orphan_pages = crawler.stats.get_value("custom/orphan_pages")
-        if orphan_pages:
+        Parameters:
+            self (object): The instance of the class containing this method.
+            crawler (object): The crawler that ran the check.
+            check_name (str): Name of the check.
+
+        Returns:
+            int:
+                - 0 (STATUS_OK): If every page passed the check.
+                - 2 (STATUS_FAILURE): If some pages failed the check.
+        """
+        findings = None
+        if crawler.stats.get_value(f"custom/findings/{check_name}"):
+            findings = self.iter_findings(crawler, check_name)
+        return self.print_check(check_name, findings)
+
+    def print_check(self, check_name, findings):
+        """
+        Print results of a single check.
+
+        Parameters:
+            self (object): The instance of the class containing this method.
+            check_name (str): Name of the check.
+            findings (iterable): URLs of pages that failed the check, None or
+                                 empty if every page passed.
+
+        Returns:
+            int:
+                - 0 (STATUS_OK): If every page passed the check.
+                - 2 (STATUS_FAILURE): If some pages failed the check.
+        """
+        check = CHECKS[check_name]
+        if findings:
             print("================================================")
-            print("Orphan pages found:")
+            print(check.failure_message)
             print("================================================")
-            for page in orphan_pages:
+            for page in findings:
                 print(page)
             return STATUS_FAILURE
         else:
             print("================================================")
-            print("Orphan pages not found.")
+            print(check.success_message)
             print("================================================")
             return STATUS_OK
 
+    def report(self, crawler, check_names):
+        """
+        Print results of the given checks.
+
+        Parameters:
+            self (object): The instance of the class containing this method.
+            crawler (object): The crawler that ran the checks.
+            check_names (list): Names of the checks.
+
+        Returns:
+            int:
+                - 0 (STATUS_OK): If every check passed.
+                - 1 (STATUS_ERR): If there was a connection issue.
+                - 2 (STATUS_FAILURE): If any check failed.
+        """
+        status = self.check_connection(crawler)
+        if status is not STATUS_OK:
+            self.write_report(crawler, {})
+            return STATUS_ERR
+
+        statuses = {}
+        for name in check_names:
+            statuses[name] = self.report_check(crawler, name)
+        self.print_coverage(crawler)
+        self.write_report(crawler, statuses)
+        return self.print_summary(statuses)
+
+    def print_coverage(self, crawler):
+        """
+        Print coverage of the crawl if it was stopped by its budget, as
+        results of the checks are then based on part of the site only.
+
+        Parameters:
+            self (object): The instance of the class containing this method.
+            crawler (object): The crawler that ran the checks.
+        """
+        stats = crawler.stats
+        budget = stats.get_value("custom/frontier/budget_exhausted")
+        if not budget:
+            return
+        crawled = stats.get_value("custom/frontier/crawled")
+        pending = stats.get_value("custom/frontier/pending")
+        coverage = stats.get_value("custom/frontier/coverage")
+        print("================================================")
+        print(f"Crawl budget exhausted ({budget}):")
+        print("================================================")
+        print(
+            f"{crawled} of {crawled + pending} discovered pages crawled"
+            f" ({coverage:.1%})."
+        )
+        sitemap_coverage = stats.get_value(
+            "custom/frontier/sitemap_coverage"
+        )
+        if sitemap_coverage is not None:
+            print(f"{sitemap_coverage:.1%} of sitemap pages crawled.")
+
+    def print_summary(self, statuses):
+        """
+        Print status of every check if more than one check was run.
+
+        Parameters:
+            self (object): The instance of the class containing this method.
+            statuses (dict): Status of every check, by check name.
+
+        Returns:
+            int:
+                - 0 (STATUS_OK): If every check passed.
+                - 2 (STATUS_FAILURE): If any check failed.
+        """
+        if len(statuses) > 1:
+            print("================================================")
+            print("Check results:")
+            print("================================================")
+            for name, check_status in statuses.items():
+                result = "FAILURE" if check_status else "OK"
+                print(f"{name}: {result}")
+        return max(statuses.values())
+
+    def write_report(self, crawler, statuses):
+        """
+        Add report of the crawl and write all reports to the JSON file if it
+        was requested.
+
+        Parameters:
+            self (object): The instance of the class containing this method.
+            crawler (object): The crawler that ran the checks.
+            statuses (dict): Status of every check, by check name. Empty if
+                             there was a connection issue.
+        """
+        if not self.report_file:
+            return
+        from concurrency import STATS_KEY as CONCURRENCY_STATS_KEY
+        from frontier import STATS_PREFIX as FRONTIER_STATS_PREFIX
+
+        checks = {}
+        for name, status in statuses.items():
+            checks[name] = {
+                "status": status,
+                "findings": list(self.iter_findings(crawler, name)),
+            }
+        self.reports.append({
+            "domain": crawler.spider.domain,
+            "connection_issue": bool(
+                crawler.stats.get_value("custom/connection_issue")
+            ),
+            "checks": checks,
+            "crawl_time": self.crawl_time,
+            "performance": read_stats(crawler.stats),
+            "concurrency": (
+                crawler.stats.get_value(CONCURRENCY_STATS_KEY) or {}
+            ),
+            "frontier": {
+                key[len(FRONTIER_STATS_PREFIX):]: value
+                for key, value in crawler.stats.get_stats().items()
+                if key.startswith(FRONTIER_STATS_PREFIX)
+            },
+        })
+        if len(self.reports) == 1:
+            report = self.reports[0]
+        else:
+            report = {"domains": self.reports}
+        with open(self.report_file, "w") as report_file:
+            json.dump(report, report_file, indent=2)
+
+    def run_checks(self, domain, check_names, no_sitemap=False):
+        """
+        Crawl the domain once and run all given checks on every page.
+
+        Parameters:
+            self (object): The instance of the class containing this method.
+            domain (str): The domain name to be scanned.
+            check_names (list): Names of the checks to run.
+            no_sitemap (bool): Do not use the sitemap to gather urls
+
+        Returns:
+            int:
+                - 0 (STATUS_OK): If every check passed.
+                - 1 (STATUS_ERR): If there was a connection issue.
+                - 2 (STATUS_FAILURE): If any check failed.
+        """
+        from spiders.audit_spider import AuditSpider, AuditSpiderNoSitemap
+
+        if no_sitemap:
+            spider_cls = AuditSpiderNoSitemap
+        else:
+            spider_cls = AuditSpider
+        crawler = self.crawl(spider_cls, domain, checks=check_names)
+        return self.report(crawler, check_names)
+
+    def run_shard(self, domain, check_names, no_sitemap=False):
+        """
+        Crawl shard of the domain as a worker of a distributed crawl.
+
+        Parameters:
+            self (object): The instance of the class containing this method.
+            domain (str): The domain name to be scanned.
+            check_names (list): Names of the checks to run.
+            no_sitemap (bool): Do not use the sitemap to gather urls
+
+        Returns:
+            int:
+                - 0 (STATUS_OK): If the shard was crawled.
+                - 1 (STATUS_ERR): If the crawl of the shard was interrupted.
+        """
+        from distributed import open_store, parse_shard
+
+        index, shards = parse_shard(self.shard)
+        store = open_store(self.shared_store)
+        try:
+            store.validate(domain, shards, check_names, index)
+        except ValueError as error:
+            print(
+                f"Cannot crawl shard {self.shard}: {error}", file=sys.stderr
+            )
+            return STATUS_ERR
+        finally:
+            store.close()
+        from spiders.audit_spider import AuditSpider, AuditSpiderNoSitemap
+
+        if no_sitemap:
+            spider_cls = AuditSpiderNoSitemap
+        else:
+            spider_cls = AuditSpider
+        crawler = self.crawl(spider_cls, domain, checks=check_names)
+        self.write_report(crawler, {})
+        reason = crawler.stats.get_value("finish_reason")
+        pages = crawler.stats.get_value("custom/shard/stored_pages", 0)
+        print("================================================")
+        print(f"Shard {self.shard}:")
+        print("================================================")
+        print(f"{pages} pages crawled and stored in {self.shared_store}.")
+        if reason != "finished":
+            print(f"Crawl of the shard did not finish: {reason}")
+            return STATUS_ERR
+        return STATUS_OK
+
+    def merge(self, domain, check_names):
+        """
+        Run the checks on pages stored by all workers of a distributed crawl.
+
+        Parameters:
+            self (object): The instance of the class containing this method.
+            domain (str): The domain name of the crawl.
+            check_names (list): Names of the checks to run.
+
+        Returns:
+            int:
+                - 0 (STATUS_OK): If every check passed.
+                - 1 (STATUS_ERR): If the crawl cannot be merged or there was
+                                  a connection issue.
+                - 2 (STATUS_FAILURE): If any check failed.
+        """
+        from distributed import merge_shards
+        from spiders.audit_spider import AuditSpider
+
+        start = time.perf_counter()
+        try:
+            crawler = merge_shards(
+                AuditSpider, domain, self.shared_store, self.get_settings(),
+                checks=check_names,
+            )
+        except ValueError as error:
+            print(
+                f"Cannot merge {self.shared_store}: {error}", file=sys.stderr
+            )
+            return STATUS_ERR
+        self.crawl_time = time.perf_counter() - start
+        return self.report(crawler, check_names)
+
+    def run_batch(self, domains, check_names, no_sitemap=False):
+        """
+        Audit many domains concurrently in a single crawler process.
+
+        Parameters:
+            self (object): The instance of the class containing this method.
+            domains (list): URLs of the domains to be scanned.
+            check_names (list): Names of the checks to run.
+            no_sitemap (bool): Do not use the sitemap to gather urls
+
+        Returns:
+            int:
+                - 0 (STATUS_OK): If every check passed on every domain.
+                - 1 (STATUS_ERR): If there was a connection issue with any
+                                  domain.
+                - 2 (STATUS_FAILURE): If any check failed on any domain and
+                                      there were no connection issues.
+        """
+        from spiders.audit_spider import AuditSpider, AuditSpiderNoSitemap
+
+        if no_sitemap:
+            spider_cls = AuditSpiderNoSitemap
+        else:
+            spider_cls = AuditSpider
+        from scrapy.crawler import CrawlerProcess
+
+        start = time.perf_counter()
+        process = CrawlerProcess(settings=self.get_settings())
+        crawlers = []
+        for domain in domains:
+            crawler = process.create_crawler(spider_cls)
+            process.crawl(crawler, domain=domain, checks=check_names)
+            crawlers.append((domain, crawler))
+        process.start()
+        self.crawl_time = time.perf_counter() - start
+
+        statuses = {}
+        for domain, crawler in crawlers:
+            print("================================================")
+            print(f"Domain: {domain}")
+            print("================================================")
+            statuses[domain] = self.report(crawler, check_names)
+        print("================================================")
+        print("Domain results:")
+        print("================================================")
+        results = {
+            STATUS_OK: "OK",
+            STATUS_ERR: "ERROR",
+            STATUS_FAILURE: "FAILURE",
+        }
+        for domain, status in statuses.items():
+            print(f"{domain}: {results[status]}")
+        if STATUS_ERR in statuses.values():
+            return STATUS_ERR
+        return max(statuses.values())
+
+    def orphan_pages(self, domain, no_sitemap=False):
+        """
+        Find orphan pages on the given domain.
+
+        Parameters:
+            self (object): The instance of the class containing this method.
+            domain (str): The domain name to be scanned for orphan pages.
+            no_sitemap (bool): Do not use the sitemap to gather urls
+
+        Returns:
+            int:
+                - 0 (STATUS_OK): If no orphan pages were found on the domain.
+                - 1 (STATUS_ERR): If there was a connection issue.
+                - 2 (STATUS_FAILURE): If orphan pages were found on the domain.
+        """
+        from spiders.orphan_pages_spider import (
+            OrphanPagesSpider,
+            OrphanPagesSpiderNoSitemap,
+        )
+
+        if no_sitemap:
+            crawler = self.crawl(OrphanPagesSpiderNoSitemap, domain)
+        else:
+            crawler = self.crawl(OrphanPagesSpider, domain)
+        return self.report(crawler, [OrphanPagesCheck.name])
+
     def canonical_links(self, domain, no_sitemap=False):
         """
         Find pages with no canonical link.
@@ -150,33 +1025,16 @@ class SeoSpy():
                 - 2 (STATUS_FAILURE): If pages with no canonical link were
                                       found on the domain.
         """
-        status: int
-        settings = get_project_settings()
-        process = CrawlerProcess(settings=settings)
-        if no_sitemap:
-            process.crawl(CanonicalLinkSpiderNoSitemap, domain=domain)
-        else:
-            process.crawl(CanonicalLinkSpider, domain=domain)
-        crawler = list(process.crawlers)[0]
-        process.start()
-
-        status = self.check_connection(crawler)
-        if status is not STATUS_OK:
-            return STATUS_ERR
+        from spiders.canonical_link_spider import (
+            CanonicalLinkSpider,
+            CanonicalLinkSpiderNoSitemap,
+        )
 
-        canonical_pages = crawler.stats.get_value("custom/canonical")
-        if canonical_pages:
-            print("================================================")
-            print("Pages with no canonical link found:")
-            print("================================================")
-            for page in canonical_pages:
-                print(page)
-            return STATUS_FAILURE
+        if no_sitemap:
+            crawler = self.crawl(CanonicalLinkSpiderNoSitemap, domain)
         else:
-            print("================================================")
-            print("Every page has canonical link.")
-            print("================================================")
-            return STATUS_OK
+            crawler = self.crawl(CanonicalLinkSpider, domain)
+        return self.report(crawler, [CanonicalLinkCheck.name])
 
 
 def main():
@@ -199,17 +1057,60 @@ def main():
 
     spy = SeoSpy()
     args = spy.parse_program_input()
+    spy.cache_dir = args.cache_dir
+    spy.state_file = args.state_file
+    spy.checkpoint_file = args.checkpoint_file
+    spy.resume = args.resume
+    spy.checkpoint_interval = args.checkpoint_interval
+    spy.report_file = args.report_file
+    spy.findings_file = args.findings_file
+    if spy.findings_file:
+        # Spiders append their findings, so results of earlier runs are
+        # removed first.
+        open(spy.findings_file, "w").close()
+    spy.link_extractor = args.link_extractor
+    spy.domain_concurrency = args.domain_concurrency
+    spy.profile = args.profile
+    spy.parse_workers = args.parse_workers
+    spy.url_filter_error_rate = args.url_filter_error_rate
+    spy.url_filter_dir = args.url_filter_dir
+    spy.max_pages = args.max_pages
+    spy.max_time = args.max_time
+    spy.rank_by_sitemap = args.rank_by_sitemap
+    spy.offline = args.offline
+    spy.backend = args.backend
+    spy.shared_store = args.shared_store
+    spy.shard = args.shard
+    check_names = []
+    if args.orphan:
+        check_names.append(OrphanPagesCheck.name)
+    if args.canonical:
+        check_names.append(CanonicalLinkCheck.name)
+    if args.link_status:
+        check_names.append(LinkStatusCheck.name)
+    if args.duplicates:
+        check_names.append(DuplicateContentCheck.name)
+    if args.domains_file:
+        domains = spy.read_domains(args.domains_file)
+        status = spy.run_batch(domains, check_names, args.no_sitemap)
+        exit(status)
     if args.domain.endswith("/"):
         args.domain = args.domain[:-1]
-    if args.orphan:
+    if args.shard:
+        status = spy.run_shard(args.domain, check_names, args.no_sitemap)
+        exit(status)
+    if args.merge:
+        status = spy.merge(args.domain, check_names)
+        exit(status)
+    if check_names == [OrphanPagesCheck.name]:
         status = spy.orphan_pages(args.domain, args.no_sitemap)
         exit(status)
-    elif args.canonical:
+    elif check_names == [CanonicalLinkCheck.name]:
         status = spy.canonical_links(args.domain, args.no_sitemap)
         exit(status)
     else:
-        spy.parser.print_help()
-    exit(0)
+        status = spy.run_checks(args.domain, check_names, args.no_sitemap)
+        exit(status)
 
 
 if __name__ == "__main__":
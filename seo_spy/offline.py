@@ -0,0 +1,431 @@
+import gzip
+import logging
+import mmap
+import multiprocessing
+import os
+import zlib
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+from urllib.parse import unquote, urldefrag, urlparse
+
+from parse_pool import extract_page
+from sitemap import SITEMAP_INDEX, URLSET, SitemapReader
+from standalone import StandaloneAudit, create_crawler
+
+logger = logging.getLogger(__name__)
+
+HTML_SUFFIXES = (".html", ".htm")
+# Pages parsed by the worker processes in one batch.
+BATCH_SIZE = 256
+
+
+class BuildDirectory:
+    """
+    Static site build served from a local directory, like a static HTTP
+    server would: `/a/` is `a/index.html`, `/a` redirects to `/a/` if `a` is
+    a directory. If the domain has a path, e.g. `https://host/docs`, the
+    directory is served under it: `/docs/a/` is `a/index.html`.
+    """
+
+    def __init__(self, root, domain):
+        self.root = os.path.realpath(root)
+        self.domain = domain
+        self._prefix = unquote(urlparse(domain).path).rstrip("/")
+        # Files are read as they are, there is nothing to decode.
+        self.undecodable = 0
+
+    def _path(self, url):
+        if not url.startswith(self.domain):
+            return None
+        path = unquote(urlparse(url).path)
+        prefix = self._prefix
+        if path != prefix and not path.startswith(prefix + "/"):
+            return None
+        path = path[len(prefix):]
+        path = os.path.realpath(os.path.join(self.root, path.lstrip("/")))
+        if path != self.root and not path.startswith(self.root + os.sep):
+            return None
+        return path
+
+    def status(self, url):
+        """
+        Return HTTP status of the URL and location it redirects to, if any.
+        """
+        path = self._path(url)
+        if path is None:
+            return 404, None
+        if os.path.isdir(path):
+            if not urlparse(url).path.endswith("/"):
+                return 301, urldefrag(url)[0] + "/"
+            path = os.path.join(path, "index.html")
+        return (200 if os.path.isfile(path) else 404), None
+
+    def get(self, url):
+        """
+        Return body of the HTML page at the URL, or None if there is none.
+        """
+        path = self._path(url)
+        if path is None:
+            return None
+        if os.path.isdir(path):
+            path = os.path.join(path, "index.html")
+        if not path.endswith(HTML_SUFFIXES) or not os.path.isfile(path):
+            return None
+        with open(path, "rb") as html:
+            return html.read()
+
+    def sitemap(self, url):
+        """
+        Return body of the sitemap at the URL, or None if it is missing.
+        """
+        path = self._path(url)
+        if path is None or not os.path.isfile(path):
+            return None
+        with open(path, "rb") as sitemap:
+            return sitemap.read()
+
+    def close(self):
+        pass
+
+
+class WarcArchive:
+    """
+    Responses of a crawl stored in a WARC file, optionally gzip compressed.
+
+    Only `response` records are used. Bodies of an uncompressed archive are
+    memory-mapped, so only offsets of the records are kept in memory.
+    Compressed archives are decompressed into memory once.
+
+    Payloads are stored as they were sent, so chunked transfer encoding and
+    gzip or deflate content encoding are decoded when a body is read.
+    Bodies which cannot be decoded are skipped like missing pages and
+    counted in `undecodable`.
+    """
+
+    def __init__(self, path, domain):
+        self.domain = domain
+        self.undecodable = 0
+        if path.endswith(".gz"):
+            with gzip.open(path, "rb") as archive:
+                self._data = archive.read()
+            self._file = None
+        else:
+            self._file = open(path, "rb")
+            self._data = mmap.mmap(
+                self._file.fileno(), 0, access=mmap.ACCESS_READ
+            )
+        # URL -> (status, location, content type, encodings, body start,
+        # body end).
+        self._records: dict = {}
+        self._index()
+
+    def _index(self):
+        data = self._data
+        offset = 0
+        while True:
+            start = data.find(b"WARC/", offset)
+            if start < 0:
+                break
+            end = data.find(b"\r\n\r\n", start)
+            if end < 0:
+                break
+            headers = _headers(data[start:end].split(b"\r\n")[1:])
+            block = end + 4
+            length = int(headers.get("content-length", 0))
+            offset = block + length
+            uri = headers.get("warc-target-uri", "").strip("<>")
+            if headers.get("warc-type") != "response" or not uri:
+                continue
+            self._add_response(urldefrag(uri)[0], block, offset)
+
+    def _add_response(self, url, start, end):
+        data = self._data
+        head_end = data.find(b"\r\n\r\n", start, end)
+        if head_end < 0:
+            return
+        lines = data[start:head_end].split(b"\r\n")
+        try:
+            status = int(lines[0].split()[1])
+        except (IndexError, ValueError):
+            return
+        headers = _headers(lines[1:])
+        # Encodings in the order they were applied.
+        encodings = tuple(
+            encoding.strip().lower()
+            for name in ("content-encoding", "transfer-encoding")
+            for encoding in headers.get(name, "").split(",")
+            if encoding.strip()
+        )
+        self._records[url] = (
+            status,
+            headers.get("location"),
+            headers.get("content-type", ""),
+            encodings,
+            head_end + 4,
+            end,
+        )
+
+    def _body(self, url, record):
+        body = bytes(self._data[record[4]:record[5]])
+        try:
+            for encoding in reversed(record[3]):
+                body = _decode(body, encoding)
+        except (OSError, ValueError, EOFError, zlib.error) as e:
+            self.undecodable += 1
+            logger.warning(f"Cannot decode body of {url}: {e}")
+            return None
+        return body
+
+    def status(self, url):
+        record = self._records.get(urldefrag(url)[0])
+        if record is None:
+            return 404, None
+        return record[0], record[1]
+
+    def get(self, url):
+        record = self._records.get(urldefrag(url)[0])
+        if record is None or record[0] != 200 or "html" not in record[2]:
+            return None
+        return self._body(url, record)
+
+    def sitemap(self, url):
+        record = self._records.get(url)
+        if record is None or record[0] != 200:
+            return None
+        return self._body(url, record)
+
+    def close(self):
+        if self._file is not None:
+            self._data.close()
+            self._file.close()
+
+
+def _headers(lines):
+    headers = {}
+    for line in lines:
+        name, _, value = line.decode("latin-1").partition(":")
+        headers[name.strip().lower()] = value.strip()
+    return headers
+
+
+def _decode(body, encoding):
+    """
+    Undo single transfer or content encoding of a body.
+    """
+    if encoding == "chunked":
+        return _dechunk(body)
+    if encoding in ("gzip", "x-gzip"):
+        return gzip.decompress(body)
+    if encoding == "deflate":
+        # Servers send deflate both with and without the zlib wrapper.
+        try:
+            return zlib.decompress(body)
+        except zlib.error:
+            return zlib.decompress(body, -zlib.MAX_WBITS)
+    if encoding == "identity":
+        return body
+    raise ValueError(f"unsupported encoding {encoding!r}")
+
+
+def _dechunk(body):
+    """
+    Decode body sent with chunked transfer encoding.
+    """
+    chunks = []
+    offset = 0
+    while True:
+        end = body.index(b"\r\n", offset)
+        size = int(body[offset:end].split(b";", 1)[0], 16)
+        if size == 0:
+            return b"".join(chunks)
+        start = end + 2
+        chunks.append(body[start:start + size])
+        offset = start + size + 2
+
+
+def open_source(path, domain):
+    """
+    Open build directory or WARC archive the domain is audited from.
+
+    Parameters:
+        path (str): Path of the directory or of a `.warc` or `.warc.gz`
+                    file.
+        domain (str): URL the site is published at.
+
+    Returns:
+        object: `BuildDirectory` or `WarcArchive`.
+    """
+    if os.path.isdir(path):
+        return BuildDirectory(path, domain)
+    if path.endswith(".warc") or path.endswith(".warc.gz"):
+        return WarcArchive(path, domain)
+    raise ValueError(
+        f"Offline source must be a directory or a WARC file: {path}"
+    )
+
+
+class OfflineAudit(StandaloneAudit):
+    """
+    Run checks of a spider on pages read from a build directory or a WARC
+    archive instead of downloading them.
+
+    The spider is bound to a Scrapy crawler, so checks, stats and reports
+    work as in a regular crawl, but no engine or reactor is started. Pages
+    are taken from the sitemap of the source or, for spiders not using the
+    sitemap, found by following internal links from the root page. With
+    `workers`, pages are parsed in batches by worker processes. Requests of
+    the checks, e.g. link probes, are answered from the source.
+    """
+
+    def __init__(self, crawler, source, workers=0):
+        super().__init__(crawler)
+        self.source = source
+        self._executor = None
+        if workers > 0:
+            self._executor = ProcessPoolExecutor(
+                max_workers=workers,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+
+    def run(self, use_sitemap):
+        """
+        Audit all pages and close the spider.
+        """
+        try:
+            if use_sitemap:
+                self._audit_sitemap()
+            else:
+                self._audit_links()
+        finally:
+            if self._executor is not None:
+                self._executor.shutdown(cancel_futures=True)
+            if self.source.undecodable:
+                self.crawler.stats.set_value(
+                    "custom/offline/undecodable", self.source.undecodable
+                )
+            self.close()
+            self.source.close()
+
+    def _audit_sitemap(self):
+        urls = []
+        for url in self._sitemap_urls(self.spider.domain + "/sitemap.xml"):
+            if url not in self.spider._visited_pages:
+                urls.append(url)
+            if len(urls) >= BATCH_SIZE:
+                self._process(urls)
+                urls = []
+        self._process(urls)
+
+    def _sitemap_urls(self, url):
+        body = self.source.sitemap(url)
+        if body is None:
+            logger.warning(f"Sitemap not found: {url}")
+            return
+        reader = SitemapReader()
+        for entry in reader.iter_entries(body):
+            if reader.type == SITEMAP_INDEX:
+                yield from self._sitemap_urls(entry["loc"])
+            elif reader.type == URLSET:
+                yield entry["loc"]
+
+    def _audit_links(self):
+        url_filter = self.spider.url_filter
+        # The root is looked up as the crawler requests it, e.g. with the
+        # trailing slash the links to it have.
+        domain = self.spider.domain
+        root = self.spider.normalizer.normalize(None, domain) or domain
+        frontier = [root]
+        url_filter.add(root)
+        while frontier:
+            links = []
+            for start in range(0, len(frontier), BATCH_SIZE):
+                batch = frontier[start:start + BATCH_SIZE]
+                for page in self._process(batch):
+                    links.extend(
+                        link for link in page.links if url_filter.add(link)
+                    )
+            frontier = links
+
+    def _process(self, urls):
+        from scrapy.http import HtmlResponse, Request
+
+        bodies = [self.source.get(url) for url in urls]
+        found = [(u, b) for u, b in zip(urls, bodies) if b is not None]
+        missing = len(urls) - len(found)
+        if missing:
+            self.crawler.stats.inc_value("custom/offline/missing", missing)
+        extracted = repeat(None)
+        if self._executor is not None and found:
+            hrefs = any(
+                "hrefs" in check.requires for check in self.spider.checks
+            )
+            extracted = self._executor.map(
+                extract_page,
+                [url for url, _ in found],
+                [body for _, body in found],
+                repeat(None),
+                repeat(self.spider.domain),
+                repeat(self.spider.link_extractor.mode),
+                repeat(hrefs),
+                chunksize=max(1, len(found) // 32),
+            )
+        pages = []
+        for (url, body), data in zip(found, extracted):
+            request = Request(url)
+            response = HtmlResponse(url=url, body=body, request=request)
+            # An error on one page does not stop the audit, as in a crawl.
+            try:
+                pages.append(self.spider.process_page(response, data))
+            except Exception as exc:
+                self._spider_error(request, exc)
+            self._handle(self.spider.pop_findings())
+            self._handle(self.spider.pop_requests())
+        return pages
+
+    def _handle(self, output):
+        from scrapy import Request
+        from scrapy.http import Response
+
+        for result in output:
+            if isinstance(result, Request):
+                status, location = self.source.status(result.url)
+                headers = {"Location": location} if location else {}
+                response = Response(
+                    result.url, status=status, headers=headers,
+                    request=result,
+                )
+                try:
+                    output = list(result.callback(response) or ())
+                except Exception as exc:
+                    self._spider_error(result, exc)
+                    continue
+                self._handle(output)
+            else:
+                self.process_item(result)
+
+
+def audit_offline(spider_cls, domain, path, settings, workers=0, **kwargs):
+    """
+    Audit the domain from a build directory or a WARC archive.
+
+    Parameters:
+        spider_cls (class): The spider whose checks are run.
+        domain (str): URL the site is published at.
+        path (str): Path of the build directory or of the WARC file.
+        settings (object): Scrapy settings of the audit.
+        workers (int): Number of worker processes parsing pages, pages are
+                       parsed in this process if 0.
+        kwargs (dict): Additional spider arguments.
+
+    Returns:
+        Crawler (object): The crawler the spider is bound to, with the
+                          results in its stats.
+    """
+    from scrapy.spiders import SitemapSpider
+
+    source = open_source(path, domain)
+    crawler = create_crawler(spider_cls, domain, settings, **kwargs)
+    OfflineAudit(crawler, source, workers).run(
+        use_sitemap=issubclass(spider_cls, SitemapSpider)
+    )
+    return crawler
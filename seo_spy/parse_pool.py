@@ -0,0 +1,120 @@
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+from twisted.internet.defer import Deferred, DeferredSemaphore
+from twisted.python.failure import Failure
+
+from extraction import LinkExtractor
+from url_normalizer import UrlNormalizer
+
+# Normalizers of worker processes, by domain, so their caches are reused
+# by all pages parsed by the worker.
+_normalizers: dict = {}
+
+
+def extract_page(url, body, encoding, domain, mode, hrefs=False):
+    """
+    Extract internal links and canonical links of a page.
+
+    Runs in a worker process, so only plain data is passed in and out.
+
+    Parameters:
+        url (str): URL of the page.
+        body (bytes): Body of the response.
+        encoding (str): Encoding of the response.
+        domain (str): Domain the page belongs to.
+        mode (str): Link extractor mode.
+        hrefs (bool): Also return the href values of anchors.
+
+    Returns:
+        dict: `links`, `canonical` and, if requested, `hrefs`, as returned
+              by `Page.extracted()`.
+    """
+    from scrapy.http import HtmlResponse
+
+    response = HtmlResponse(url=url, body=body, encoding=encoding)
+    extractor = LinkExtractor(mode)
+    extracted = extractor.extract(response, "hrefs")
+    if "canonical" not in extracted:
+        extracted.update(extractor.extract(response, "canonical"))
+    normalizer = _normalizers.get(domain)
+    if normalizer is None:
+        normalizer = _normalizers[domain] = UrlNormalizer(domain)
+    result = {
+        "links": normalizer.normalize_all(url, extracted["hrefs"]),
+        "canonical": extracted["canonical"],
+    }
+    if hrefs:
+        result["hrefs"] = extracted["hrefs"]
+    return result
+
+
+class ParsePool:
+    """
+    Pool of worker processes extracting links from downloaded pages.
+
+    At most `max_pending` pages are handed to the workers at once, the rest
+    wait in the reactor. Responses waiting for a worker count towards the
+    Scrapy scraper slot size (SCRAPER_SLOT_MAX_ACTIVE_SIZE), so when the
+    workers fall behind, the engine stops scheduling new downloads until
+    they catch up.
+    """
+
+    def __init__(self, workers, max_pending=None):
+        # Worker processes are spawned, not forked, so they do not inherit
+        # the reactor threads and their locks.
+        self._executor = ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=multiprocessing.get_context("spawn"),
+        )
+        self._semaphore = DeferredSemaphore(max_pending or workers * 2)
+
+    def extract(self, response, domain, mode, hrefs=False):
+        """
+        Extract data from the response in a worker process.
+
+        Parameters:
+            self (object): The instance of the class containing this method.
+            response (object): Response of the page.
+            domain (str): Domain the page belongs to.
+            mode (str): Link extractor mode.
+            hrefs (bool): Also return the href values of anchors.
+
+        Returns:
+            Deferred: Fired with the dict returned by `extract_page()`.
+        """
+        return self._semaphore.run(
+            self._submit,
+            response.url,
+            response.body,
+            response.encoding,
+            domain,
+            mode,
+            hrefs,
+        )
+
+    def close(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def _submit(self, *args):
+        from twisted.internet import reactor
+
+        deferred = Deferred()
+
+        def done(future):
+            # Called from a thread of the executor.
+            reactor.callFromThread(self._fire, deferred, future)
+
+        self._executor.submit(extract_page, *args).add_done_callback(done)
+        return deferred
+
+    @staticmethod
+    def _fire(deferred, future):
+        if future.cancelled():
+            deferred.cancel()
+            return
+        exception = future.exception()
+        if exception is not None:
+            deferred.errback(Failure(exception))
+        else:
+            deferred.callback(future.result())
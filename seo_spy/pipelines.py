@@ -3,11 +3,44 @@
 # Don't forget to add your pipeline to the ITEM_PIPELINES setting
 # See: https://docs.scrapy.org/en/latest/topics/item-pipeline.html
 
+import json
 
-# useful for handling different item types with a single interface
 from itemadapter import ItemAdapter
+from scrapy.exceptions import NotConfigured
 
 
-class SeoChecksPipeline:
+class FindingsPipeline:
+    """
+    Write findings to a JSON Lines file as soon as they are found.
+
+    Enabled with the SEO_SPY_FINDINGS_FILE setting. Every line is flushed
+    when written, so other tools can follow the file during the crawl.
+    Findings which need the whole crawl, like orphan pages, are written when
+    the spider closes. The file is opened for appending, so spiders of many
+    domains may share it.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.file = None
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        path = crawler.settings.get("SEO_SPY_FINDINGS_FILE")
+        if not path:
+            raise NotConfigured
+        return cls(path)
+
+    def open_spider(self, spider):
+        self.file = open(self.path, "a", encoding="utf-8")
+
+    def close_spider(self, spider):
+        for item in spider.finish_checks():
+            self.process_item(item, spider)
+        self.file.close()
+
     def process_item(self, item, spider):
+        line = json.dumps(ItemAdapter(item).asdict(), ensure_ascii=False)
+        self.file.write(line + "\n")
+        self.file.flush()
         return item
@@ -0,0 +1,50 @@
+"""
+Crawl profiles, sets of Scrapy settings tuned for different audit targets.
+
+local
+    Preview servers on the auditing machine. No delays, the adaptive
+    concurrency controller raises concurrency as long as the server keeps up.
+staging
+    Internal servers shared with others. Adaptive concurrency with a lower
+    limit and a stricter latency budget.
+public
+    Production sites. AutoThrottle keeps about two requests in flight per
+    domain, with delays following the latency of the server.
+"""
+
+LOCAL = "local"
+STAGING = "staging"
+PUBLIC = "public"
+
+PROFILES = {
+    LOCAL: {
+        "CONCURRENT_REQUESTS": 256,
+        "CONCURRENT_REQUESTS_PER_DOMAIN": 8,
+        "DOWNLOAD_DELAY": 0,
+        "AUTOTHROTTLE_ENABLED": False,
+        "SEO_SPY_ADAPTIVE_CONCURRENCY": True,
+        "SEO_SPY_CONCURRENCY_MAX": 128,
+        "SEO_SPY_CONCURRENCY_LATENCY_FACTOR": 2.0,
+        "SEO_SPY_CONCURRENCY_MAX_ERROR_RATE": 0.05,
+    },
+    STAGING: {
+        "CONCURRENT_REQUESTS": 64,
+        "CONCURRENT_REQUESTS_PER_DOMAIN": 4,
+        "DOWNLOAD_DELAY": 0,
+        "AUTOTHROTTLE_ENABLED": False,
+        "SEO_SPY_ADAPTIVE_CONCURRENCY": True,
+        "SEO_SPY_CONCURRENCY_MAX": 32,
+        "SEO_SPY_CONCURRENCY_LATENCY_FACTOR": 1.5,
+        "SEO_SPY_CONCURRENCY_MAX_ERROR_RATE": 0.02,
+    },
+    PUBLIC: {
+        "CONCURRENT_REQUESTS": 16,
+        "CONCURRENT_REQUESTS_PER_DOMAIN": 2,
+        "DOWNLOAD_DELAY": 0.5,
+        "AUTOTHROTTLE_ENABLED": True,
+        "AUTOTHROTTLE_START_DELAY": 1.0,
+        "AUTOTHROTTLE_MAX_DELAY": 30.0,
+        "AUTOTHROTTLE_TARGET_CONCURRENCY": 2.0,
+        "SEO_SPY_ADAPTIVE_CONCURRENCY": False,
+    },
+}
@@ -0,0 +1,127 @@
+import zlib
+
+import lxml.etree
+
+CHUNK_SIZE = 64 * 1024
+
+URLSET = "urlset"
+SITEMAP_INDEX = "sitemapindex"
+
+_GZIP_MAGIC_NUMBER = b"\x1f\x8b\x08"
+
+
+def _local_name(tag):
+    return tag.split("}", 1)[1] if "}" in tag else tag
+
+
+class SitemapReader:
+    """
+    Incremental parser of sitemaps and sitemap indexes.
+
+    Data is fed in chunks and entries are returned as soon as their closing
+    tag is parsed. Parsed elements are discarded right away, so memory used
+    by the parser does not depend on the number of entries in the sitemap.
+    Gzip compressed sitemaps are detected and decompressed on the fly.
+
+    Entries are dicts with the same keys as those produced by Scrapy's
+    `Sitemap` class, e.g. `loc` and `lastmod`, so they can be passed to
+    `SitemapSpider.sitemap_filter()`.
+    """
+
+    def __init__(self):
+        self.type = None
+        self._decompressor = None
+        self._checked_compression = False
+        self._parser = lxml.etree.XMLPullParser(
+            events=("start", "end"),
+            recover=True,
+            remove_comments=True,
+            resolve_entities=False,
+            huge_tree=True,
+        )
+        self._depth = 0
+
+    def feed(self, data):
+        """
+        Parse next chunk of the sitemap.
+
+        Parameters:
+            self (object): The instance of the class containing this method.
+            data (bytes): Next chunk of the raw, possibly compressed, body.
+
+        Returns:
+            Iterator of entries completed by this chunk.
+        """
+        if not self._checked_compression:
+            self._checked_compression = True
+            if data.startswith(_GZIP_MAGIC_NUMBER):
+                self._decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+        if self._decompressor is None:
+            self._parser.feed(data)
+            yield from self._read_events()
+            return
+        while data:
+            # Limit the size of decompressed data, highly compressible
+            # sitemaps would otherwise expand to many megabytes at once.
+            self._parser.feed(
+                self._decompressor.decompress(data, CHUNK_SIZE)
+            )
+            yield from self._read_events()
+            data = self._decompressor.unconsumed_tail
+
+    def iter_entries(self, body, chunk_size=CHUNK_SIZE):
+        """
+        Iterate over entries of the whole sitemap body, parsing it chunk by
+        chunk.
+
+        Parameters:
+            self (object): The instance of the class containing this method.
+            body (bytes): Raw, possibly gzip compressed, sitemap.
+            chunk_size (int): Number of bytes parsed at once.
+
+        Returns:
+            Iterator of entries. The `type` attribute is set as soon as the
+            first entry is returned.
+        """
+        view = memoryview(body)
+        for offset in range(0, len(body), chunk_size):
+            yield from self.feed(bytes(view[offset:offset + chunk_size]))
+        yield from self.close()
+
+    def close(self):
+        """
+        Finish parsing and iterate over the remaining entries.
+        """
+        if self._decompressor is not None:
+            self._parser.feed(self._decompressor.flush())
+        try:
+            self._parser.close()
+        except lxml.etree.XMLSyntaxError:
+            pass
+        yield from self._read_events()
+
+    def _read_events(self):
+        for event, elem in self._parser.read_events():
+            if event == "start":
+                self._depth += 1
+                if self._depth == 1:
+                    self.type = _local_name(elem.tag)
+                continue
+            self._depth -= 1
+            if self._depth != 1:
+                continue
+            entry = {}
+            for child in elem:
+                name = _local_name(child.tag)
+                if name == "link":
+                    if "href" in child.attrib:
+                        entry.setdefault("alternate", []).append(
+                            child.get("href")
+                        )
+                else:
+                    entry[name] = child.text.strip() if child.text else ""
+            elem.clear()
+            while elem.getprevious() is not None:
+                del elem.getparent()[0]
+            if "loc" in entry:
+                yield entry
@@ -0,0 +1,954 @@
+import os
+from time import perf_counter
+from scrapy import Spider, Request, signals
+from scrapy.exceptions import DontCloseSpider, StopDownload
+from scrapy.http import TextResponse, XmlResponse
+from scrapy.utils.defer import maybe_deferred_to_future
+from scrapy.spiders import SitemapSpider
+from scrapy.utils.gz import gzip_magic_number
+from scrapy.utils.log import failure_to_exc_info
+from scrapy.utils.project import data_path
+from twisted.internet.task import LoopingCall
+from urllib.parse import urljoin, urlparse
+from audit_state import AuditState
+from checkpoint import DEFAULT_INTERVAL, Checkpoint
+from checks import CHECKS, MAX_LOGGED_FINDINGS, PROBE_KEY, Page
+from content_index import DEFAULT_SIZE, ContentIndex, content_digest
+from crawl_cache import PageCache
+from distributed import (
+    DEFAULT_POLL_INTERVAL,
+    TAKE_BATCH,
+    open_store,
+    parse_shard,
+    shard_of,
+)
+from extraction import FAST, LinkExtractor
+from frontier import (
+    DEFAULT_DEPTH_WEIGHT,
+    DEFAULT_INLINK_WEIGHT,
+    DEFAULT_PATTERN_WEIGHT,
+    DEFAULT_PATTERNS,
+    DEFAULT_SITEMAP_WEIGHT,
+    Frontier,
+)
+from instrumentation import Instrumentation
+from items import Finding
+from parse_pool import ParsePool
+from sitemap import SITEMAP_INDEX, URLSET, SitemapReader
+from url_filter import (
+    DEFAULT_CAPACITY,
+    DEFAULT_ERROR_RATE,
+    SEEN_KEY,
+    UrlFilter,
+)
+from url_index import UrlIndex
+from url_normalizer import UrlNormalizer
+
+
+# Request meta key of the name of the check which made the request.
+CHECK_KEY = "audit_check"
+# Links are followed only to URLs which can be downloaded, `tel:` or
+# `javascript:` hrefs resolve to URLs too.
+CRAWLED_PREFIXES = ("http://", "https://")
+
+
+class AuditMixin:
+    """
+    Common part of spiders passing every crawled page once to a set of
+    checks.
+
+    Checks are selected by names from `checks.CHECKS`, either with the
+    `checks` spider argument (comma separated string or list of names) or
+    with the `check_names` class attribute.
+
+    With the `state_file` spider argument, state of every crawled page is
+    kept in an `AuditState` database between crawls.
+
+    With the `checkpoint_file` spider argument, progress of the crawl is
+    saved periodically to a `Checkpoint`. If the `resume` spider argument is
+    also set, pages stored in the checkpoint are passed to the checks
+    without crawling them again.
+
+    URLs of pages that failed each check are kept in the `findings` dict,
+    by check name, and only their numbers are stored in the crawler stats,
+    under `custom/findings/<name>`. At most SEO_SPY_MAX_LOGGED_FINDINGS of
+    them are logged per check when the crawl ends.
+
+    With the SEO_SPY_FINDINGS_FILE setting, findings are not kept until the
+    end of the crawl, but returned from callbacks as `Finding` items as
+    soon as they are found, and written by the `FindingsPipeline`.
+
+    Requests of the checks (see `Check.pop_requests()`) are sent together
+    with the crawl and their responses passed back to the check. Downloads
+    of link probes are stopped as soon as their headers are received.
+
+    With the `shared_store` and `shard` ("I/N") spider arguments, the spider
+    is a worker of a distributed crawl (see `distributed.SharedStore`) and
+    crawls only URLs of its shard. Replayable checks are not run, data they
+    require is stored with every crawled page instead, every
+    SEO_SPY_SHARD_POLL_INTERVAL seconds, and `merge_page()` passes stored
+    pages of all workers to them once the crawl has finished.
+    """
+
+    domain = "http://127.0.0.1:8000"
+    check_names: list = []
+    page_cache = None
+    state = None
+    checkpoint = None
+    link_extractor = LinkExtractor(FAST)
+    parse_pool = None
+    content_index = None
+    store = None
+    shard = 0
+    shards = 1
+    stream_findings = False
+    _visited_pages: UrlIndex
+
+    def __init__(self, *a, **kw):
+        super().__init__(*a, **kw)
+        self._visited_pages = UrlIndex()
+        self.instrumentation = Instrumentation()
+        if "domain" in self.__dict__:
+            if not (
+                self.__dict__["domain"].startswith("https://") or
+                self.__dict__["domain"].startswith("http://")
+            ):
+                raise ValueError(
+                    "Domain URL must start with https:// or http://"
+                )
+            self.domain = self.__dict__["domain"]
+            allowed_domain = self.domain.split("//")[-1].split(":")[0]
+            self.allowed_domains = [allowed_domain]
+        self.normalizer = UrlNormalizer(self.domain)
+
+        check_names = self.__dict__.get("checks", self.check_names)
+        if isinstance(check_names, str):
+            check_names = check_names.split(",")
+        for name in check_names:
+            if name not in CHECKS:
+                raise ValueError(f"Unknown check: {name}")
+        self.checks = [CHECKS[name](self) for name in check_names]
+        if "shared_store" in self.__dict__:
+            self._join_store(check_names)
+        self._checks_by_name = {check.name: check for check in self.checks}
+        self.findings = {check.name: [] for check in self.checks}
+        self._finding_counts = {check.name: 0 for check in self.checks}
+        self._pending_findings: list = []
+        # Keys of findings merged from workers of a distributed crawl, by
+        # check name.
+        self._merged_findings: dict = {}
+        self._checks_finished = False
+        if "state_file" in self.__dict__:
+            self.state = AuditState(self.__dict__["state_file"])
+            # URLs the state of pages was stored or replayed under, the
+            # rest is pruned.
+            self._state_urls = UrlIndex()
+
+    def _join_store(self, check_names):
+        shard = self.__dict__.get("shard", "0/1")
+        if isinstance(shard, str):
+            shard = parse_shard(shard)
+        self.shard, self.shards = shard
+        self.store = open_store(self.__dict__["shared_store"])
+        self.store.join(self.domain, self.shards, check_names, self.shard)
+        self._stored_keys = sorted({
+            key for check in self.checks if check.replayable
+            for key in check.requires
+        })
+        self.checks = [
+            check for check in self.checks if not check.replayable
+        ]
+        self._stored_pages: list = []
+
+    @classmethod
+    def from_crawler(cls, crawler, *args, **kwargs):
+        spider = super().from_crawler(crawler, *args, **kwargs)
+        spider.link_extractor = LinkExtractor(
+            crawler.settings.get("SEO_SPY_LINK_EXTRACTOR", FAST)
+        )
+        if crawler.settings.getbool("HTTPCACHE_ENABLED"):
+            cache_dir = data_path(crawler.settings["HTTPCACHE_DIR"])
+            # Spiders of many domains may run in one process, each needs
+            # its own page cache.
+            netloc = urlparse(spider.domain).netloc.replace(":", "_")
+            cache_dir = os.path.join(cache_dir, spider.name, netloc)
+            spider.page_cache = PageCache(cache_dir)
+        crawler.signals.connect(
+            spider._headers_received, signal=signals.headers_received
+        )
+        crawler.signals.connect(
+            spider._download_started,
+            signal=signals.request_reached_downloader,
+        )
+        crawler.signals.connect(
+            spider._download_finished,
+            signal=signals.request_left_downloader,
+        )
+        spider.stream_findings = bool(
+            crawler.settings.get("SEO_SPY_FINDINGS_FILE")
+        )
+        content_cache_size = crawler.settings.getint(
+            "SEO_SPY_CONTENT_CACHE_SIZE", DEFAULT_SIZE
+        )
+        if content_cache_size > 0:
+            spider.content_index = ContentIndex(content_cache_size)
+        parse_workers = crawler.settings.getint("SEO_SPY_PARSE_WORKERS")
+        if parse_workers > 0:
+            spider.parse_pool = ParsePool(parse_workers)
+        if spider.store is not None:
+            spider._exchange_loop = LoopingCall(spider._exchange)
+            spider._exchange_loop.start(
+                crawler.settings.getfloat(
+                    "SEO_SPY_SHARD_POLL_INTERVAL", DEFAULT_POLL_INTERVAL
+                ),
+                now=False,
+            ).addErrback(spider._exchange_failed)
+        if "checkpoint_file" in spider.__dict__:
+            spider.checkpoint = Checkpoint(
+                spider.__dict__["checkpoint_file"],
+                spider.domain,
+                resume=bool(spider.__dict__.get("resume")),
+                interval=crawler.settings.getfloat(
+                    "SEO_SPY_CHECKPOINT_INTERVAL", DEFAULT_INTERVAL
+                ),
+            )
+        return spider
+
+    def process_page(self, response, extracted=None):
+        """
+        Pass crawled page to every check.
+
+        Parameters:
+            self (object): The instance of the class containing this method.
+            response (object): Response of the crawled page.
+            extracted (dict): Data already extracted from the page, if any.
+
+        Returns:
+            Page (object): The page shared by all checks.
+        """
+        self.instrumentation.record_response(response)
+        cached = self._cached_extracted(response)
+        if cached is None and extracted is None:
+            extracted = self._find_duplicate(response)
+        page = Page(response.url, response, self, cached or extracted)
+        self._run_checks(page)
+        if self.content_index is not None:
+            self.content_index.add(page.digest, page.url, page.extracted())
+        if self.store is not None:
+            self._stored_pages.append((
+                page.url,
+                {key: getattr(page, key) for key in self._stored_keys},
+            ))
+        if self.page_cache is not None and page.extracted() != cached:
+            self.page_cache.set(self._fingerprint(response), page.extracted())
+        if self.state is not None:
+            # Pages are stored under the URL they were requested with, e.g.
+            # their sitemap URL, which the next run looks them up by, even
+            # if it redirects.
+            state_url = response.meta.get("redirect_urls", [page.url])[0]
+            self._state_urls.add(state_url)
+            # Links are always stored, so the link graph is complete
+            # whatever checks were run.
+            self.state.set(
+                state_url,
+                response.meta.get("lastmod"),
+                dict(page.extracted(), links=page.links)
+            )
+        if self.checkpoint is not None:
+            self.checkpoint.add_page(
+                page.url, page.extracted(), response.meta.get(SEEN_KEY)
+            )
+        return page
+
+    async def process_page_offloaded(self, response):
+        """
+        Extract data from the crawled page in the parse pool, then pass the
+        page to every check.
+
+        Parameters:
+            self (object): The instance of the class containing this method.
+            response (object): Response of the crawled page.
+
+        Returns:
+            Page (object): The page shared by all checks.
+        """
+        if (
+            not isinstance(response, TextResponse) or
+            self._cached_extracted(response) is not None
+        ):
+            return self.process_page(response)
+        duplicate = self._find_duplicate(response)
+        if duplicate is not None and len(duplicate) > 1:
+            # Duplicate of an already parsed page, nothing left to parse.
+            return self.process_page(response, duplicate)
+        extracted = await maybe_deferred_to_future(
+            self.parse_pool.extract(
+                response,
+                self.domain,
+                self.link_extractor.mode,
+                # Duplicates of the page at other URLs resolve their links
+                # from its hrefs.
+                hrefs=self.content_index is not None or any(
+                    "hrefs" in check.requires for check in self.checks
+                ),
+            )
+        )
+        if duplicate is not None:
+            extracted.update(duplicate)
+        self.crawler.stats.inc_value("custom/parse_pool/pages")
+        return self.process_page(response, extracted)
+
+    def replay_page(self, url, lastmod):
+        """
+        Pass page stored in the audit state to every check, without
+        downloading it.
+
+        Parameters:
+            self (object): The instance of the class containing this method.
+            url (str): URL of the page.
+            lastmod (str): Current last modification date of the page.
+
+        Returns:
+            bool: True if the page was replayed, False if it has to be
+                  crawled because it is new, has changed or the stored state
+                  lacks data required by the checks.
+        """
+        if self.state is None or not lastmod:
+            return False
+        stored = self.state.get(url)
+        if stored is None:
+            return False
+        stored_lastmod, extracted = stored
+        if stored_lastmod != lastmod:
+            return False
+        for check in self.checks:
+            if any(key not in extracted for key in check.requires):
+                return False
+        self._state_urls.add(url)
+        self._run_checks(Page(url, None, self, extracted))
+        self.crawler.stats.inc_value("custom/unchanged_pages")
+        return True
+
+    def resume_checkpoint(self):
+        """
+        Pass pages stored in the checkpoint to every check.
+
+        Parameters:
+            self (object): The instance of the class containing this method.
+
+        Returns:
+            list: URLs of the stored frontier and of stored pages lacking
+                  data required by the checks, which have to be crawled.
+        """
+        frontier = []
+        required = {key for check in self.checks for key in check.requires}
+        for url, extracted in self.checkpoint.pages():
+            if any(key not in extracted for key in required):
+                frontier.append(url)
+                continue
+            self._run_checks(Page(url, None, self, extracted))
+            self.crawler.stats.inc_value("custom/checkpoint/resumed_pages")
+        frontier.extend(self.checkpoint.frontier())
+        return frontier
+
+    def merge_page(self, url, extracted):
+        """
+        Pass page stored by a worker of a distributed crawl to every
+        replayable check.
+
+        Parameters:
+            self (object): The instance of the class containing this method.
+            url (str): URL of the page.
+            extracted (dict): Data extracted from the page by the worker.
+
+        Returns:
+            list: `Finding` items, to be written if findings are streamed.
+        """
+        self._run_checks(
+            Page(url, None, self, extracted),
+            [check for check in self.checks if check.replayable],
+        )
+        return self.pop_findings()
+
+    def merge_findings(self, name, findings):
+        """
+        Add findings of a check run by a worker of a distributed crawl.
+
+        Returns:
+            list: `Finding` items, to be written if findings are streamed.
+        """
+        check = self._checks_by_name.get(name)
+        if check is None or check.replayable:
+            return []
+        merged = self._merged_findings.setdefault(name, set())
+        new = []
+        for finding in findings:
+            key = check.merge_key(finding)
+            if key not in merged:
+                merged.add(key)
+                new.append(finding)
+        if new:
+            self._add_findings(check, new)
+        return self.pop_findings()
+
+    def _exchange(self):
+        """
+        Store pages crawled since the previous call in the shared store.
+        """
+        if self._stored_pages:
+            self.store.add_pages(self.shard, self._stored_pages)
+            self.crawler.stats.inc_value(
+                "custom/shard/stored_pages", len(self._stored_pages)
+            )
+            self._stored_pages = []
+
+    def _exchange_failed(self, failure):
+        self.logger.error(
+            f"Shared store failed: {failure.getErrorMessage()}",
+            exc_info=failure_to_exc_info(failure),
+        )
+        self.crawler.engine.close_spider(self, "shared_store_failed")
+
+    def _owns(self, url):
+        return self.store is None or shard_of(url, self.shards) == self.shard
+
+    def _close_store(self, reason):
+        if self._exchange_loop.running:
+            self._exchange_loop.stop()
+        self.finish_checks()
+        self._exchange()
+        self.store.add_findings(self.shard, self.findings)
+        if reason == "finished":
+            self.store.finish(self.shard)
+        self.store.close()
+
+    def _run_checks(self, page, checks=None):
+        self._visited_pages.add(page.url)
+        for check in self.checks if checks is None else checks:
+            with self.instrumentation.measure(f"check/{check.name}"):
+                findings = check.process_page(page)
+            if findings:
+                self._add_findings(check, findings)
+
+    def _add_findings(self, check, urls):
+        self._finding_counts[check.name] += len(urls)
+        if not self.stream_findings:
+            self.findings[check.name].extend(urls)
+            return
+        for url in urls:
+            self._pending_findings.append(
+                Finding(domain=self.domain, check=check.name, url=url)
+            )
+
+    def pop_findings(self):
+        """
+        Return `Finding` items found since the previous call, to be returned
+        from a callback. Always empty unless findings are streamed.
+        """
+        findings = self._pending_findings
+        self._pending_findings = []
+        return findings
+
+    def pop_requests(self):
+        """
+        Return requests of the checks made since the previous call, to be
+        returned from a callback.
+        """
+        requests = []
+        for check in self.checks:
+            for request in check.pop_requests():
+                request.callback = self._check_response
+                request.errback = self._check_failed
+                request.meta[CHECK_KEY] = check.name
+                requests.append(request)
+        return requests
+
+    def _pop_output(self):
+        return self.pop_findings() + self.pop_requests()
+
+    def _check_response(self, response):
+        check = self._checks_by_name[response.meta[CHECK_KEY]]
+        findings = check.process_response(response)
+        if findings:
+            self._add_findings(check, findings)
+        return self._pop_output()
+
+    def _check_failed(self, failure):
+        check = self._checks_by_name[failure.request.meta[CHECK_KEY]]
+        findings = check.process_failure(failure)
+        if findings:
+            self._add_findings(check, findings)
+        return self._pop_output()
+
+    def _headers_received(self, headers, body_length, request, spider):
+        if spider is self and PROBE_KEY in request.meta:
+            # Status and headers are all a probe needs.
+            raise StopDownload(fail=False)
+
+    def _download_started(self, request, spider):
+        if spider is self:
+            self.instrumentation.download_started()
+
+    def _download_finished(self, request, spider):
+        if spider is self:
+            self.instrumentation.download_finished()
+
+    def finish_checks(self):
+        """
+        Compute results of checks which need all crawled pages. Called once
+        the crawl ends, further calls only return pending findings.
+
+        Returns:
+            list: `Finding` items not returned from callbacks yet.
+        """
+        if not self._checks_finished:
+            self._checks_finished = True
+            with self.instrumentation.measure("closed"):
+                for check in self.checks:
+                    findings = check.finish()
+                    if findings:
+                        self._add_findings(check, findings)
+        return self.pop_findings()
+
+    def _cached_extracted(self, response):
+        if self.page_cache is None or "cached" not in response.flags:
+            return None
+        # Server confirmed the page is unchanged since the last crawl.
+        return self.page_cache.get(self._fingerprint(response))
+
+    def _find_duplicate(self, response):
+        """
+        Return data extracted from an earlier page with the same body, or
+        only the digest of the body if there is none, so it is computed
+        once.
+        """
+        if self.content_index is None or not isinstance(
+            response, TextResponse
+        ):
+            return None
+        digest = content_digest(response.body)
+        return self.content_index.get(digest, response.url) or {
+            "digest": digest
+        }
+
+    def _fingerprint(self, response):
+        return self.crawler.request_fingerprinter.fingerprint(
+            response.request
+        )
+
+    def closed(self, reason):
+        """
+        Compute results of every check and store them in the crawler stats.
+        """
+        if self.page_cache is not None:
+            self.page_cache.close()
+        if self.store is not None:
+            self._close_store(reason)
+        if self.content_index is not None:
+            self.content_index.write_stats(self.crawler.stats)
+        if self.parse_pool is not None:
+            self.parse_pool.close()
+        if self.checkpoint is not None:
+            self.checkpoint.close(complete=reason == "finished")
+        if self.state is not None:
+            if reason == "finished":
+                self.state.prune(self._state_urls)
+            self.state.close()
+        # Shard of a worker may have no pages at all.
+        if not self._visited_pages and self.store is None:
+            self.logger.error(
+                "No sites visited. Check the connection to the domain."
+            )
+            self.crawler.stats.set_value(
+                "custom/connection_issue",
+                True
+            )
+            self.instrumentation.write_stats(self.crawler.stats)
+            return
+
+        # With streamed findings, the pipeline has already finished the
+        # checks and written the results.
+        self.finish_checks()
+        limit = self.crawler.settings.getint(
+            "SEO_SPY_MAX_LOGGED_FINDINGS", MAX_LOGGED_FINDINGS
+        )
+        with self.instrumentation.measure("closed"):
+            for check in self.checks:
+                count = self._finding_counts[check.name]
+                self.crawler.stats.set_value(
+                    f"custom/findings/{check.name}", count
+                )
+                if not count:
+                    self.logger.info(check.success_message)
+                    continue
+                self.logger.error(check.failure_message)
+                if self.stream_findings:
+                    self.logger.error(
+                        f"{count} pages, written to the findings file."
+                    )
+                    continue
+                check.log_findings(self.findings[check.name], limit)
+        self.instrumentation.write_stats(self.crawler.stats)
+
+
+class AuditSpider(AuditMixin, SitemapSpider):
+    """
+    Run checks on every page listed in the sitemap of the domain.
+    """
+
+    name = "audit_spider"
+    allowed_domains = ["127.0.0.1"]
+    sitemap_urls = ["http://127.0.0.1:8000/sitemap.xml"]
+
+    def __init__(self, *a, **kw):
+        super().__init__(*a, **kw)
+        self.sitemap_urls = [urljoin(self.domain, "sitemap.xml")]
+
+    def start_requests(self):
+        if self.checkpoint is not None and self.checkpoint.resumed:
+            # Pages listed in the sitemap are crawled unless they were
+            # passed to the checks from the checkpoint.
+            self.resume_checkpoint()
+            yield from self.pop_requests()
+        yield from super().start_requests()
+
+    def _parse_sitemap(self, response):
+        """
+        Parse sitemap incrementally, scheduling requests for pages and
+        nested sitemaps as soon as their entries are read.
+        """
+        if response.url.endswith("/robots.txt"):
+            yield from super()._parse_sitemap(response)
+            return
+        if not (
+            isinstance(response, XmlResponse) or
+            gzip_magic_number(response) or
+            response.url.endswith(".xml") or
+            response.url.endswith(".xml.gz")
+        ):
+            self.logger.warning(f"Ignoring invalid sitemap: {response}")
+            return
+
+        reader = SitemapReader()
+        entries = self.sitemap_filter(reader.iter_entries(response.body))
+        for entry in entries:
+            locs = [entry["loc"]]
+            if self.sitemap_alternate_links:
+                locs.extend(entry.get("alternate", []))
+            for loc in locs:
+                if reader.type == SITEMAP_INDEX:
+                    if any(x.search(loc) for x in self._follow):
+                        # Nested sitemaps go first, so they are downloaded
+                        # concurrently with pages of already read ones.
+                        yield Request(
+                            loc, callback=self._parse_sitemap, priority=1
+                        )
+                elif reader.type == URLSET:
+                    lastmod = entry.get("lastmod")
+                    if loc in self._visited_pages or not self._owns(loc):
+                        continue
+                    if self.replay_page(loc, lastmod):
+                        yield from self._pop_output()
+                        continue
+                    for r, c in self._cbs:
+                        if r.search(loc):
+                            yield Request(
+                                loc, callback=c, meta={"lastmod": lastmod}
+                            )
+                            break
+
+    def parse(self, response):
+        """
+        Check page listed in the sitemap.
+        """
+        if self.parse_pool is not None:
+            return self._parse_offloaded(response)
+        self.process_page(response)
+        return self._pop_output()
+
+    async def _parse_offloaded(self, response):
+        await self.process_page_offloaded(response)
+        return self._pop_output()
+
+
+class AuditSpiderNoSitemap(AuditMixin, Spider):
+    """
+    Run checks on every page reachable by internal links from the domain
+    root.
+
+    Discovered links are deduplicated by a memory-bounded `UrlFilter`, which
+    also replaces the duplicates filter of the scheduler. Its false-positive
+    rate, initial capacity and spill directory are set with the
+    SEO_SPY_URL_FILTER_ERROR_RATE, SEO_SPY_URL_FILTER_CAPACITY and
+    SEO_SPY_URL_FILTER_DIR settings.
+
+    New links wait in a `Frontier`, ranked by the SEO_SPY_FRONTIER_*
+    settings, and only the best SEO_SPY_FRONTIER_WINDOW of them are passed
+    to the scheduler at a time, so the ranking uses links seen until they
+    are requested. With SEO_SPY_FRONTIER_SITEMAP, the sitemap is read to
+    rank pages listed in it higher, but pages are still found only by
+    links. SEO_SPY_MAX_PAGES and SEO_SPY_MAX_TIME limit the number of pages
+    requested and the seconds since the crawl started; once either is
+    reached, no more pages are requested and the crawl stops as soon as the
+    requested ones are processed, with the best coverage the budget allowed.
+
+    A worker of a distributed crawl crawls the domain root only if it owns
+    it, and pushes links to URLs of other shards to their owners through
+    the shared store, where it also takes URLs pushed to it. The worker
+    stops when all workers are idle.
+    """
+
+    name = "audit_spider_nositemap"
+    custom_settings = {
+        "DUPEFILTER_CLASS": "url_filter.UrlFilterDupeFilter",
+    }
+    url_filter: UrlFilter
+    frontier: Frontier
+    frontier_window = 32
+    rank_by_sitemap = False
+    max_pages = 0
+    max_time = 0.0
+    budget_exhausted = None
+
+    def __init__(self, *a, **kw):
+        super().__init__(*a, **kw)
+        self.start_urls = [self.domain]
+        self.frontier = Frontier()
+        self._started = perf_counter()
+        self._requested = 0
+        self._in_flight = 0
+        # (url, shard) of links to other shards, not pushed yet.
+        self._outbox: list = []
+
+    def start_requests(self):
+        if self.rank_by_sitemap:
+            yield self._sitemap_request(urljoin(self.domain, "sitemap.xml"))
+        if not self._owns(self.domain):
+            return
+        if self.checkpoint is None or not self.checkpoint.resumed:
+            self._requested += len(self.start_urls)
+            yield from super().start_requests()
+            return
+        frontier = self.resume_checkpoint()
+        yield from self.pop_requests()
+        for url in self._visited_pages:
+            self.url_filter.add(url)
+        for url in frontier:
+            if url.startswith(CRAWLED_PREFIXES) and self.url_filter.add(url):
+                self.frontier.add(url)
+        yield from self._dispatch()
+
+    @classmethod
+    def from_crawler(cls, crawler, *args, **kwargs):
+        spider = super().from_crawler(crawler, *args, **kwargs)
+        settings = crawler.settings
+        spider.url_filter = UrlFilter(
+            capacity=settings.getint(
+                "SEO_SPY_URL_FILTER_CAPACITY", DEFAULT_CAPACITY
+            ),
+            error_rate=settings.getfloat(
+                "SEO_SPY_URL_FILTER_ERROR_RATE", DEFAULT_ERROR_RATE
+            ),
+            directory=settings.get("SEO_SPY_URL_FILTER_DIR"),
+        )
+        spider.frontier = Frontier(
+            depth_weight=settings.getfloat(
+                "SEO_SPY_FRONTIER_DEPTH_WEIGHT", DEFAULT_DEPTH_WEIGHT
+            ),
+            inlink_weight=settings.getfloat(
+                "SEO_SPY_FRONTIER_INLINK_WEIGHT", DEFAULT_INLINK_WEIGHT
+            ),
+            sitemap_weight=settings.getfloat(
+                "SEO_SPY_FRONTIER_SITEMAP_WEIGHT", DEFAULT_SITEMAP_WEIGHT
+            ),
+            pattern_weight=settings.getfloat(
+                "SEO_SPY_FRONTIER_PATTERN_WEIGHT", DEFAULT_PATTERN_WEIGHT
+            ),
+            patterns=settings.getlist(
+                "SEO_SPY_FRONTIER_PATTERNS", DEFAULT_PATTERNS
+            ),
+        )
+        spider.frontier_window = settings.getint(
+            "SEO_SPY_FRONTIER_WINDOW",
+            2 * settings.getint("CONCURRENT_REQUESTS"),
+        )
+        spider.rank_by_sitemap = settings.getbool("SEO_SPY_FRONTIER_SITEMAP")
+        spider.max_pages = settings.getint("SEO_SPY_MAX_PAGES")
+        spider.max_time = settings.getfloat("SEO_SPY_MAX_TIME")
+        crawler.signals.connect(
+            spider._spider_idle, signal=signals.spider_idle
+        )
+        return spider
+
+    def parse(self, response):
+        """
+        Check page and follow its internal links.
+        """
+        if SEEN_KEY in response.meta:
+            self._in_flight -= 1
+        if self.parse_pool is not None:
+            return self._parse_offloaded(response)
+        return self._follow_links(self.process_page(response))
+
+    def closed(self, reason):
+        self.url_filter.write_stats(self.crawler.stats)
+        self.url_filter.close()
+        self.frontier.write_stats(
+            self.crawler.stats, self._visited_pages, self.normalizer
+        )
+        if self.budget_exhausted:
+            self.crawler.stats.set_value(
+                "custom/frontier/budget_exhausted", self.budget_exhausted
+            )
+            # Pages left in the frontier are kept in the checkpoint, so the
+            # crawl can be resumed with a new budget.
+            reason = "budget_exhausted"
+        super().closed(reason)
+
+    async def _parse_offloaded(self, response):
+        page = await self.process_page_offloaded(response)
+        return list(self._follow_links(page))
+
+    def _follow_links(self, page):
+        url_filter = self.url_filter
+        frontier = self.frontier
+        checkpoint = self.checkpoint
+        yield from self._pop_output()
+        for link in page.links:
+            if not link.startswith(CRAWLED_PREFIXES):
+                continue
+            if url_filter.add(link):
+                if not self._owns(link):
+                    self._outbox.append((link, shard_of(link, self.shards)))
+                    continue
+                if checkpoint is not None:
+                    checkpoint.add_frontier(link)
+                frontier.add(link)
+            else:
+                frontier.link(link)
+        yield from self._dispatch()
+
+    def _dispatch(self):
+        """
+        Request the best ranked pages of the frontier, keeping up to
+        `frontier_window` of them requested but not processed yet.
+        """
+        frontier = self.frontier
+        while self._in_flight < self.frontier_window and frontier:
+            if self._over_budget():
+                return
+            url = frontier.pop()
+            try:
+                request = self._request(url)
+            except ValueError as e:
+                # Not counted in flight, as it never reaches a callback.
+                self.logger.warning(f"Skipped invalid URL {url}: {e}")
+                if self.checkpoint is not None:
+                    self.checkpoint.remove_frontier(url)
+                continue
+            self._in_flight += 1
+            self._requested += 1
+            yield request
+
+    def _over_budget(self):
+        if self.budget_exhausted is None:
+            if self.max_pages and self._requested >= self.max_pages:
+                self.budget_exhausted = "pages"
+            elif (
+                self.max_time and
+                perf_counter() - self._started >= self.max_time
+            ):
+                self.budget_exhausted = "time"
+            else:
+                return False
+            self.logger.info(
+                f"Crawl budget exhausted ({self.budget_exhausted}),"
+                f" {len(self.frontier)} discovered pages not requested."
+            )
+        return True
+
+    def _spider_idle(self):
+        # Nothing is in flight once the spider is idle. Requests dropped
+        # on the way, e.g. redirects to already seen pages, never reached a
+        # callback to be counted off.
+        self._in_flight = 0
+        requests = list(self._dispatch())
+        for request in requests:
+            self.crawler.engine.crawl(request)
+        # A worker is closed by `_exchange()` once all workers are idle.
+        if requests or self.store is not None:
+            raise DontCloseSpider
+
+    def _exchange(self):
+        """
+        Push links to other shards and take URLs pushed to this one, then
+        close the spider if the whole distributed crawl has finished.
+        """
+        super()._exchange()
+        store = self.store
+        if self._outbox:
+            store.push(self._outbox)
+            self.crawler.stats.inc_value(
+                "custom/shard/pushed_urls", len(self._outbox)
+            )
+            self._outbox = []
+        if len(self.frontier) < TAKE_BATCH:
+            taken = store.take(self.shard, TAKE_BATCH)
+            self.crawler.stats.inc_value(
+                "custom/shard/taken_urls", len(taken)
+            )
+            for url in taken:
+                if self.url_filter.add(url):
+                    self.frontier.add(url)
+        engine = self.crawler.engine
+        idle = engine.spider_is_idle()
+        if idle:
+            self._in_flight = 0
+        requests = list(self._dispatch())
+        for request in requests:
+            engine.crawl(request)
+        if idle and not requests and store.idle(self.shard):
+            engine.close_spider(self, "finished")
+
+    def _request(self, url):
+        return Request(
+            url,
+            callback=self.parse,
+            errback=self._request_failed,
+            meta={SEEN_KEY: url},
+        )
+
+    def _request_failed(self, failure):
+        self._in_flight -= 1
+        if self.checkpoint is not None:
+            self.checkpoint.remove_frontier(failure.request.meta[SEEN_KEY])
+        # Scrapy logs the failure as if there was no errback.
+        return failure
+
+    def _sitemap_request(self, url):
+        return Request(
+            url,
+            callback=self._parse_sitemap,
+            errback=self._sitemap_failed,
+            priority=1,
+        )
+
+    def _parse_sitemap(self, response):
+        """
+        Record pages listed in the sitemap, to rank them higher.
+        """
+        reader = SitemapReader()
+        normalize = self.normalizer.normalize
+        for entry in reader.iter_entries(response.body):
+            if reader.type == SITEMAP_INDEX:
+                yield self._sitemap_request(entry["loc"])
+            elif reader.type == URLSET:
+                url = normalize(None, entry["loc"])
+                if url is not None:
+                    self.frontier.add_sitemap(url)
+
+    def _sitemap_failed(self, failure):
+        self.logger.warning(
+            f"Sitemap not used to rank pages: {failure.request.url}"
+            f" ({failure.getErrorMessage()})"
+        )
@@ -0,0 +1,72 @@
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+def create_crawler(spider_cls, domain, settings, **kwargs):
+    """
+    Create a crawler bound to a new spider without starting its engine.
+
+    Checks, stats and reports of the spider work as in a Scrapy crawl, but
+    pages are passed to it by the caller.
+
+    Parameters:
+        spider_cls (class): The spider whose checks are run.
+        domain (str): The domain name to be audited.
+        settings (object): Scrapy settings of the audit.
+        kwargs (dict): Additional spider arguments.
+
+    Returns:
+        Crawler (object): The crawler with an open spider.
+    """
+    from scrapy.crawler import Crawler
+    from scrapy.utils.log import configure_logging
+
+    # Worker processes of the parse pool report back through the reactor,
+    # which is not running.
+    settings.set("SEO_SPY_PARSE_WORKERS", 0)
+    settings.set("TELNETCONSOLE_ENABLED", False)
+    configure_logging(settings)
+    crawler = Crawler(spider_cls, settings)
+    crawler.spider = crawler._create_spider(domain=domain, **kwargs)
+    crawler.stats.open_spider(crawler.spider)
+    return crawler
+
+
+class StandaloneAudit:
+    """
+    Base of audits passing pages to a spider without the Scrapy engine.
+
+    Items returned by the spider are written by the findings pipeline when
+    SEO_SPY_FINDINGS_FILE is set. `close()` closes the spider and the stats
+    in the same order as the engine does. Errors of the spider on a page are
+    logged and counted in `spider_exceptions/*` stats, as the engine does,
+    without stopping the audit.
+    """
+
+    def __init__(self, crawler):
+        self.crawler = crawler
+        self.spider = crawler.spider
+        self.pipeline = None
+        if crawler.settings.get("SEO_SPY_FINDINGS_FILE"):
+            from pipelines import FindingsPipeline
+
+            self.pipeline = FindingsPipeline.from_crawler(crawler)
+            self.pipeline.open_spider(self.spider)
+
+    def process_item(self, item):
+        if self.pipeline is not None:
+            self.pipeline.process_item(item, self.spider)
+
+    def close(self, reason="finished"):
+        if self.pipeline is not None:
+            self.pipeline.close_spider(self.spider)
+        self.spider.closed(reason)
+        self.crawler.stats.set_value("finish_reason", reason)
+        self.crawler.stats.close_spider(self.spider, reason=reason)
+
+    def _spider_error(self, request, exc):
+        self.crawler.stats.inc_value(
+            f"spider_exceptions/{type(exc).__name__}"
+        )
+        logger.error(f"Spider error processing {request}", exc_info=exc)
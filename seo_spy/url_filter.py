@@ -0,0 +1,288 @@
+import hashlib
+import math
+import mmap
+import os
+import shutil
+import tempfile
+from functools import lru_cache, reduce
+from operator import or_
+
+from scrapy.dupefilters import BaseDupeFilter
+
+STATS_PREFIX = "custom/url_filter/"
+DEFAULT_CAPACITY = 100000
+DEFAULT_ERROR_RATE = 1e-6
+
+# Request meta key of the URL the spider has already added to the filter.
+SEEN_KEY = "url_filter_seen"
+
+
+BLOCK_BITS = 256
+BLOCK_BYTES = BLOCK_BITS // 8
+# Digest bytes after the first 8, which select the block, are bit positions
+# within the block, one per hash function.
+MAX_HASHES = 56
+_BITS = [1 << i for i in range(BLOCK_BITS)]
+
+
+def _false_positive_rate(bits_per_url, hashes):
+    # Number of URLs in a block follows the Poisson distribution.
+    mean = BLOCK_BITS / bits_per_url
+    probability = math.exp(-mean)
+    rate = 0.0
+    urls = 0
+    while urls < mean + 10 * math.sqrt(mean) + 10:
+        rate += probability * (1 - (1 - 1 / BLOCK_BITS) ** (hashes * urls)) \
+            ** hashes
+        urls += 1
+        probability *= mean / urls
+    return rate
+
+
+@lru_cache(maxsize=None)
+def _dimensions(error_rate):
+    """
+    Return the smallest number of bits per URL and the number of hash
+    functions keeping false-positive rate of a full stage within the error
+    rate.
+    """
+    best = None
+    for hashes in range(1, MAX_HASHES + 1):
+        low, high = 1.0, 1024.0
+        if _false_positive_rate(high, hashes) > error_rate:
+            continue
+        while high - low > 0.01:
+            middle = (low + high) / 2
+            if _false_positive_rate(middle, hashes) > error_rate:
+                low = middle
+            else:
+                high = middle
+        if best is None or high < best[0]:
+            best = (high, hashes)
+        elif high > best[0] * 1.1:
+            break
+    if best is None:
+        raise ValueError(f"URL filter error rate too low: {error_rate}")
+    return best
+
+
+class _Stage:
+    __slots__ = ("capacity", "error_rate", "hashes", "blocks", "bits",
+                 "count", "spilled")
+
+    def __init__(self, capacity, error_rate):
+        self.capacity = capacity
+        self.error_rate = error_rate
+        bits_per_url, self.hashes = _dimensions(error_rate)
+        self.blocks = max(1, math.ceil(capacity * bits_per_url / BLOCK_BITS))
+        self.bits = bytearray(self.blocks * BLOCK_BYTES)
+        self.count = 0
+        self.spilled = False
+
+    def _locate(self, digest):
+        offset = int.from_bytes(digest[:8], "little") % self.blocks
+        mask = reduce(or_, map(_BITS.__getitem__, digest[8:8 + self.hashes]))
+        return offset * BLOCK_BYTES, mask
+
+    def __contains__(self, digest):
+        offset, mask = self._locate(digest)
+        block = self.bits[offset:offset + BLOCK_BYTES]
+        return int.from_bytes(block, "little") & mask == mask
+
+    def add(self, digest):
+        offset, mask = self._locate(digest)
+        block = int.from_bytes(
+            self.bits[offset:offset + BLOCK_BYTES], "little"
+        )
+        self.bits[offset:offset + BLOCK_BYTES] = (block | mask).to_bytes(
+            BLOCK_BYTES, "little"
+        )
+        self.count += 1
+
+    def spill(self, path):
+        with open(path, "wb") as stage_file:
+            stage_file.write(self.bits)
+        with open(path, "rb") as stage_file:
+            self.bits = mmap.mmap(
+                stage_file.fileno(), 0, access=mmap.ACCESS_READ
+            )
+        self.spilled = True
+
+    def estimated_error_rate(self):
+        if not self.count:
+            return 0.0
+        return _false_positive_rate(
+            self.blocks * BLOCK_BITS / self.count, self.hashes
+        )
+
+
+class UrlFilter:
+    """
+    Memory-bounded set of seen URLs, a scalable Bloom filter.
+
+    URLs are stored as bits of a sequence of Bloom filters (stages). When a
+    stage holds `capacity` URLs, a new stage twice as large is added, with
+    half the false-positive rate of the previous one, so the expected
+    false-positive rate of the whole filter stays below `error_rate` however
+    many URLs are added. A false positive makes the filter report an unseen
+    URL as seen.
+
+    Stages are blocked Bloom filters: all bits of a URL are set in a single
+    256-bit block, so a lookup reads one block instead of one byte per hash
+    function, at the cost of more bits per URL, e.g. 49 instead of 29 for
+    a false-positive rate of one in a million.
+
+    With `directory`, full stages are written to files in it and mapped into
+    memory read-only, so only the active stage takes process memory and the
+    rest is left to the page cache of the operating system.
+
+    Pages of a site mostly link to the same navigation pages, so the last
+    `RECENT` URLs are also kept in two small exact sets, which answer most
+    lookups without computing any hashes.
+    """
+
+    GROWTH = 2
+    TIGHTENING = 0.5
+    RECENT = 8192
+
+    def __init__(self, capacity=DEFAULT_CAPACITY,
+                 error_rate=DEFAULT_ERROR_RATE, directory=None):
+        if not 0 < error_rate < 1:
+            raise ValueError("URL filter error rate must be between 0 and 1")
+        self.error_rate = error_rate
+        self._directory = None
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+            self._directory = tempfile.mkdtemp(
+                prefix="url-filter-", dir=directory
+            )
+        # Rates of the stages form a geometric series summing up to the
+        # error rate of the filter.
+        self._stages = [_Stage(capacity, error_rate * (1 - self.TIGHTENING))]
+        self._count = 0
+        self._recent: set = set()
+        self._older: set = set()
+
+    def add(self, url):
+        """
+        Add URL to the filter.
+
+        Parameters:
+            self (object): The instance of the class containing this method.
+            url (str): URL to be added.
+
+        Returns:
+            bool: True if the URL was not seen before, False otherwise.
+        """
+        if url in self._recent or url in self._older:
+            return False
+        self._remember(url)
+        digest = self._digest(url)
+        for stage in self._stages:
+            if digest in stage:
+                return False
+        stage = self._stages[-1]
+        if stage.count >= stage.capacity:
+            stage = self._grow()
+        stage.add(digest)
+        self._count += 1
+        return True
+
+    def __contains__(self, url):
+        if url in self._recent or url in self._older:
+            return True
+        digest = self._digest(url)
+        return any(digest in stage for stage in self._stages)
+
+    def __len__(self):
+        return self._count
+
+    def stats(self):
+        """
+        Return number of URLs, memory footprint and estimated false-positive
+        rate of the filter.
+        """
+        memory = sum(len(s.bits) for s in self._stages if not s.spilled)
+        disk = sum(len(s.bits) for s in self._stages if s.spilled)
+        error_rate = sum(
+            stage.estimated_error_rate() for stage in self._stages
+        )
+        return {
+            "urls": self._count,
+            "stages": len(self._stages),
+            "memory_bytes": memory,
+            "disk_bytes": disk,
+            "bits_per_url": (memory + disk) * 8 / self._count
+            if self._count else 0.0,
+            "error_rate": error_rate,
+        }
+
+    def write_stats(self, stats):
+        """
+        Store stats of the filter in the crawler stats, under the
+        `custom/url_filter/` prefix.
+        """
+        for key, value in self.stats().items():
+            stats.set_value(STATS_PREFIX + key, value)
+
+    def close(self):
+        """
+        Remove files of the stages written to disk.
+        """
+        for stage in self._stages:
+            if stage.spilled:
+                stage.bits.close()
+        if self._directory:
+            shutil.rmtree(self._directory, ignore_errors=True)
+
+    def _remember(self, url):
+        if len(self._recent) >= self.RECENT:
+            self._older = self._recent
+            self._recent = set()
+        self._recent.add(url)
+
+    def _grow(self):
+        full = self._stages[-1]
+        if self._directory:
+            full.spill(
+                os.path.join(self._directory, f"{len(self._stages)}.bloom")
+            )
+        stage = _Stage(
+            full.capacity * self.GROWTH, full.error_rate * self.TIGHTENING
+        )
+        self._stages.append(stage)
+        return stage
+
+    @staticmethod
+    def _digest(url):
+        return hashlib.blake2b(url.encode(), digest_size=64).digest()
+
+
+class UrlFilterDupeFilter(BaseDupeFilter):
+    """
+    Scrapy duplicates filter backed by the `UrlFilter` of the spider.
+
+    Spiders add discovered links to their filter before creating requests,
+    and mark the requests with the URL they added, so such requests are not
+    checked again. Other requests, e.g. redirects, are checked here. The
+    spider filter is then the only record of seen URLs, instead of one set
+    of URLs in the spider and another one of request fingerprints in the
+    scheduler.
+    """
+
+    def __init__(self, crawler):
+        self.crawler = crawler
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        return cls(crawler)
+
+    def request_seen(self, request):
+        if request.meta.get(SEEN_KEY) == request.url:
+            return False
+        spider = self.crawler.spider
+        url = spider.normalizer.normalize(None, request.url) or request.url
+        return not spider.url_filter.add(url)
+
+    def log(self, request, spider):
+        spider.crawler.stats.inc_value("dupefilter/filtered", spider=spider)
@@ -0,0 +1,60 @@
+import sys
+
+
+class UrlIndex:
+    """
+    Set of URLs with constant time membership checks.
+
+    Every added URL is interned and mapped to a small integer ID, so the
+    same URL string is stored only once no matter how many pages link to it.
+    Iteration yields the URLs in insertion order.
+    """
+
+    def __init__(self, urls=()):
+        self._ids: dict = {}
+        self._urls: list = []
+        for url in urls:
+            self.add(url)
+
+    def add(self, url):
+        """
+        Add URL to the index.
+
+        Parameters:
+            self (object): The instance of the class containing this method.
+            url (str): URL to be added.
+
+        Returns:
+            bool: True if the URL was not in the index before, False
+                  otherwise.
+        """
+        if url in self._ids:
+            return False
+        url = sys.intern(url)
+        self._ids[url] = len(self._urls)
+        self._urls.append(url)
+        return True
+
+    def id(self, url):
+        """
+        Return integer ID of the URL or None if it is not indexed.
+        """
+        return self._ids.get(url)
+
+    def url(self, url_id):
+        """
+        Return URL with the given integer ID.
+        """
+        return self._urls[url_id]
+
+    def __contains__(self, url):
+        return url in self._ids
+
+    def __iter__(self):
+        return iter(self._urls)
+
+    def __len__(self):
+        return len(self._urls)
+
+    def __bool__(self):
+        return bool(self._urls)
@@ -0,0 +1,97 @@
+from functools import lru_cache
+from urllib.parse import urljoin
+
+DEFAULT_CACHE_SIZE = 65536
+
+_SKIPPED_PREFIXES = ("https://", "http://", "mailto:", "#")
+
+
+class UrlNormalizer:
+    """
+    Resolve hrefs found on pages of the domain to absolute URLs.
+
+    Resolved URLs end with a slash and have no fragment. Links to other
+    domains, `mailto:` links and in-page `#` anchors are skipped.
+
+    Results are kept in a bounded LRU cache keyed on (base, href). Links
+    which do not depend on the page they were found on (root relative and
+    absolute ones) are cached once for all pages.
+    """
+
+    def __init__(self, domain, cache_size=DEFAULT_CACHE_SIZE):
+        self.domain = domain
+        self._resolve = lru_cache(maxsize=cache_size)(self._resolve_link)
+
+    def normalize(self, base, href):
+        """
+        Resolve single href.
+
+        Parameters:
+            self (object): The instance of the class containing this method.
+            base (str): URL of the page the href was found on.
+            href (str): Value of the href attribute.
+
+        Returns:
+            str: Absolute URL or None if the link should be skipped.
+        """
+        if href.startswith("/") or href.startswith(self.domain):
+            base = None
+        return self._resolve(base, href)
+
+    def normalize_all(self, base, hrefs):
+        """
+        Resolve all hrefs found on a single page.
+
+        Parameters:
+            self (object): The instance of the class containing this method.
+            base (str): URL of the page the hrefs were found on.
+            hrefs (list): Values of the href attributes.
+
+        Returns:
+            list: Absolute URLs of the links that were not skipped, in the
+                  order of the hrefs.
+        """
+        domain = self.domain
+        resolve = self._resolve
+        links = []
+        for href in hrefs:
+            if href.startswith("/") or href.startswith(domain):
+                link = resolve(None, href)
+            else:
+                link = resolve(base, href)
+            if link is not None:
+                links.append(link)
+        return links
+
+    def cache_info(self):
+        """
+        Return hits, misses and size of the cache.
+        """
+        return self._resolve.cache_info()
+
+    def _resolve_link(self, base_link, incoming_link):
+        if (
+            incoming_link.startswith(_SKIPPED_PREFIXES) and
+            not incoming_link.startswith(self.domain)
+        ):
+            return None
+        if base_link is None:
+            # Root relative or absolute link, the page it was found on
+            # does not matter.
+            base_link = self.domain
+        while incoming_link.startswith(".."):
+            link_rel = base_link.split("/")[-2] + "/"
+            base_link = base_link.split(link_rel)[0]
+            incoming_link = incoming_link[2:]
+            if incoming_link:
+                incoming_link = incoming_link[1:]
+
+        if incoming_link.startswith("/"):
+            base_link = self.domain
+            incoming_link = incoming_link[1:]
+
+        incoming_link = urljoin(base_link, incoming_link)
+        incoming_link = incoming_link.split("#", 1)[0]
+        if not incoming_link.endswith("/"):
+            incoming_link = incoming_link + "/"
+        return incoming_link